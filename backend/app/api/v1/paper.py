@@ -1,45 +1,205 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-import hashlib
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, BackgroundTasks, Depends, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
 import os
 import json
 import glob
-from typing import List
-
-from app.models.schemas.paper import PaperMetadata, UploadResponse, ParseResult, SubmitRequest
+import shutil
+import zipfile
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from app.models.schemas.paper import (
+    PaperMetadata,
+    UploadResponse,
+    ParseResult,
+    SubmitRequest,
+    BatchDocument,
+    BatchStatus,
+)
 from app.models.schemas.response import ApiResponse
 from app.models.schemas.question import QuestionItem
-from app.core.task_manager import task_manager, TaskStatus
-from app.database import get_db
+from app.core.task_manager import async_task_manager, task_manager, TaskStatus
+from app.core.parse_executor import parse_executor
+from app.core.metrics import parse_jobs_total, record_parse_stats
+from app.core.upload_storage import (
+    UploadTooLargeError,
+    copy_stream,
+    iter_zip_documents,
+    save_upload,
+    temp_upload_path,
+)
+from app.database import ASYNC_DATABASE_ERRORS, SessionLocal, get_async_db
 from app.config import get_settings, init_storage
-from app.services.parse_service import ParseService
-from app.services.question_service import QuestionService
+from app.services.question_service import AsyncQuestionService
+from app.services.paper_service import AsyncPaperService
+from app.services.image_service import ImageService
+from app.services.dedup_service import DedupService
+from app.services.parse_service import PARSER_VERSION
+from app.core.parser.token_codec import build_token_index
+from app.core.parser.structure_grammar import GrammarError, get_grammar_registry
 
 router = APIRouter()
 settings = get_settings()
 
 
-def calculate_file_hash(content: bytes) -> str:
-    """Calculate SHA256 hash of file content"""
-    return hashlib.sha256(content).hexdigest()
+def get_parse_cache_key(file_hash: str, rule_set: str) -> str:
+    """Build parse result cache key from file hash, parser version and structure rules"""
+    grammar = get_grammar_registry().get(rule_set)
+    return f"{file_hash}:{PARSER_VERSION}:{grammar.fingerprint}"
+
+
+def resolve_rule_set(metadata: PaperMetadata) -> str:
+    """Pick the structure grammar rule set for a paper from its metadata"""
+    try:
+        return get_grammar_registry().resolve_name(metadata.ruleSet, metadata.paperType)
+    except GrammarError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-async def parse_paper_async(task_id: str, file_path: str, metadata: dict):
-    """Background task for parsing paper"""
+async def register_paper(
+    db: AsyncSession, task_id: str, filename: str, file_hash: str, metadata: PaperMetadata
+) -> None:
+    """Create the paper record that the task's images and questions reference"""
     try:
-        task_manager.update_status(task_id, TaskStatus.PROCESSING)
+        await AsyncPaperService(db).create_paper(task_id, filename, file_hash, metadata)
+    except ASYNC_DATABASE_ERRORS as e:
+        # Parsing does not need the database; the image manifest is skipped instead
+        await db.rollback()
+        print(f"Error creating paper record for task {task_id}: {e}")
 
-        # Initialize parse service
-        parse_service = ParseService(file_path, task_id)
 
-        # Execute parsing
-        questions = parse_service.parse()
+def parse_paper_metadata(metadata: str) -> PaperMetadata:
+    """Parse and validate the metadata JSON form field"""
+    try:
+        metadata_dict = json.loads(metadata)
+        return PaperMetadata(**metadata_dict)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid metadata JSON format")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid metadata: {str(e)}")
+
+
+def find_duplicates(questions: List[QuestionItem]) -> None:
+    """Mark parsed questions that are near-duplicates of questions already in the bank"""
+    if not settings.dedup_enabled:
+        return
+    db = SessionLocal()
+    try:
+        DedupService(db).annotate_duplicates(
+            questions, settings.dedup_threshold, settings.dedup_max_matches
+        )
+    except SQLAlchemyError as e:
+        # Duplicate hints are optional; the parse result is complete without them
+        print(f"Error checking questions for duplicates: {e}")
+    finally:
+        db.close()
+
+
+async def restore_cached_result(task_id: str, cache_key: str, questions: List[QuestionItem]) -> None:
+    """Complete a task with a cached parse result and its token index"""
+    # The bank may have changed since the result was cached
+    questions = [question.model_copy(deep=True) for question in questions]
+    await run_in_threadpool(find_duplicates, questions)
+    cached_tokens = await async_task_manager.get_cached_tokens(cache_key)
+    if cached_tokens is not None:
+        await async_task_manager.set_tokens(task_id, cached_tokens)
+    await async_task_manager.set_result(task_id, questions)
+
+
+async def keep_task_alive(task_id: str) -> None:
+    """Touch a task until cancelled, so a job waiting for a worker is not taken for orphaned"""
+    while True:
+        await asyncio.sleep(task_manager.heartbeat_interval)
+        await async_task_manager.touch(task_id)
+
+
+async def parse_paper_async(
+    task_id: str,
+    file_path: str,
+    metadata: dict,
+    cache_key: str = None,
+    owner: Optional[str] = None,
+    holds_slot: bool = True,
+    rule_set: Optional[str] = None,
+):
+    """Background task for parsing paper (runs ParseService in the worker pool)"""
+    heartbeat = asyncio.ensure_future(keep_task_alive(task_id))
+    try:
+        async def on_event(event: str, payload: Any):
+            # Publish partial results for the streaming endpoint
+            if event == "question":
+                await async_task_manager.append_question(task_id, payload)
+            elif event == "progress":
+                await async_task_manager.set_progress(task_id, payload)
+            elif event == "stats":
+                await async_task_manager.set_stats(task_id, payload)
+                record_parse_stats(payload)
+
+        # The task stays pending while it waits for a worker
+        async def on_admitted():
+            await async_task_manager.update_status(task_id, TaskStatus.PROCESSING)
+
+        # Execute parsing in a worker process so the event loop stays responsive
+        questions = await parse_executor.run(
+            file_path, task_id, on_event, owner=owner, holds_slot=holds_slot,
+            rule_set=rule_set, on_admitted=on_admitted,
+        )
+
+        # Keep the token streams so submit can store them with the questions
+        tokens = build_token_index(questions)
+        await async_task_manager.set_tokens(task_id, tokens)
+
+        await run_in_threadpool(find_duplicates, questions)
 
         # Set result
-        task_manager.set_result(task_id, questions)
+        await async_task_manager.set_result(task_id, questions)
+
+        # Remember result so re-uploads of the same file skip parsing
+        if cache_key:
+            await async_task_manager.cache_result(cache_key, task_id, questions, tokens)
+        parse_jobs_total.inc(status="success")
     except Exception as e:
-        task_manager.set_error(task_id, str(e))
+        await async_task_manager.set_error(task_id, str(e))
+        parse_jobs_total.inc(status="failed")
+    finally:
+        heartbeat.cancel()
+
+
+async def parse_batch_async(
+    batch_id: str, jobs: List[Tuple[str, str, Optional[str]]], rule_set: Optional[str] = None
+):
+    """
+    Background task for parsing the documents of a batch
+
+    All documents share the batch's queue slot and are scheduled under the
+    batch ID, so the worker pool alternates between this batch and other uploads.
+    Each document's reservation from reserve_documents is released as soon
+    as that document finishes.
+
+    Args:
+        batch_id: Batch ID
+        jobs: (task ID, file path, cache key) per document to parse
+        rule_set: Structure grammar rule set shared by the batch
+    """
+    async def parse_document(task_id: str, file_path: str, cache_key: Optional[str]):
+        try:
+            await parse_paper_async(
+                task_id, file_path, None, cache_key,
+                owner=batch_id, holds_slot=False, rule_set=rule_set,
+            )
+        finally:
+            parse_executor.release_documents()
+
+    try:
+        await asyncio.gather(*[
+            parse_document(task_id, file_path, cache_key)
+            for task_id, file_path, cache_key in jobs
+        ])
+    finally:
+        parse_executor.release_slot()
 
 
 @router.post("/upload", response_model=ApiResponse[UploadResponse])
@@ -47,7 +207,7 @@ async def upload_paper(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     metadata: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload Word document for parsing
@@ -59,41 +219,73 @@ async def upload_paper(
     if not file.filename.endswith('.docx'):
         raise HTTPException(status_code=400, detail="Only .docx files are supported")
 
-    # Read file content
-    content = await file.read()
-
-    # Validate file size
-    if len(content) > settings.max_file_size:
+    # Reject oversized files up front when the size is already known
+    if file.size is not None and file.size > settings.max_file_size:
         raise HTTPException(status_code=400, detail="File size exceeds maximum limit")
 
-    # Calculate file hash
-    file_hash = calculate_file_hash(content)
-
-    # Initialize storage directories
-    init_storage()
-
     # Parse and validate metadata
-    try:
-        metadata_dict = json.loads(metadata)
-        paper_metadata = PaperMetadata(**metadata_dict)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid metadata JSON format")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid metadata: {str(e)}")
+    paper_metadata = parse_paper_metadata(metadata)
+    rule_set = resolve_rule_set(paper_metadata)
 
     # Convert to dict for storage
     metadata_for_storage = paper_metadata.model_dump()
 
-    # Create task with metadata
-    task_id = task_manager.create_task(metadata_for_storage)
+    # Initialize storage directories
+    init_storage()
 
-    # Save file
-    file_path = os.path.join(settings.upload_dir, f"{task_id}.docx")
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Copy the spooled file to a temporary path next to its final location,
+    # hashing it and enforcing the exact size limit (BodySizeLimitMiddleware
+    # has already cut off bodies far over it while they arrived)
+    temp_path = temp_upload_path(settings.upload_dir)
+    try:
+        file_hash, _ = await save_upload(
+            file, temp_path, settings.max_file_size, settings.upload_chunk_size
+        )
+    except UploadTooLargeError:
+        raise HTTPException(status_code=400, detail="File size exceeds maximum limit")
+    except OSError:
+        raise HTTPException(status_code=500, detail="Failed to save uploaded file")
+
+    try:
+        # Reuse the cached result if this exact file was already parsed.
+        # Image URLs in cached questions keep pointing at the original task's images.
+        cache_key = get_parse_cache_key(file_hash, rule_set) if settings.parse_cache_enabled else None
+        if cache_key:
+            cached_questions = await async_task_manager.get_cached_result(cache_key)
+            if cached_questions is not None:
+                task_id = await async_task_manager.create_task(metadata_for_storage)
+                await register_paper(db, task_id, file.filename, file_hash, paper_metadata)
+                await restore_cached_result(task_id, cache_key, cached_questions)
+                return ApiResponse(
+                    success=True,
+                    message="File already parsed, reusing cached result",
+                    data=UploadResponse(taskId=task_id)
+                )
+
+        # Reserve a parse slot before accepting the job
+        if not parse_executor.acquire_slot():
+            raise HTTPException(status_code=503, detail="Parse queue is full, please retry later")
+
+        # Create task with metadata
+        task_id = await async_task_manager.create_task(metadata_for_storage)
+        await register_paper(db, task_id, file.filename, file_hash, paper_metadata)
+
+        # Move the file into place under the task ID
+        file_path = os.path.join(settings.upload_dir, f"{task_id}.docx")
+        try:
+            os.replace(temp_path, file_path)
+        except OSError:
+            parse_executor.release_slot()
+            await async_task_manager.set_error(task_id, "Failed to save uploaded file")
+            raise HTTPException(status_code=500, detail="Failed to save uploaded file")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
     # Start background parsing task
-    background_tasks.add_task(parse_paper_async, task_id, file_path, metadata_for_storage)
+    background_tasks.add_task(
+        parse_paper_async, task_id, file_path, metadata_for_storage, cache_key, rule_set=rule_set
+    )
 
     return ApiResponse(
         success=True,
@@ -102,6 +294,243 @@ async def upload_paper(
     )
 
 
+def size_limit_error(subject: str, remaining: int) -> HTTPException:
+    """
+    Error for a batch document that went over its size limit
+
+    Args:
+        subject: What went over the limit, e.g. the file name
+        remaining: Batch budget that was left for it
+    """
+    if remaining < settings.max_file_size:
+        return HTTPException(status_code=400, detail="Batch size exceeds maximum limit")
+    return HTTPException(status_code=400, detail=f"{subject} exceeds the size limit")
+
+
+async def stage_batch_documents(
+    files: List[UploadFile], staging_dir: str
+) -> List[Tuple[str, str, str]]:
+    """
+    Stream the uploaded .docx files and ZIP archives of a batch to disk
+
+    ZIP archives are saved first and their .docx entries extracted one by one,
+    so neither the upload nor an extracted document is ever held in memory.
+
+    Args:
+        files: Uploaded .docx and .zip files
+        staging_dir: Directory for the staged documents
+
+    Returns:
+        (file name, staged path, SHA256) per document, in upload order
+
+    Raises:
+        HTTPException: On unsupported files, oversized input or too many documents
+    """
+    documents: List[Tuple[str, str, str]] = []
+    remaining = settings.batch_max_size
+
+    def next_path() -> str:
+        return os.path.join(staging_dir, f"{len(documents)}.docx")
+
+    def check_count() -> None:
+        if len(documents) >= settings.batch_max_files:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch exceeds {settings.batch_max_files} documents",
+            )
+
+    for upload in files:
+        filename = os.path.basename(upload.filename or "")
+        lower_name = filename.lower()
+
+        if lower_name.endswith(".docx"):
+            check_count()
+            path = next_path()
+            try:
+                file_hash, size = await save_upload(
+                    upload, path, min(settings.max_file_size, remaining), settings.upload_chunk_size
+                )
+            except UploadTooLargeError:
+                raise size_limit_error(filename, remaining)
+            remaining -= size
+            documents.append((filename, path, file_hash))
+
+        elif lower_name.endswith(".zip"):
+            archive_path = os.path.join(staging_dir, "upload.zip")
+            try:
+                _, size = await save_upload(
+                    upload, archive_path, remaining, settings.upload_chunk_size
+                )
+            except UploadTooLargeError:
+                raise HTTPException(status_code=400, detail="Batch size exceeds maximum limit")
+            remaining -= size
+            # Extracted documents count against the same budget as the archive
+            # (and every other file of the batch)
+            try:
+                with zipfile.ZipFile(archive_path) as archive:
+                    for name, info in iter_zip_documents(archive):
+                        check_count()
+                        path = next_path()
+                        with archive.open(info) as member:
+                            file_hash, size = await run_in_threadpool(
+                                copy_stream, member, path,
+                                min(settings.max_file_size, remaining),
+                                settings.upload_chunk_size,
+                            )
+                        remaining -= size
+                        documents.append((name, path, file_hash))
+            except UploadTooLargeError:
+                raise size_limit_error(f"{filename} contains a document that", remaining)
+            except (zipfile.BadZipFile, NotImplementedError, RuntimeError):
+                # RuntimeError: encrypted entries; NotImplementedError: unsupported compression
+                raise HTTPException(status_code=400, detail=f"Invalid or unsupported ZIP archive: {filename}")
+            finally:
+                os.remove(archive_path)
+
+        else:
+            raise HTTPException(status_code=400, detail=f"Only .docx and .zip files are supported: {filename}")
+
+    return documents
+
+
+@router.post("/upload/batch", response_model=ApiResponse[BatchStatus])
+async def upload_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    metadata: str = Form(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Upload a batch of Word documents for parsing
+
+    - Accepts several .docx files and/or ZIP archives of .docx files
+    - metadata applies to every document; each paper is named after its file
+    - Returns a batchId plus one taskId per document
+    - Documents are parsed in the background, sharing the worker pool fairly with other uploads
+    """
+    paper_metadata = parse_paper_metadata(metadata)
+    rule_set = resolve_rule_set(paper_metadata)
+
+    init_storage()
+    batch_id = task_manager.create_batch_id()
+    staging_dir = os.path.join(settings.upload_dir, "batches", batch_id)
+    os.makedirs(staging_dir, exist_ok=True)
+
+    try:
+        documents = await stage_batch_documents(files, staging_dir)
+        if not documents:
+            raise HTTPException(status_code=400, detail="No .docx files found in upload")
+
+        cache_keys = [
+            get_parse_cache_key(file_hash, rule_set) if settings.parse_cache_enabled else None
+            for _, _, file_hash in documents
+        ]
+        cached_results = [
+            await async_task_manager.get_cached_result(cache_key) if cache_key else None
+            for cache_key in cache_keys
+        ]
+
+        # The whole batch holds a single queue slot; its documents count
+        # against the separate cap on pending batch documents
+        parse_count = sum(1 for result in cached_results if result is None)
+        needs_parse = parse_count > 0
+        if needs_parse and not parse_executor.reserve_documents(parse_count):
+            raise HTTPException(status_code=503, detail="Parse queue is full, please retry later")
+        if needs_parse and not parse_executor.acquire_slot():
+            parse_executor.release_documents(parse_count)
+            raise HTTPException(status_code=503, detail="Parse queue is full, please retry later")
+
+        jobs: List[Tuple[str, str, Optional[str]]] = []
+        try:
+            for (filename, staged_path, file_hash), cache_key, cached_questions in zip(
+                documents, cache_keys, cached_results
+            ):
+                document_metadata = paper_metadata.model_copy(
+                    update={"name": os.path.splitext(filename)[0]}
+                )
+                task_id = await async_task_manager.create_task(
+                    document_metadata.model_dump(), batch_id=batch_id, filename=filename
+                )
+                await register_paper(db, task_id, filename, file_hash, document_metadata)
+
+                if cached_questions is not None:
+                    await restore_cached_result(task_id, cache_key, cached_questions)
+                    continue
+
+                file_path = os.path.join(settings.upload_dir, f"{task_id}.docx")
+                os.replace(staged_path, file_path)
+                jobs.append((task_id, file_path, cache_key))
+        except OSError:
+            if needs_parse:
+                parse_executor.release_slot()
+                parse_executor.release_documents(parse_count)
+            for task in await async_task_manager.get_batch_tasks(batch_id):
+                if task.status == TaskStatus.PENDING:
+                    await async_task_manager.set_error(task.task_id, "Failed to save uploaded file")
+            raise HTTPException(status_code=500, detail="Failed to save uploaded files")
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    if jobs:
+        background_tasks.add_task(parse_batch_async, batch_id, jobs, rule_set)
+
+    return ApiResponse(
+        success=True,
+        message=f"Batch uploaded successfully ({len(documents)} documents)",
+        data=await get_batch_status(batch_id)
+    )
+
+
+async def get_batch_status(batch_id: str) -> Optional[BatchStatus]:
+    """Summarize the parse status of every document in a batch"""
+    tasks = await async_task_manager.get_batch_tasks(batch_id)
+    if not tasks:
+        return None
+
+    documents = [
+        BatchDocument(
+            taskId=task.task_id,
+            filename=task.filename or "",
+            status=task.status.value,
+            progress=task.progress,
+            error=task.error if task.status == TaskStatus.FAILED else None,
+        )
+        for task in tasks
+    ]
+    completed = sum(1 for task in tasks if task.status == TaskStatus.COMPLETED)
+    failed = sum(1 for task in tasks if task.status == TaskStatus.FAILED)
+    finished = completed + failed == len(tasks)
+
+    return BatchStatus(
+        batchId=batch_id,
+        status=TaskStatus.COMPLETED.value if finished else TaskStatus.PROCESSING.value,
+        total=len(tasks),
+        completed=completed,
+        failed=failed,
+        documents=documents,
+    )
+
+
+@router.get("/batch/{batch_id}", response_model=ApiResponse[BatchStatus])
+async def get_batch_result(batch_id: str):
+    """
+    Get the status of every document in a batch
+
+    - Returns per-document status and progress in one call
+    - Fetch each document's questions with /result/{taskId}
+    """
+    status = await get_batch_status(batch_id)
+
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    return ApiResponse(
+        success=True,
+        message="Batch retrieved successfully",
+        data=status
+    )
+
+
 @router.get("/result/{task_id}", response_model=ApiResponse[ParseResult])
 async def get_parse_result(task_id: str):
     """
@@ -110,7 +539,7 @@ async def get_parse_result(task_id: str):
     - Returns status: pending, processing, completed, failed
     - Returns questions array when status=completed
     """
-    task = task_manager.get_task(task_id)
+    task = await async_task_manager.get_task(task_id)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -120,6 +549,8 @@ async def get_parse_result(task_id: str):
         status=task.status.value,
         metadata=task.metadata,
         questions=task.questions if task.questions else [],
+        progress=task.progress,
+        stats=task.stats,
         error=task.error if task.status == TaskStatus.FAILED else None
     )
 
@@ -130,10 +561,80 @@ async def get_parse_result(task_id: str):
     )
 
 
+def format_sse(event: str, data: str) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def stream_parse_events(task_id: str) -> AsyncIterator[str]:
+    """
+    Yield SSE messages for a task until it finishes
+
+    Events:
+        question: one QuestionItem as soon as its block is parsed
+        progress: {"blocksDone", "blocksTotal", "imagesExtracted"}
+        done: {"count"} once the full result is available
+        error: {"error"} if parsing failed, or if the task stopped being
+            updated before it finished (its job was lost, e.g. in a restart)
+    """
+    sent = 0
+    last_progress = None
+
+    while True:
+        task = await async_task_manager.get_task(task_id)
+        if task is None:
+            yield format_sse("error", json.dumps({"error": "Task not found"}))
+            return
+
+        if task.status == TaskStatus.COMPLETED:
+            questions = task.questions or []
+            for question in questions[sent:]:
+                yield format_sse("question", question.model_dump_json())
+            yield format_sse("done", json.dumps({"count": len(questions)}))
+            return
+
+        if task.status == TaskStatus.FAILED:
+            yield format_sse("error", json.dumps({"error": task.error}, ensure_ascii=False))
+            return
+
+        if task_manager.is_stale(task):
+            await async_task_manager.set_error(task_id, task_manager.STALE_ERROR)
+            yield format_sse("error", json.dumps({"error": task_manager.STALE_ERROR}, ensure_ascii=False))
+            return
+
+        for question in await async_task_manager.get_streamed_questions(task_id, sent):
+            yield format_sse("question", question.model_dump_json())
+            sent += 1
+
+        if task.progress and task.progress != last_progress:
+            last_progress = task.progress
+            yield format_sse("progress", json.dumps(task.progress))
+
+        await asyncio.sleep(settings.stream_poll_interval)
+
+
+@router.get("/stream/{task_id}")
+async def stream_parse_result(task_id: str):
+    """
+    Stream parsing results by task ID (Server-Sent Events)
+
+    - Emits each question as soon as it is parsed, plus progress events
+    - Ends with a done or error event
+    """
+    if not await async_task_manager.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    return StreamingResponse(
+        stream_parse_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/submit", response_model=ApiResponse[dict])
 async def submit_questions(
     request: SubmitRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit proofread questions to database
@@ -141,14 +642,16 @@ async def submit_questions(
     - Saves questions to database
     - Returns success status
     """
-    task = task_manager.get_task(request.taskId)
+    task = await async_task_manager.get_task(request.taskId)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
     # Save questions to database
-    question_service = QuestionService(db)
-    count = question_service.save_questions(request.taskId, request.questions)
+    question_service = AsyncQuestionService(db)
+    count = await question_service.save_questions(
+        request.taskId, request.questions, await async_task_manager.get_tokens(request.taskId)
+    )
 
     return ApiResponse(
         success=True,
@@ -157,13 +660,57 @@ async def submit_questions(
     )
 
 
+# Extracted images never change once written, so clients may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
 @router.get("/images/{task_id}/{image_id}")
-async def get_image(task_id: str, image_id: str):
+async def get_image(
+    task_id: str,
+    image_id: str,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get image by task ID and image ID
 
-    - Returns image file
+    - Served from the image manifest with a content-hash ETag
+    - Returns 304 if the client already has the image
     """
+    record = None
+    if image_id.isdigit():
+        try:
+            record = await db.run_sync(
+                lambda session: ImageService(session).get_image(task_id, int(image_id))
+            )
+        except ASYNC_DATABASE_ERRORS:
+            # Manifest unavailable, serve from the task directory instead
+            record = None
+
+    if record is None:
+        return get_image_from_task_dir(task_id, image_id)
+
+    etag = f'"{record.sha256}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if not os.path.exists(record.file_path):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return FileResponse(record.file_path, media_type=record.content_type, headers=headers)
+
+
+def get_image_from_task_dir(task_id: str, image_id: str) -> FileResponse:
+    """Find an image by file name, for tasks parsed before the manifest existed"""
     # Construct image directory path
     image_dir = os.path.join(settings.image_dir, task_id)
 
@@ -187,7 +734,11 @@ async def get_image(task_id: str, image_id: str):
         '.jpg': 'image/jpeg',
         '.jpeg': 'image/jpeg',
         '.gif': 'image/gif',
-        '.bmp': 'image/bmp'
+        '.bmp': 'image/bmp',
+        '.tiff': 'image/tiff',
+        '.webp': 'image/webp',
+        '.wmf': 'image/wmf',
+        '.emf': 'image/emf'
     }
     media_type = media_type_map.get(ext, 'image/png')
 
@@ -0,0 +1,208 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional
+
+from app.models.database.question import Question
+from app.models.database.question_content import ContentType
+from app.models.schemas.question import (
+    BulkTagRequest,
+    BulkTagResult,
+    QuestionBankItem,
+    QuestionPage,
+    QuestionSearchHit,
+    TagStatus,
+)
+from app.models.schemas.response import ApiResponse
+from app.database import ASYNC_DATABASE_ERRORS, get_async_db
+from app.config import get_settings
+from app.core.text_search import build_tsquery
+from app.services.question_service import AsyncQuestionService, tag_status_of
+
+router = APIRouter()
+settings = get_settings()
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the keyset position after a page as an opaque cursor"""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor from encode_cursor back into the last question ID"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+def build_bank_item(question: Question, paper_metadata: Dict[str, Any]) -> QuestionBankItem:
+    """Convert a saved question and its paper metadata to the API schema"""
+    html_by_type = {content.content_type: content.html for content in question.contents}
+    options_html = html_by_type.get(ContentType.OPTIONS)
+    paper_metadata = paper_metadata or {}
+
+    return QuestionBankItem(
+        id=question.id,
+        taskId=question.task_id,
+        paperName=paper_metadata.get("name"),
+        subject=paper_metadata.get("subject"),
+        number=question.number,
+        type=question.type,
+        stem=html_by_type.get(ContentType.STEM, ""),
+        # Options are stored joined with <br> (see QuestionService._insert_contents)
+        options=options_html.split("<br>") if options_html else None,
+        answer=html_by_type.get(ContentType.ANSWER),
+        analysis=html_by_type.get(ContentType.ANALYSIS),
+        material=question.group.material_content if question.group else None,
+        knowledgePoints=question.knowledge_points or [],
+        difficulty=question.difficulty,
+        groupId=question.group_id,
+        parentNumber=question.parent_number,
+        duplicateOf=question.duplicate_of,
+        tagStatus=tag_status_of(question),
+    )
+
+
+@router.get("", response_model=ApiResponse[QuestionPage])
+async def list_questions(
+    subject: Optional[str] = Query(None, description="Paper subject"),
+    paper_id: Optional[str] = Query(None, alias="paperId", description="Source paper task ID"),
+    question_type: Optional[List[str]] = Query(None, alias="type", description="Question types (repeatable)"),
+    difficulty: Optional[List[int]] = Query(None, ge=1, le=5, description="Difficulty levels (repeatable)"),
+    knowledge_point: Optional[List[str]] = Query(
+        None, alias="knowledgePoint", description="Knowledge point IDs, all required (repeatable)"
+    ),
+    tag_status: Optional[TagStatus] = Query(None, alias="tagStatus"),
+    duplicate: Optional[bool] = Query(None, description="true: only near-duplicates, false: hide them"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Query the question bank for the tagging workflow
+
+    - Filters by subject, paper, type, difficulty, knowledge points, tag status
+      and near-duplicate status
+    - Keyset pagination: pass nextCursor back as cursor to get the next page
+    """
+    after_id = decode_cursor(cursor) if cursor else None
+
+    rows, has_more = await AsyncQuestionService(db).query_questions(
+        subject=subject,
+        task_id=paper_id,
+        question_types=question_type,
+        difficulties=difficulty,
+        knowledge_points=knowledge_point,
+        tag_status=tag_status,
+        duplicate=duplicate,
+        after_id=after_id,
+        limit=limit,
+    )
+
+    items = [build_bank_item(question, paper_metadata) for question, paper_metadata in rows]
+    next_cursor = encode_cursor(items[-1].id) if has_more else None
+
+    return ApiResponse(
+        success=True,
+        message=f"Found {len(items)} questions",
+        data=QuestionPage(items=items, nextCursor=next_cursor)
+    )
+
+
+@router.get("/search", response_model=ApiResponse[List[QuestionSearchHit]])
+async def search_questions(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text; space-separated parts must all match"),
+    subject: Optional[str] = Query(None, description="Paper subject"),
+    question_type: Optional[List[str]] = Query(None, alias="type", description="Question types (repeatable)"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of results"),
+    offset: int = Query(0, ge=0, le=1000, description="Results to skip"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over saved questions
+
+    - Matches stems, options, answers and analyses by phrase
+    - Results are ranked, stem matches first
+    """
+    tsquery = build_tsquery(q)
+    if tsquery is None:
+        raise HTTPException(status_code=400, detail="Search text has no searchable characters")
+
+    rows = await AsyncQuestionService(db).search_questions(
+        tsquery,
+        subject=subject,
+        question_types=question_type,
+        limit=limit,
+        offset=offset,
+    )
+    hits = [
+        QuestionSearchHit(**build_bank_item(question, paper_metadata).model_dump(), score=score)
+        for question, paper_metadata, score in rows
+    ]
+
+    return ApiResponse(
+        success=True,
+        message=f"Found {len(hits)} questions",
+        data=hits
+    )
+
+
+@router.post("/tags", response_model=ApiResponse[BulkTagResult])
+async def bulk_tag_questions(
+    request: BulkTagRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Apply the same tags to many questions at once
+
+    - Sets difficulty and/or type, adds and removes knowledge points
+    - Existing knowledge points not named in the request are kept
+    - All-or-nothing: either every question is updated or none is
+    """
+    if (
+        request.difficulty is None
+        and request.type is None
+        and not request.addKnowledgePoints
+        and not request.removeKnowledgePoints
+    ):
+        raise HTTPException(status_code=400, detail="No tag changes given")
+
+    question_ids = list(dict.fromkeys(request.questionIds))
+    if len(question_ids) > settings.bulk_tag_max_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many questions (maximum {settings.bulk_tag_max_ids} per request)"
+        )
+
+    try:
+        updated = await AsyncQuestionService(db).bulk_tag_questions(
+            question_ids,
+            difficulty=request.difficulty,
+            question_type=request.type,
+            add_knowledge_points=request.addKnowledgePoints,
+            remove_knowledge_points=request.removeKnowledgePoints,
+            chunk_size=settings.bulk_tag_chunk_size,
+        )
+    except ASYNC_DATABASE_ERRORS as e:
+        print(f"Error bulk tagging {len(question_ids)} questions: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update question tags")
+
+    return ApiResponse(
+        success=True,
+        message=f"Successfully tagged {updated} questions",
+        data=BulkTagResult(
+            requested=len(question_ids),
+            updated=updated,
+            notFound=len(question_ids) - updated,
+        )
+    )
@@ -0,0 +1,59 @@
+from typing import Dict
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Room for the form fields (metadata) and multipart headers next to the files
+MULTIPART_OVERHEAD = 1048576
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject upload request bodies over a size limit while they are received
+
+    Starlette's multipart parser spools a whole upload to a temporary file
+    before the endpoint sees it, so the size checks in the upload endpoints
+    only run once the body has arrived. This middleware rejects a declared
+    Content-Length over the limit before reading anything, and counts the
+    bytes of the body as they arrive, so a chunked upload is cut off as soon
+    as it goes over.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        """
+        Initialize body size limit middleware
+
+        Args:
+            app: ASGI application
+            limits: Maximum payload bytes by request path (the files; form
+                overhead is added on top)
+        """
+        self.app = app
+        self.limits = {path: size + MULTIPART_OVERHEAD for path, size in limits.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": "Request body exceeds maximum limit"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing, which passes HTTPException on
+                    raise HTTPException(status_code=413, detail="Request body exceeds maximum limit")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,133 @@
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core.text_search import html_to_text
+
+# MinHash signature size and LSH banding. Stored signatures depend on these
+# (and on the seed), so changing them requires recomputing every signature.
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SIGNATURE_SEED = 20260122
+
+SHINGLE_SIZE = 3
+# Shorter texts ("(1) 求x的值") say too little to call anything a duplicate
+MIN_TEXT_LENGTH = 12
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(SIGNATURE_SEED)
+_PERMUTATIONS = [
+    (_random.randrange(1, _MERSENNE_PRIME), _random.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# Everything but letters, digits and CJK ideographs is dropped before shingling
+_NOISE_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_text(html_parts: Iterable[Optional[str]]) -> str:
+    """
+    Normalize question HTML for near-duplicate comparison
+
+    Formulas reduce to the text of their MathML tokens (their canonical
+    form here), so the same formula typed with different markup compares
+    equal. Punctuation, spacing and letter case are dropped.
+
+    Args:
+        html_parts: HTML fragments (material, stem, options)
+
+    Returns:
+        Normalized text
+    """
+    text = "".join(html_to_text(html) for html in html_parts)
+    return _NOISE_PATTERN.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def minhash_signature(text: str) -> Optional[List[int]]:
+    """
+    Compute the MinHash signature of normalized text
+
+    Args:
+        text: Text from normalize_text
+
+    Returns:
+        NUM_PERMUTATIONS values below 2^61, or None if the text is too short
+    """
+    if len(text) < MIN_TEXT_LENGTH:
+        return None
+    shingles = {
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8"))
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+    return [
+        min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def lsh_bands(signature: List[int]) -> List[int]:
+    """
+    Hash each band of a signature into a signed 64-bit key
+
+    Two signatures become candidates when they share any band key. With
+    16 bands of 4 rows, pairs at Jaccard similarity 0.8 collide with
+    probability ~0.9996 and pairs at 0.3 with ~0.12.
+
+    Args:
+        signature: MinHash signature
+
+    Returns:
+        LSH_BANDS band keys (the band number is part of each key)
+    """
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(
+            struct.pack(f"<H{LSH_ROWS}Q", band, *rows), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def estimate_similarity(first: List[int], second: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERMUTATIONS
+
+
+class LshIndex:
+    """In-memory LSH index, for finding duplicates within one paper or batch"""
+
+    def __init__(self):
+        self._buckets: Dict[int, List[int]] = {}
+        self._signatures: Dict[int, List[int]] = {}
+
+    def add(self, key: int, signature: List[int]) -> None:
+        self._signatures[key] = signature
+        for band_key in lsh_bands(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def query(self, signature: List[int], threshold: float) -> List[Tuple[int, float]]:
+        """
+        Find indexed signatures similar to a signature
+
+        Args:
+            signature: MinHash signature
+            threshold: Minimum estimated similarity
+
+        Returns:
+            (key, similarity) pairs, most similar first
+        """
+        candidates: Set[int] = set()
+        for band_key in lsh_bands(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        matches = [
+            (key, estimate_similarity(signature, self._signatures[key]))
+            for key in candidates
+        ]
+        matches = [match for match in matches if match[1] >= threshold]
+        matches.sort(key=lambda match: -match[1])
+        return matches
@@ -0,0 +1,396 @@
+import asyncio
+import multiprocessing
+import queue
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Deque, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import get_settings
+from app.core.metrics import GaugeFunction, registry
+from app.database import SessionLocal
+from app.models.schemas.question import QuestionItem
+from app.services.image_service import ImageService
+from app.services.parse_service import ParseService
+
+
+class ParseTimeoutError(Exception):
+    """Raised when a parse job does not finish within the configured timeout"""
+
+
+# Receives (event, payload) pairs from ParseService.iter_parse in the parent
+# process; awaited, so a handler can hand its store writes to a thread
+EventCallback = Callable[[str, Any], Awaitable[None]]
+
+
+def run_parse_job(
+    file_path: str, task_id: str, event_queue=None, rule_set: Optional[str] = None
+) -> List[QuestionItem]:
+    """
+    Parse a Word document inside a worker process
+
+    Args:
+        file_path: Path to uploaded .docx file
+        task_id: Task ID for this parsing job
+        event_queue: Optional manager queue that receives every parse event
+        rule_set: Structure grammar rule set (the default rule set if omitted)
+
+    Returns:
+        List of QuestionItem objects (picklable, sent back to the parent)
+    """
+    parse_service = ParseService(file_path, task_id, rule_set)
+    if event_queue is None:
+        questions = parse_service.parse()
+    else:
+        questions = []
+        for event, payload in parse_service.iter_parse():
+            if event == "question":
+                questions.append(payload)
+            event_queue.put((event, payload))
+
+    save_image_manifest(task_id, parse_service.image_parser.images)
+    return questions
+
+
+def save_image_manifest(task_id: str, images: list) -> None:
+    """
+    Persist the extracted image manifest for the image endpoint
+
+    Failures are not fatal: the image endpoint falls back to the task directory.
+
+    Args:
+        task_id: Task ID
+        images: ImageInfo objects from the image parser
+    """
+    db = SessionLocal()
+    try:
+        ImageService(db).save_manifest(task_id, images)
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Error saving image manifest for task {task_id}: {e}")
+    finally:
+        db.close()
+
+
+class FairScheduler:
+    """
+    Admit jobs onto a fixed number of workers, round-robin across owners
+
+    Jobs of the same owner (e.g. the documents of one batch) run in
+    submission order, but each owner gets one job admitted before any owner
+    gets a second, so a large batch cannot starve single uploads.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize scheduler
+
+        Args:
+            capacity: Number of jobs allowed to run at once
+        """
+        self.capacity = max(1, capacity)
+        self._running = 0
+        # owner -> waiters, in the order owners get their next turn
+        self._waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    async def acquire(self, owner: str) -> None:
+        """Wait until a job of this owner may run"""
+        if self._running < self.capacity and not self._waiting:
+            self._running += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(owner, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The turn was already handed over; pass it on
+                self.release()
+            else:
+                self._remove(owner, waiter)
+            raise
+
+    def release(self) -> None:
+        """Finish a job and hand its turn to the next owner in line"""
+        while self._waiting:
+            owner, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiting.move_to_end(owner)
+            else:
+                del self._waiting[owner]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._running -= 1
+
+    @property
+    def running(self) -> int:
+        """Number of admitted jobs"""
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    def _remove(self, owner: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiting.get(owner)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[owner]
+
+
+class ParseExecutor:
+    """Bounded process pool that keeps CPU-bound parsing off the event loop"""
+
+    # Seconds between checks for events sent by a running job
+    EVENT_POLL_INTERVAL = 0.1
+
+    def __init__(
+        self, max_workers: int, max_queued: int, timeout: int, max_queued_documents: int = 400
+    ):
+        """
+        Initialize parse executor
+
+        Args:
+            max_workers: Number of worker processes
+            max_queued: Maximum jobs running or waiting at once
+            timeout: Seconds to wait for a single job
+            max_queued_documents: Maximum batch documents running or waiting
+                at once (a whole batch holds a single queue slot)
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(self.max_workers, max_queued)
+        self.max_queued_documents = max(1, max_queued_documents)
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._slots = 0
+        self._documents = 0
+        self._scheduler = FairScheduler(self.max_workers)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._pool is None:
+            # Spawn instead of fork so workers never inherit the running event loop
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _get_manager(self):
+        """Start the manager process that hosts event queues on first use"""
+        if self._manager is None:
+            self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager
+
+    def acquire_slot(self) -> bool:
+        """
+        Reserve a queue slot for a new job
+
+        Returns:
+            True if the slot was reserved, False if the queue is full
+        """
+        if self._slots >= self.max_queued:
+            return False
+        self._slots += 1
+        return True
+
+    @property
+    def slots_in_use(self) -> int:
+        """Number of reserved queue slots"""
+        return self._slots
+
+    @property
+    def jobs_running(self) -> int:
+        """Number of jobs admitted to the worker pool"""
+        return self._scheduler.running
+
+    @property
+    def jobs_waiting(self) -> int:
+        """Number of jobs waiting for a free worker"""
+        return self._scheduler.waiting
+
+    def release_slot(self) -> None:
+        """Release a slot reserved with acquire_slot"""
+        if self._slots > 0:
+            self._slots -= 1
+
+    def reserve_documents(self, count: int) -> bool:
+        """
+        Reserve room for the documents of a batch
+
+        Args:
+            count: Number of documents the batch will parse
+
+        Returns:
+            True if reserved, False if the pending batch documents would exceed the cap
+        """
+        if self._documents + count > self.max_queued_documents:
+            return False
+        self._documents += count
+        return True
+
+    @property
+    def documents_queued(self) -> int:
+        """Number of reserved batch documents not yet finished"""
+        return self._documents
+
+    def release_documents(self, count: int = 1) -> None:
+        """Release batch documents reserved with reserve_documents"""
+        self._documents = max(0, self._documents - count)
+
+    async def run(
+        self,
+        file_path: str,
+        task_id: str,
+        on_event: Optional[EventCallback] = None,
+        owner: Optional[str] = None,
+        holds_slot: bool = True,
+        rule_set: Optional[str] = None,
+        on_admitted: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> List[QuestionItem]:
+        """
+        Run a parse job in the worker pool
+
+        Unless holds_slot is False, the caller must hold a slot from
+        acquire_slot; it is released here once the job finishes, fails or
+        times out. A timed-out job cannot be interrupted inside its worker
+        process, it only stops being awaited; its worker stays taken (no
+        other job is admitted onto it) until the job actually returns.
+
+        Jobs wait for a free worker in fair order across owners; the timeout
+        only starts once the job is admitted.
+
+        Args:
+            file_path: Path to uploaded .docx file
+            task_id: Task ID for this parsing job
+            on_event: Awaited on the event loop for each progress/question
+                event while the job runs; all events are delivered before
+                this method returns
+            owner: Scheduling group (e.g. a batch ID); defaults to the task ID
+            holds_slot: Whether this job holds its own queue slot (batch
+                documents share the slot of their batch)
+            rule_set: Structure grammar rule set (the default rule set if omitted)
+            on_admitted: Awaited once the job gets a worker, before it is submitted
+                (e.g. to mark the task as processing)
+
+        Returns:
+            List of QuestionItem objects
+        """
+        try:
+            await self._scheduler.acquire(owner or task_id)
+            return await self._run_admitted(file_path, task_id, on_event, rule_set, on_admitted)
+        finally:
+            if holds_slot:
+                self.release_slot()
+
+    async def _run_admitted(
+        self,
+        file_path: str,
+        task_id: str,
+        on_event: Optional[EventCallback],
+        rule_set: Optional[str] = None,
+        on_admitted: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> List[QuestionItem]:
+        """
+        Submit an admitted job to the pool and wait for it (and its events)
+
+        The scheduler turn taken in run() is handed back when the worker
+        future finishes, not when waiting for it stops.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            if on_admitted:
+                await on_admitted()
+            event_queue = self._get_manager().Queue() if on_event else None
+            future = loop.run_in_executor(
+                self._get_pool(), run_parse_job, file_path, task_id, event_queue, rule_set
+            )
+        except BaseException:
+            self._scheduler.release()
+            raise
+        future.add_done_callback(lambda _: self._scheduler.release())
+
+        # Shielded so a timeout (or cancellation) stops the wait without
+        # marking the still-running worker future as done
+        waited = asyncio.shield(future)
+        drain = None
+        if on_event:
+            drain = asyncio.ensure_future(
+                self._drain_events(event_queue, waited, on_event)
+            )
+        try:
+            return await asyncio.wait_for(waited, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise ParseTimeoutError(
+                f"Parsing timed out after {self.timeout} seconds"
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            self._pool = None
+            raise
+        finally:
+            if drain is not None:
+                await drain
+
+    async def _drain_events(self, event_queue, future, on_event: EventCallback) -> None:
+        """Forward events from a job's queue until the job is done and the queue is empty"""
+        while True:
+            finished = future.done()
+            while True:
+                try:
+                    event, payload = event_queue.get_nowait()
+                except queue.Empty:
+                    break
+                await on_event(event, payload)
+            if finished:
+                return
+            await asyncio.sleep(self.EVENT_POLL_INTERVAL)
+
+    def shutdown(self) -> None:
+        """Shut down worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+def _create_parse_executor() -> ParseExecutor:
+    settings = get_settings()
+    return ParseExecutor(
+        max_workers=settings.parse_workers,
+        max_queued=settings.parse_max_queued,
+        timeout=settings.parse_timeout,
+        max_queued_documents=settings.parse_max_queued_documents,
+    )
+
+
+# Global parse executor instance
+parse_executor = _create_parse_executor()
+
+registry.register(GaugeFunction(
+    "parse_jobs_running", "Parse jobs admitted to the worker pool",
+    lambda: parse_executor.jobs_running,
+))
+registry.register(GaugeFunction(
+    "parse_jobs_waiting", "Parse jobs waiting for a free worker",
+    lambda: parse_executor.jobs_waiting,
+))
+registry.register(GaugeFunction(
+    "parse_queue_slots_in_use", "Reserved parse queue slots (limit: PARSE_MAX_QUEUED)",
+    lambda: parse_executor.slots_in_use,
+))
+registry.register(GaugeFunction(
+    "parse_batch_documents_queued",
+    "Batch documents parsing or waiting (limit: PARSE_MAX_QUEUED_DOCUMENTS)",
+    lambda: parse_executor.documents_queued,
+))
@@ -1,16 +1,45 @@
 import re
 from typing import List, Dict, Optional, Tuple
 from docx.text.paragraph import Paragraph
+from app.core.parser.paragraph_index import Block, ParagraphIndex
+from app.core.parser.parse_stats import ParseStats
+from app.core.parser.structure_grammar import StructureGrammar, get_grammar_registry
+
+
+class AttributeSections:
+    """
+    Attribute blocks and remaining text of a question, split in one pass
+
+    Each attribute holds the text of its first block, from the marker up to
+    the next "【" (or the end); None if the block is missing or empty.
+    """
+
+    __slots__ = ("clean_text", "answer", "difficulty", "knowledge", "analysis")
+
+    def __init__(self):
+        self.clean_text = ""
+        self.answer: Optional[str] = None
+        self.difficulty: Optional[float] = None
+        self.knowledge: Optional[str] = None
+        self.analysis: Optional[str] = None
 
 
 class ContentParser:
     """Parser for extracting question content and attributes"""
 
-    # Attribute block patterns
-    ANSWER_PATTERN = re.compile(r"【答案】\s*(.+?)(?=【|$)", re.DOTALL)
-    DIFFICULTY_PATTERN = re.compile(r"【难度】\s*([\d.]+)", re.DOTALL)  # Support decimals
-    KNOWLEDGE_PATTERN = re.compile(r"【知识点】\s*(.+?)(?=【|$)", re.DOTALL)
-    ANALYSIS_PATTERN = re.compile(r"【(?:解析|详解)】\s*(.+?)(?=【|$)", re.DOTALL)  # Support both 解析 and 详解
+    # Attribute block labels (text between 【 and 】) -> AttributeSections field.
+    # Both 解析 and 详解 introduce the analysis.
+    ATTRIBUTE_LABELS = {
+        "答案": "answer",
+        "难度": "difficulty",
+        "知识点": "knowledge",
+        "解析": "analysis",
+        "详解": "analysis",
+    }
+    DIFFICULTY_VALUE_PATTERN = re.compile(r"[\d.]+")  # Support decimals
+
+    # Split results kept per document, keyed by question text
+    SECTIONS_CACHE_SIZE = 256
 
     # Option patterns for multiple choice questions
     OPTION_PATTERN = re.compile(r"^([A-D])[.．、]\s*(.+)$")
@@ -18,15 +47,82 @@ class ContentParser:
         r"([A-D])[.．、]\s*([^A-D]+?)(?=(?:\s*[A-D][.．、])|$)"
     )
 
-    # Grouped answer pattern: 3．B    4．A
-    GROUPED_ANSWER_PATTERN = re.compile(r"(\d+)[．.]\s*([A-Z\u4e00-\u9fa5]+)")
+    def __init__(
+        self,
+        paragraph_index: Optional[ParagraphIndex] = None,
+        stats: Optional[ParseStats] = None,
+        grammar: Optional[StructureGrammar] = None,
+    ):
+        """
+        Initialize content parser
+
+        Args:
+            paragraph_index: Shared paragraph feature index
+            stats: Parse stats that content parsing is timed in
+            grammar: Structure rule set with the grouped/sub answer patterns
+                (the default rule set if omitted)
+        """
+        self.grammar = grammar or get_grammar_registry().get()
+        self.paragraph_index = paragraph_index or ParagraphIndex(
+            leading_pattern=self.grammar.leading_pattern
+        )
+        self.stats = stats or ParseStats()
+        self._sections_cache: Dict[str, AttributeSections] = {}
+
+    def split_attributes(self, text: str) -> AttributeSections:
+        """
+        Split question text into attribute blocks and clean content in one pass
+
+        The text is cut at every "【"; pieces starting with an attribute label
+        are attribute blocks, everything else (including other bracketed
+        sections such as 【点睛】) stays in the clean text. Results are
+        memoized, since the same block text is analyzed for the parent
+        question, its sub-questions and its options.
 
-    # Sub-question answer pattern: (1)答案内容
-    SUB_ANSWER_PATTERN = re.compile(r"\((\d+)\)\s*([^\(]+?)(?=\(\d+\)|$)", re.DOTALL)
+        Args:
+            text: Combined text from paragraphs
 
-    def __init__(self):
-        """Initialize content parser"""
-        pass
+        Returns:
+            AttributeSections for the text
+        """
+        cached = self._sections_cache.get(text)
+        if cached is not None:
+            return cached
+
+        sections = AttributeSections()
+        pieces = text.split("【")
+        kept = [pieces[0]]
+
+        for piece in pieces[1:]:
+            label, closed, body = piece.partition("】")
+            field = self.ATTRIBUTE_LABELS.get(label) if closed else None
+            if field is None:
+                kept.append("【" + piece)
+                continue
+
+            body = body.strip()
+            if field == "difficulty":
+                if sections.difficulty is None:
+                    sections.difficulty = self._parse_difficulty(body)
+            elif body and getattr(sections, field) is None:
+                setattr(sections, field, body)
+
+        sections.clean_text = "".join(kept).strip()
+
+        if len(self._sections_cache) >= self.SECTIONS_CACHE_SIZE:
+            self._sections_cache.clear()
+        self._sections_cache[text] = sections
+        return sections
+
+    def _parse_difficulty(self, body: str) -> Optional[float]:
+        """Read the leading number of a 【难度】 block"""
+        match = self.DIFFICULTY_VALUE_PATTERN.match(body)
+        if not match:
+            return None
+        try:
+            return float(match.group())
+        except ValueError:
+            return None
 
     def normalize_difficulty(self, value: float) -> Optional[int]:
         """
@@ -72,7 +168,7 @@ class ContentParser:
         Returns:
             Dictionary like {"3": "B", "4": "A"}
         """
-        matches = self.GROUPED_ANSWER_PATTERN.findall(answer_text)
+        matches = self.grammar.grouped_answer_pattern.findall(answer_text)
         return {num: ans.strip() for num, ans in matches}
 
     def parse_sub_answers(self, answer_text: str) -> Dict[str, str]:
@@ -85,7 +181,7 @@ class ContentParser:
         Returns:
             Dictionary like {"(1)": "答案1", "(2)": "答案2"}
         """
-        matches = self.SUB_ANSWER_PATTERN.findall(answer_text)
+        matches = self.grammar.sub_answer_pattern.findall(answer_text)
         return {f"({num})": ans.strip() for num, ans in matches}
 
     def detect_answer_mode(self, answer_text: str) -> str:
@@ -102,11 +198,11 @@ class ContentParser:
             return "single"
 
         # Check for grouped format: 3．B
-        if self.GROUPED_ANSWER_PATTERN.search(answer_text):
+        if self.grammar.grouped_answer_pattern.search(answer_text):
             return "grouped"
 
         # Check for sub-question format: (1)
-        if self.SUB_ANSWER_PATTERN.search(answer_text):
+        if self.grammar.sub_answer_pattern.search(answer_text):
             return "sub"
 
         return "single"
@@ -121,8 +217,7 @@ class ContentParser:
         Returns:
             Dictionary like {"3": "解析A", "4": "解析B"}
         """
-        pattern = r"(\d+)[．.](.+?)(?=\d+[．.]|$)"
-        matches = re.findall(pattern, analysis_text, re.DOTALL)
+        matches = self.grammar.grouped_analysis_pattern.findall(analysis_text)
         return {num: analysis.strip() for num, analysis in matches}
 
     def parse_sub_analyses(self, analysis_text: str) -> Dict[str, str]:
@@ -135,9 +230,8 @@ class ContentParser:
         Returns:
             Dictionary like {"(1)": "解析1", "(2)": "解析2"}
         """
-        # Support both full-width and half-width parentheses
-        pattern = r"[（\(](\d+)[）\)]\s*([^（\(]+?)(?=[（\(]\d+[）\)]|$)"
-        matches = re.findall(pattern, analysis_text, re.DOTALL)
+        # The standard rule set accepts full-width and half-width parentheses
+        matches = self.grammar.sub_analysis_pattern.findall(analysis_text)
         return {f"({num})": analysis.strip() for num, analysis in matches}
 
     def extract_attributes(self, text: str, mode: str = "single") -> Dict[str, any]:
@@ -164,11 +258,11 @@ class ContentParser:
             "sub_analyses": {},      # For sub-question mode
         }
 
-        # Extract answer block
-        answer_match = self.ANSWER_PATTERN.search(text)
-        if answer_match:
-            answer_text = answer_match.group(1).strip()
+        sections = self.split_attributes(text)
 
+        # Extract answer block
+        answer_text = sections.answer
+        if answer_text:
             # Auto-detect mode if needed
             if mode == "single" or mode == "auto":
                 detected_mode = self.detect_answer_mode(answer_text)
@@ -191,23 +285,17 @@ class ContentParser:
                 attributes["answer"] = answer_text
 
         # Extract difficulty
-        difficulty_match = self.DIFFICULTY_PATTERN.search(text)
-        if difficulty_match:
-            raw_difficulty = float(difficulty_match.group(1))
-            attributes["difficulty"] = self.normalize_difficulty(raw_difficulty)
+        if sections.difficulty is not None:
+            attributes["difficulty"] = self.normalize_difficulty(sections.difficulty)
 
         # Extract knowledge points
-        knowledge_match = self.KNOWLEDGE_PATTERN.search(text)
-        if knowledge_match:
-            knowledge_text = knowledge_match.group(1).strip()
-            points = re.split(r"[,，;；、]", knowledge_text)
+        if sections.knowledge:
+            points = re.split(r"[,，;；、]", sections.knowledge)
             attributes["knowledge_points"] = [p.strip() for p in points if p.strip()]
 
         # Extract analysis block
-        analysis_match = self.ANALYSIS_PATTERN.search(text)
-        if analysis_match:
-            analysis_text = analysis_match.group(1).strip()
-
+        analysis_text = sections.analysis
+        if analysis_text:
             if mode == "grouped":
                 attributes["grouped_analyses"] = self.parse_grouped_analyses(analysis_text)
                 # First analysis as default
@@ -235,13 +323,7 @@ class ContentParser:
         Returns:
             Clean text without attribute blocks
         """
-        # Remove all attribute blocks (support both 解析 and 详解)
-        text = re.sub(r"【答案】.+?(?=【|$)", "", text, flags=re.DOTALL)
-        text = re.sub(r"【难度】.+?(?=【|$)", "", text, flags=re.DOTALL)
-        text = re.sub(r"【知识点】.+?(?=【|$)", "", text, flags=re.DOTALL)
-        text = re.sub(r"【(?:解析|详解)】.+?(?=【|$)", "", text, flags=re.DOTALL)
-
-        return text.strip()
+        return self.split_attributes(text).clean_text
 
     def extract_options(self, text: str) -> Tuple[str, Optional[List[str]]]:
         """
@@ -282,13 +364,13 @@ class ContentParser:
         return stem, options if options else None
 
     def parse_question_content(
-        self, paragraphs: List[Paragraph], question_type: str, mode: str = "single"
+        self, paragraphs: List[Block], question_type: str, mode: str = "single"
     ) -> Dict[str, any]:
         """
         Parse question content from paragraphs
 
         Args:
-            paragraphs: List of paragraphs for this question
+            paragraphs: List of paragraphs (and data tables) for this question
             question_type: Type of question (选择题, 填空题, etc.)
             mode: "single" | "grouped" | "sub" | "auto"
 
@@ -296,16 +378,38 @@ class ContentParser:
             Dictionary with parsed content
         """
         # Combine all paragraph text
-        full_text = "\n".join([p.text for p in paragraphs])
+        full_text = "\n".join([self.paragraph_index.get(p).text for p in paragraphs])
 
-        # Extract attributes
-        attributes = self.extract_attributes(full_text, mode)
+        content = self.parse_text_content(full_text, question_type, mode)
+        content["paragraphs"] = paragraphs  # Keep original paragraphs for token generation
+        return content
 
-        # Remove attributes to get clean content
+    def parse_text_content(
+        self, full_text: str, question_type: str, mode: str = "single"
+    ) -> Dict[str, any]:
+        """
+        Parse question content from the already joined paragraph text
+
+        Args:
+            full_text: Paragraph texts of the question joined by newlines
+            question_type: Type of question (选择题, 填空题, etc.)
+            mode: "single" | "grouped" | "sub" | "auto"
+
+        Returns:
+            Dictionary with parsed content (without "paragraphs")
+        """
+        with self.stats.stage("content"):
+            return self._parse_text_content(full_text, question_type, mode)
+
+    def _parse_text_content(
+        self, full_text: str, question_type: str, mode: str
+    ) -> Dict[str, any]:
+        # Extract attributes and clean content (one split, shared by both)
+        attributes = self.extract_attributes(full_text, mode)
         clean_text = self.remove_attributes(full_text)
 
         # Extract stem and options
-        if any(key in question_type for key in ["选择", "单选", "多选", "选"]):
+        if self.grammar.is_choice_type(question_type):
             stem, options = self.extract_options(clean_text)
         else:
             stem = clean_text
@@ -322,5 +426,4 @@ class ContentParser:
             "grouped_analyses": attributes.get("grouped_analyses", {}),
             "sub_answers": attributes.get("sub_answers", {}),
             "sub_analyses": attributes.get("sub_analyses", {}),
-            "paragraphs": paragraphs,  # Keep original paragraphs for token generation
         }
@@ -1,9 +1,52 @@
 from docx import Document
 from docx.document import Document as DocumentType
 from docx.text.paragraph import Paragraph
-from docx.table import Table
-from typing import List, Union
+from docx.table import Table, _Cell
+from typing import Iterator, List, Union
 import os
+import re
+from app.core.parser.paragraph_index import (
+    ATTRIBUTE_MARKERS,
+    OPTION_START_PATTERN,
+    W_P,
+    W_TBL,
+    W_TR,
+    W_TC,
+    Block,
+)
+
+
+# Question number followed by question text (so decimals like "1.5" do not match)
+TABLE_QUESTION_PATTERN = re.compile(r"^\d+[．.]\s*\D")
+
+
+def iter_block_items(container, parent) -> Iterator[Block]:
+    """
+    Wrap the w:p / w:tbl children of a body or table cell element
+
+    Args:
+        container: w:body or w:tc element
+        parent: python-docx proxy that owns the blocks
+
+    Yields:
+        Paragraph and Table objects in document order
+    """
+    for element in container.iterchildren():
+        if element.tag == W_P:
+            yield Paragraph(element, parent)
+        elif element.tag == W_TBL:
+            yield Table(element, parent)
+
+
+def iter_table_cells(table: Table) -> Iterator[List]:
+    """Yield the w:tc elements of each table row"""
+    for row in table._tbl.iterchildren(W_TR):
+        yield list(row.iterchildren(W_TC))
+
+
+def iter_cell_blocks(cell, table: Table) -> Iterator[Block]:
+    """Iterate over the paragraphs and nested tables of a w:tc element"""
+    return iter_block_items(cell, _Cell(cell, table))
 
 
 class DocxParser:
@@ -33,6 +76,18 @@ class DocxParser:
         """Get all tables from document"""
         return self.document.tables
 
+    def iter_body_elements(self) -> Iterator[Union[Paragraph, Table]]:
+        """
+        Iterate over body paragraphs and tables in document order
+
+        Walks the body element once and wraps each w:p / w:tbl directly,
+        so the cost is linear in document size.
+
+        Yields:
+            Paragraph and Table objects in the order they appear
+        """
+        return iter_block_items(self.document.element.body, self.document._body)
+
     def get_body_elements(self) -> List[Union[Paragraph, Table]]:
         """
         Get all body elements (paragraphs and tables) in document order
@@ -40,21 +95,71 @@ class DocxParser:
         Returns:
             List of paragraphs and tables in the order they appear
         """
-        elements = []
-        for element in self.document.element.body:
-            if element.tag.endswith('p'):
-                # Paragraph element
-                for para in self.document.paragraphs:
-                    if para._element == element:
-                        elements.append(para)
-                        break
-            elif element.tag.endswith('tbl'):
-                # Table element
-                for table in self.document.tables:
-                    if table._element == element:
-                        elements.append(table)
-                        break
-        return elements
+        return list(self.iter_body_elements())
+
+    def iter_blocks(self) -> Iterator[Block]:
+        """
+        Iterate over content blocks in reading order
+
+        Layout tables (single-cell boxes, option grids and tables that hold
+        question numbers or attribute blocks) are unwrapped into their cell
+        paragraphs, row by row, so questions laid out in tables parse like
+        regular paragraphs. Other tables are yielded as data tables.
+
+        Yields:
+            Paragraph and Table objects
+        """
+        for block in self.iter_body_elements():
+            if isinstance(block, Table) and self.is_layout_table(block):
+                yield from self._unwrap_table(block)
+            else:
+                yield block
+
+    def _unwrap_table(self, table: Table) -> Iterator[Block]:
+        """Yield the blocks of a layout table cell by cell, unwrapping nested layout tables"""
+        for cells in iter_table_cells(table):
+            for cell in cells:
+                if cell.vMerge == "continue":
+                    continue
+                for block in iter_cell_blocks(cell, table):
+                    if isinstance(block, Table) and self.is_layout_table(block):
+                        yield from self._unwrap_table(block)
+                    else:
+                        yield block
+
+    def is_layout_table(self, table: Table) -> bool:
+        """
+        Check whether a table only lays out question content
+
+        Args:
+            table: Table object
+
+        Returns:
+            True for single-cell tables, option grids (every non-empty cell
+            starts with an option letter) and tables containing question
+            numbers or attribute markers
+        """
+        cells = [cell for row in iter_table_cells(table) for cell in row]
+        if len(cells) == 1:
+            return True
+
+        filled_cells = 0
+        option_cells = 0
+        for cell in cells:
+            texts = [Paragraph(p, table).text.strip() for p in cell.iter(W_P)]
+            for text in texts:
+                if TABLE_QUESTION_PATTERN.match(text):
+                    return True
+                if "【" in text and any(marker in text for marker in ATTRIBUTE_MARKERS):
+                    return True
+
+            first_text = next((text for text in texts if text), None)
+            if first_text is not None:
+                filled_cells += 1
+                if OPTION_START_PATTERN.match(first_text):
+                    option_cells += 1
+
+        return filled_cells > 0 and option_cells == filled_cells
 
     def get_paragraph_text(self, paragraph: Paragraph) -> str:
         """Get plain text from paragraph"""
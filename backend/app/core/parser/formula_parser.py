@@ -1,6 +1,11 @@
+from collections import OrderedDict
 from lxml import etree
-from typing import Optional
+from typing import Optional, Tuple
+import hashlib
 import os
+import threading
+from app.config import get_settings
+from app.core.parser.parse_stats import ParseStats
 
 
 class FormulaParser:
@@ -12,17 +17,56 @@ class FormulaParser:
         'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
     }
 
-    def __init__(self):
-        """Initialize formula parser"""
-        # Load OMML to MathML XSLT transformation if available
-        self.xslt_transform = None
-        self._load_xslt()
+    # Bundled OMML -> MathML stylesheet
+    DEFAULT_XSLT_PATH = os.path.join(os.path.dirname(__file__), "xslt", "omml2mml.xsl")
 
-    def _load_xslt(self):
-        """Load OMML to MathML XSLT stylesheet"""
-        # Note: In production, you would load the official Microsoft OMML2MML.xsl
-        # For now, we'll use a basic transformation approach
-        pass
+    # Compiled stylesheet and conversion cache are shared by every parser in the process
+    _xslt_transform: Optional[etree.XSLT] = None
+    _cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, stats: Optional[ParseStats] = None):
+        """
+        Initialize formula parser
+
+        Args:
+            stats: Parse stats that conversions are counted and timed in
+        """
+        self.stats = stats or ParseStats()
+        settings = get_settings()
+        self.cache_size = settings.formula_cache_size
+        self.xslt_transform = self._load_xslt(settings.omml_xslt_path)
+
+    @classmethod
+    def _load_xslt(cls, xslt_path: Optional[str] = None) -> etree.XSLT:
+        """Load and compile the OMML to MathML XSLT stylesheet (once per process)"""
+        if cls._xslt_transform is None:
+            with cls._lock:
+                if cls._xslt_transform is None:
+                    path = xslt_path or cls.DEFAULT_XSLT_PATH
+                    cls._xslt_transform = etree.XSLT(etree.parse(path))
+        return cls._xslt_transform
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop all cached conversions (e.g. to measure cold parses)"""
+        with cls._lock:
+            cls._cache.clear()
+
+    def find_omml_in_run(self, run_element):
+        """
+        Find the first OMML element inside a run element
+
+        Args:
+            run_element: Run element that may contain math
+
+        Returns:
+            oMath element or None
+        """
+        try:
+            return run_element.find('.//m:oMath', self.OMML_NS)
+        except Exception:
+            return None
 
     def extract_omml_from_run(self, run_element) -> Optional[str]:
         """
@@ -34,15 +78,60 @@ class FormulaParser:
         Returns:
             OMML XML string or None
         """
-        try:
-            # Look for oMath element in run
-            math_elements = run_element.findall('.//m:oMath', self.OMML_NS)
-            if math_elements:
-                # Return the first math element as string
-                return etree.tostring(math_elements[0], encoding='unicode')
-        except Exception:
-            pass
-        return None
+        omml_element = self.find_omml_in_run(run_element)
+        if omml_element is None:
+            return None
+        return self.serialize_omml(omml_element)
+
+    def serialize_omml(self, omml_element) -> str:
+        """
+        Serialize an OMML element in canonical form
+
+        Exclusive C14N only declares the namespaces the formula uses, so the
+        same formula serializes identically wherever it appears.
+
+        Args:
+            omml_element: oMath element
+
+        Returns:
+            Canonical OMML XML string
+        """
+        return etree.tostring(omml_element, method="c14n", exclusive=True).decode("utf-8")
+
+    def convert_element(self, omml_element) -> Tuple[str, Optional[str]]:
+        """
+        Convert an in-tree OMML element to MathML
+
+        The element is serialized once (for the token and the cache key) and,
+        on a cache miss, transformed directly without re-parsing the string.
+
+        Args:
+            omml_element: oMath element from the document tree
+
+        Returns:
+            Tuple of (canonical OMML XML, MathML string or None)
+        """
+        omml_xml = self.serialize_omml(omml_element)
+        cache_key = hashlib.sha256(omml_xml.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                self.stats.incr("formulaCacheHits")
+                return omml_xml, self._cache[cache_key]
+
+        with self.stats.stage("formulas"):
+            mathml = self._transform(omml_element)
+        self.stats.incr("formulas")
+        if mathml is None:
+            self.stats.incr("formulaErrors")
+
+        with self._lock:
+            self._cache[cache_key] = mathml
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return omml_xml, mathml
 
     def omml_to_mathml(self, omml_xml: str) -> Optional[str]:
         """
@@ -55,106 +144,31 @@ class FormulaParser:
             MathML string or None
         """
         try:
-            # Parse OMML XML
-            omml_tree = etree.fromstring(omml_xml.encode('utf-8'))
-
-            # Basic conversion (simplified)
-            # In production, use proper XSLT transformation
-            mathml = self._basic_omml_to_mathml(omml_tree)
-            return mathml
+            omml_element = etree.fromstring(omml_xml.encode('utf-8'))
         except Exception as e:
             print(f"Error converting OMML to MathML: {e}")
             return None
+        return self.convert_element(omml_element)[1]
 
-    def _basic_omml_to_mathml(self, omml_element) -> str:
+    def _transform(self, omml_element) -> Optional[str]:
         """
-        Basic OMML to MathML conversion (simplified implementation)
+        Apply the compiled stylesheet to an OMML element
 
         Args:
-            omml_element: OMML element tree
+            omml_element: oMath element (may be part of a larger tree)
 
         Returns:
-            MathML string
-        """
-        # This is a simplified conversion
-        # In production, use the official OMML2MML.xsl transformation
-
-        mathml_parts = ['<math xmlns="http://www.w3.org/1998/Math/MathML">']
-
-        # Process OMML elements
-        self._process_omml_element(omml_element, mathml_parts)
-
-        mathml_parts.append('</math>')
-        return ''.join(mathml_parts)
-
-    def _process_omml_element(self, element, mathml_parts):
+            MathML string or None
         """
-        Recursively process OMML elements and convert to MathML
-
-        Args:
-            element: OMML element
-            mathml_parts: List to append MathML parts to
-        """
-        tag = element.tag.split('}')[-1] if '}' in element.tag else element.tag
-
-        # Map OMML elements to MathML
-        if tag == 'r':  # Run (text)
-            text_elem = element.find('.//m:t', self.OMML_NS)
-            if text_elem is not None and text_elem.text:
-                mathml_parts.append(f'<mi>{text_elem.text}</mi>')
-
-        elif tag == 'f':  # Fraction
-            num = element.find('.//m:num', self.OMML_NS)
-            den = element.find('.//m:den', self.OMML_NS)
-            mathml_parts.append('<mfrac>')
-            if num is not None:
-                mathml_parts.append('<mrow>')
-                for child in num:
-                    self._process_omml_element(child, mathml_parts)
-                mathml_parts.append('</mrow>')
-            if den is not None:
-                mathml_parts.append('<mrow>')
-                for child in den:
-                    self._process_omml_element(child, mathml_parts)
-                mathml_parts.append('</mrow>')
-            mathml_parts.append('</mfrac>')
-
-        elif tag == 'sSup':  # Superscript
-            base = element.find('.//m:e', self.OMML_NS)
-            sup = element.find('.//m:sup', self.OMML_NS)
-            mathml_parts.append('<msup>')
-            if base is not None:
-                mathml_parts.append('<mrow>')
-                for child in base:
-                    self._process_omml_element(child, mathml_parts)
-                mathml_parts.append('</mrow>')
-            if sup is not None:
-                mathml_parts.append('<mrow>')
-                for child in sup:
-                    self._process_omml_element(child, mathml_parts)
-                mathml_parts.append('</mrow>')
-            mathml_parts.append('</msup>')
-
-        elif tag == 'sSub':  # Subscript
-            base = element.find('.//m:e', self.OMML_NS)
-            sub = element.find('.//m:sub', self.OMML_NS)
-            mathml_parts.append('<msub>')
-            if base is not None:
-                mathml_parts.append('<mrow>')
-                for child in base:
-                    self._process_omml_element(child, mathml_parts)
-                mathml_parts.append('</mrow>')
-            if sub is not None:
-                mathml_parts.append('<mrow>')
-                for child in sub:
-                    self._process_omml_element(child, mathml_parts)
-                mathml_parts.append('</mrow>')
-            mathml_parts.append('</msub>')
-
-        else:
-            # Process children for other elements
-            for child in element:
-                self._process_omml_element(child, mathml_parts)
+        try:
+            result = self.xslt_transform(omml_element)
+            root = result.getroot()
+            if root is None:
+                return None
+            return etree.tostring(root, encoding='unicode')
+        except Exception as e:
+            print(f"Error converting OMML to MathML: {e}")
+            return None
 
     def has_formula(self, run_element) -> bool:
         """
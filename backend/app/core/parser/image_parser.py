@@ -1,11 +1,9 @@
-from docx import Document
 from docx.document import Document as DocumentType
-from docx.oxml import parse_xml
 from typing import List, Dict, Optional
 import os
+import shutil
 import hashlib
-from PIL import Image
-import io
+from app.core.parser.parse_stats import ParseStats
 
 
 class ImageInfo:
@@ -18,6 +16,8 @@ class ImageInfo:
         content_type: str,
         size: int,
         rel_id: str,
+        sha256: Optional[str] = None,
+        blob_path: Optional[str] = None,
     ):
         self.image_id = image_id
         self.filename = filename
@@ -25,100 +25,195 @@ class ImageInfo:
         self.content_type = content_type
         self.size = size
         self.rel_id = rel_id
+        self.sha256 = sha256
+        self.blob_path = blob_path
 
 
 class ImageParser:
-    """Parser for extracting images from Word documents"""
+    """
+    Parser for extracting images from Word documents
+
+    Images are extracted lazily: only images actually referenced by tokens
+    are written. Image bytes are stored once in a content-addressed blob
+    store shared by all tasks, and linked into the task directory under the
+    usual image_{id}_{hash}.{ext} name.
+    """
+
+    # Magic-byte signatures checked at offset 0: (prefix, MIME type)
+    SIGNATURES = (
+        (b'\x89PNG\r\n\x1a\n', 'image/png'),
+        (b'\xff\xd8\xff', 'image/jpeg'),
+        (b'GIF87a', 'image/gif'),
+        (b'GIF89a', 'image/gif'),
+        (b'BM', 'image/bmp'),
+        (b'II*\x00', 'image/tiff'),
+        (b'MM\x00*', 'image/tiff'),
+        (b'\xd7\xcd\xc6\x9a', 'image/wmf'),  # Placeable WMF
+        (b'\x01\x00\x09\x00', 'image/wmf'),
+        (b'\x02\x00\x09\x00', 'image/wmf'),
+    )
 
-    def __init__(self, document: DocumentType, output_dir: str):
+    def __init__(
+        self,
+        document: DocumentType,
+        output_dir: str,
+        blob_dir: Optional[str] = None,
+        stats: Optional[ParseStats] = None,
+    ):
         """
         Initialize image parser
 
         Args:
             document: python-docx Document object
-            output_dir: Directory to save extracted images
+            output_dir: Task directory that extracted images are linked into
+            blob_dir: Content-addressed blob store (defaults to output_dir/blobs)
+            stats: Parse stats that extracted images and written bytes are counted in
         """
+        self.stats = stats or ParseStats()
         self.document = document
         self.output_dir = output_dir
+        self.blob_dir = blob_dir or os.path.join(output_dir, "blobs")
         self.images: List[ImageInfo] = []
         self.image_counter = 0
         self.rel_id_to_image_id: Dict[str, int] = {}
 
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
+        # Image relationships found in the document, not yet extracted
+        self._image_rels: Dict[str, object] = {}
+        # Content hash -> image ID, so identical images share one ID per task
+        self._hash_to_image_id: Dict[str, int] = {}
+        # Relationships whose data could not be recognized as an image
+        self._failed_rel_ids = set()
+
+    def index_images(self) -> int:
+        """
+        Find image relationships without reading or writing image data
+
+        Returns:
+            Number of image relationships in the document
+        """
+        self._image_rels = {
+            rel_id: rel
+            for rel_id, rel in self.document.part.rels.items()
+            if "image" in rel.reltype and not rel.is_external
+        }
+        return len(self._image_rels)
 
     def extract_all_images(self) -> List[ImageInfo]:
         """
-        Extract all images from document and save to disk
+        Extract all images from document, referenced or not
 
         Returns:
             List of ImageInfo objects
         """
-        # Get all image relationships
-        for rel_id, rel in self.document.part.rels.items():
-            if "image" in rel.target_ref:
-                try:
-                    image_part = rel.target_part
-                    image_data = image_part.blob
-
-                    # Generate image info
-                    image_info = self._save_image(image_data, rel.target_ref, rel_id)
-                    if image_info:
-                        self.images.append(image_info)
-                        self.rel_id_to_image_id[rel_id] = image_info.image_id
-                except Exception as e:
-                    print(f"Error extracting image {rel_id}: {e}")
-
+        if not self._image_rels:
+            self.index_images()
+        for rel_id in self._image_rels:
+            self.get_image_id_by_rel_id(rel_id)
         return self.images
 
-    def _save_image(
-        self, image_data: bytes, target_ref: str, rel_id: str
-    ) -> Optional[ImageInfo]:
+    def _extract(self, rel_id: str) -> Optional[ImageInfo]:
         """
-        Save image to disk and return image info
+        Extract one image relationship into the blob store
 
         Args:
-            image_data: Image binary data
-            target_ref: Image reference from document
+            rel_id: Relationship ID from document
 
         Returns:
             ImageInfo object or None
         """
+        rel = self._image_rels.get(rel_id)
+        if rel is None:
+            return None
+
+        with self.stats.stage("images"):
+            return self._extract_rel(rel_id, rel)
+
+    def _extract_rel(self, rel_id: str, rel) -> Optional[ImageInfo]:
+        """Read, store and link the image data of one relationship"""
         try:
-            # Determine content type from data
-            content_type = self._detect_image_type(image_data)
-            if not content_type:
-                return None
+            image_data = rel.target_part.blob
+        except Exception as e:
+            print(f"Error extracting image {rel_id}: {e}")
+            return None
 
-            # Generate unique filename
-            self.image_counter += 1
-            image_hash = hashlib.md5(image_data).hexdigest()[:8]
+        content_type = self._detect_image_type(image_data)
+        if not content_type:
+            return None
+
+        image_hash = hashlib.sha256(image_data).hexdigest()
+
+        # Same bytes under another relationship: reuse the image ID
+        existing_id = self._hash_to_image_id.get(image_hash)
+        if existing_id is not None:
+            return self.get_image_by_id(existing_id)
+
+        try:
             extension = self._get_extension(content_type)
-            filename = f"image_{self.image_counter}_{image_hash}{extension}"
-            file_path = os.path.join(self.output_dir, filename)
+            blob_path = self._store_blob(image_data, image_hash, extension)
 
-            # Save image
-            with open(file_path, 'wb') as f:
-                f.write(image_data)
-
-            # Create image info
-            image_info = ImageInfo(
-                image_id=self.image_counter,
-                filename=filename,
-                file_path=file_path,
-                content_type=content_type,
-                size=len(image_data),
-                rel_id=rel_id,
-            )
-
-            return image_info
+            self.image_counter += 1
+            filename = f"image_{self.image_counter}_{image_hash[:8]}{extension}"
+            file_path = os.path.join(self.output_dir, filename)
+            self._link_into_task(blob_path, file_path)
         except Exception as e:
             print(f"Error saving image: {e}")
             return None
 
+        image_info = ImageInfo(
+            image_id=self.image_counter,
+            filename=filename,
+            file_path=file_path,
+            content_type=content_type,
+            size=len(image_data),
+            rel_id=rel_id,
+            sha256=image_hash,
+            blob_path=blob_path,
+        )
+        self.images.append(image_info)
+        self._hash_to_image_id[image_hash] = image_info.image_id
+        self.stats.incr("images")
+        self.stats.incr("imageBytes", len(image_data))
+        return image_info
+
+    def _store_blob(self, image_data: bytes, image_hash: str, extension: str) -> str:
+        """
+        Write image bytes to the content-addressed store if not already present
+
+        Args:
+            image_data: Image binary data
+            image_hash: SHA-256 hex digest of image_data
+            extension: File extension with dot
+
+        Returns:
+            Blob file path
+        """
+        blob_path = os.path.join(
+            self.blob_dir, image_hash[:2], f"{image_hash}{extension}"
+        )
+        if os.path.exists(blob_path):
+            return blob_path
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(image_data)
+        os.replace(tmp_path, blob_path)
+        self.stats.incr("imageBytesWritten", len(image_data))
+        return blob_path
+
+    def _link_into_task(self, blob_path: str, file_path: str) -> None:
+        """Hard-link a blob into the task directory, copying if linking fails"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        if os.path.exists(file_path):
+            return
+        try:
+            os.link(blob_path, file_path)
+        except OSError:
+            shutil.copyfile(blob_path, file_path)
+
     def _detect_image_type(self, image_data: bytes) -> Optional[str]:
         """
-        Detect image MIME type from binary data
+        Detect image MIME type from magic bytes
 
         Args:
             image_data: Image binary data
@@ -126,33 +221,14 @@ class ImageParser:
         Returns:
             MIME type string or None
         """
-        try:
-            # Use PIL to detect image type
-            img = Image.open(io.BytesIO(image_data))
-            format_lower = img.format.lower()
-
-            mime_types = {
-                'jpeg': 'image/jpeg',
-                'jpg': 'image/jpeg',
-                'png': 'image/png',
-                'gif': 'image/gif',
-                'bmp': 'image/bmp',
-                'tiff': 'image/tiff',
-                'webp': 'image/webp'
-            }
-
-            return mime_types.get(format_lower, f'image/{format_lower}')
-        except Exception:
-            # Fallback: check magic bytes
-            if image_data.startswith(b'\xff\xd8\xff'):
-                return 'image/jpeg'
-            elif image_data.startswith(b'\x89PNG'):
-                return 'image/png'
-            elif image_data.startswith(b'GIF8'):
-                return 'image/gif'
-            elif image_data.startswith(b'BM'):
-                return 'image/bmp'
-            return None
+        for signature, content_type in self.SIGNATURES:
+            if image_data.startswith(signature):
+                return content_type
+        if image_data[:4] == b'RIFF' and image_data[8:12] == b'WEBP':
+            return 'image/webp'
+        if image_data[:4] == b'\x01\x00\x00\x00' and image_data[40:44] == b' EMF':
+            return 'image/emf'
+        return None
 
     def _get_extension(self, content_type: str) -> str:
         """
@@ -170,7 +246,9 @@ class ImageParser:
             'image/gif': '.gif',
             'image/bmp': '.bmp',
             'image/tiff': '.tiff',
-            'image/webp': '.webp'
+            'image/webp': '.webp',
+            'image/wmf': '.wmf',
+            'image/emf': '.emf',
         }
         return extensions.get(content_type, '.jpg')
 
@@ -190,8 +268,25 @@ class ImageParser:
         return None
 
     def get_image_id_by_rel_id(self, rel_id: str) -> Optional[int]:
-        """Resolve image ID by relationship ID from document."""
-        return self.rel_id_to_image_id.get(rel_id)
+        """
+        Resolve image ID by relationship ID from document
+
+        The image is extracted on first reference.
+        """
+        image_id = self.rel_id_to_image_id.get(rel_id)
+        if image_id is not None or rel_id in self._failed_rel_ids:
+            return image_id
+
+        if not self._image_rels:
+            self.index_images()
+
+        image_info = self._extract(rel_id)
+        if image_info is None:
+            self._failed_rel_ids.add(rel_id)
+            return None
+
+        self.rel_id_to_image_id[rel_id] = image_info.image_id
+        return image_info.image_id
 
     def find_image_references_in_paragraph(self, paragraph) -> List[int]:
         """
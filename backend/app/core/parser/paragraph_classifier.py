@@ -0,0 +1,94 @@
+import re
+from enum import Enum
+from typing import Iterable
+from app.core.parser.paragraph_index import ParagraphFeatures
+
+
+class ParagraphKind(str, Enum):
+    """What a paragraph is, as far as document structure is concerned"""
+
+    EMPTY = "empty"
+    TABLE = "table"
+    SECTION = "section"                    # 一、选择题
+    MATERIAL = "material"                  # 阅读下列材料，完成下面小题
+    TEXT = "text"                          # Stem text, options, material content
+    ATTRIBUTE = "attribute"                # 【答案】... without a question number
+    ANALYSIS_OPTION = "analysis_option"    # A、解析内容
+    ANALYSIS_DETAIL = "analysis_detail"    # 3．A、解析内容
+    QUESTION = "question"                  # 3．题干
+    QUESTION_ATTRIBUTE = "question_attribute"          # 3．【答案】...
+    SUB_QUESTION = "sub_question"                      # (1)小题
+    SUB_QUESTION_ATTRIBUTE = "sub_question_attribute"  # (1)【答案】...
+
+
+class ParagraphClassifier:
+    """
+    Classifies paragraphs for StructureParser
+
+    Section headers and material keywords are found with one combined regex
+    search per paragraph; everything else comes from the paragraph features
+    (see paragraph_index.LEADING_PATTERN), so each paragraph is classified
+    with at most two regex calls however many keywords are configured.
+    """
+
+    def __init__(self, section_pattern: str, material_keywords: Iterable[str]):
+        """
+        Initialize paragraph classifier
+
+        Args:
+            section_pattern: Regex matching a section header at the start of a
+                paragraph, with a "name" group for the section name
+            material_keywords: Phrases that start a material question
+        """
+        self.section_pattern = re.compile(f"^(?:{section_pattern})")
+        alternatives = [self.section_pattern.pattern]
+        alternatives.extend(re.escape(keyword) for keyword in material_keywords)
+        # Leftmost match wins, so a section header at position 0 takes
+        # precedence over a material keyword later in the same paragraph
+        self.pattern = re.compile("|".join(alternatives))
+
+    def classify(
+        self, features: ParagraphFeatures, allow_material: bool = True
+    ) -> ParagraphKind:
+        """
+        Classify one paragraph
+
+        Args:
+            features: Paragraph features from the shared ParagraphIndex
+            allow_material: False where material keywords are ignored (fill-in sections)
+
+        Returns:
+            Paragraph kind (see section_name for the name of a SECTION)
+        """
+        text = features.stripped
+        if not text and not features.has_image:
+            return ParagraphKind.EMPTY
+        if features.is_table:
+            return ParagraphKind.TABLE
+
+        match = self.pattern.search(text) if text else None
+        if match is not None:
+            if match.group("name") is not None:
+                return ParagraphKind.SECTION
+            if allow_material:
+                return ParagraphKind.MATERIAL
+
+        if features.question_number is not None:
+            if features.is_analysis_detail:
+                return ParagraphKind.ANALYSIS_DETAIL
+            if features.has_attribute_marker:
+                return ParagraphKind.QUESTION_ATTRIBUTE
+            return ParagraphKind.QUESTION
+        if features.sub_question_number is not None:
+            if features.has_attribute_marker:
+                return ParagraphKind.SUB_QUESTION_ATTRIBUTE
+            return ParagraphKind.SUB_QUESTION
+        if features.has_attribute_marker:
+            return ParagraphKind.ATTRIBUTE
+        if features.is_analysis_option:
+            return ParagraphKind.ANALYSIS_OPTION
+        return ParagraphKind.TEXT
+
+    def section_name(self, text: str) -> str:
+        """Section name of a paragraph classified as SECTION"""
+        return self.section_pattern.match(text).group("name").strip()
@@ -0,0 +1,200 @@
+import re
+from typing import Dict, Iterable, Optional, Pattern, Union
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+
+# Element tags looked up in a single walk over each paragraph
+A_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+V_IMAGEDATA = "{urn:schemas-microsoft-com:vml}imagedata"
+M_OMATH = "{http://schemas.openxmlformats.org/officeDocument/2006/math}oMath"
+
+# Body block and table structure tags
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_P = W_NS + "p"
+W_TBL = W_NS + "tbl"
+W_TR = W_NS + "tr"
+W_TC = W_NS + "tc"
+
+ATTRIBUTE_MARKERS = ("【答案】", "【难度】", "【知识点】", "【解析】", "【详解】")
+
+QUESTION_NUMBER_PATTERN = re.compile(r"^(\d+)[．.]\s*")
+SUB_QUESTION_PATTERN = re.compile(r"^\((\d+)\)\s*")
+OPTION_START_PATTERN = re.compile(r"^([A-D])[.．、]\s*")
+ANALYSIS_DETAIL_PATTERN = re.compile(r"^(\d+)[．.]\s*([A-D])[、．.]")
+ANALYSIS_OPTION_DETAIL_PATTERN = re.compile(r"^([A-D])、")
+
+
+def compile_leading_pattern(question_number_pattern: str, sub_question_pattern: str) -> Pattern:
+    """
+    Combine the number patterns into one alternation matched at the start of a paragraph
+
+    Args:
+        question_number_pattern: Question number ("3．"), with a "number" group
+        sub_question_pattern: Sub-question number ("(1)"), with a "sub" group
+
+    Returns:
+        Pattern with groups number/detail ("3．A、" analysis detail), sub,
+        option and option_sep ("A、" also marks an analysis option detail)
+    """
+    return re.compile(
+        f"(?:(?:{question_number_pattern})\\s*(?P<detail>[A-D][、．.])?"
+        f"|(?:{sub_question_pattern})"
+        f"|(?P<option>[A-D])(?P<option_sep>[.．、]))"
+    )
+
+
+# Built-in number patterns (the "standard" rule set of the structure grammar).
+# They start with distinct characters (digit, "(", A-D), so one alternation
+# classifies the start of a paragraph in a single match.
+LEADING_PATTERN = compile_leading_pattern(r"(?P<number>\d+)[．.]", r"\((?P<sub>\d+)\)")
+ATTRIBUTE_MARKER_PATTERN = re.compile("|".join(re.escape(marker) for marker in ATTRIBUTE_MARKERS))
+
+# Content block handled by the parser: a paragraph or a data table
+Block = Union[Paragraph, Table]
+
+
+class ParagraphFeatures:
+    """Per-paragraph facts shared by all parser stages"""
+
+    __slots__ = (
+        "is_table",
+        "text",
+        "stripped",
+        "has_image",
+        "has_formula",
+        "has_attribute_marker",
+        "option_letter",
+        "question_number",
+        "sub_question_number",
+        "is_analysis_detail",
+        "is_analysis_option",
+    )
+
+    def __init__(
+        self,
+        text: str,
+        has_image: bool,
+        has_formula: bool,
+        is_table: bool = False,
+        leading_pattern: Pattern = LEADING_PATTERN,
+    ):
+        self.is_table = is_table
+        self.text = text
+        self.stripped = text.strip()
+        self.has_image = has_image
+        self.has_formula = has_formula
+
+        if is_table:
+            # A table never starts a question, option or attribute block
+            self.has_attribute_marker = False
+            self.option_letter = None
+            self.question_number = None
+            self.sub_question_number = None
+            self.is_analysis_detail = False
+            self.is_analysis_option = False
+            return
+
+        stripped = self.stripped
+        self.has_attribute_marker = (
+            "【" in stripped and ATTRIBUTE_MARKER_PATTERN.search(stripped) is not None
+        )
+
+        self.option_letter: Optional[str] = None
+        self.question_number: Optional[str] = None
+        self.sub_question_number: Optional[str] = None
+        self.is_analysis_detail = False
+        self.is_analysis_option = False
+
+        leading = leading_pattern.match(stripped)
+        if leading is None:
+            return
+        if leading.group("number") is not None:
+            self.question_number = leading.group("number")
+            self.is_analysis_detail = leading.group("detail") is not None
+        elif leading.group("sub") is not None:
+            self.sub_question_number = leading.group("sub")
+        else:
+            self.option_letter = leading.group("option")
+            self.is_analysis_option = leading.group("option_sep") == "、"
+
+    @property
+    def is_empty(self) -> bool:
+        """True if the block has neither text nor images"""
+        return not self.stripped and not self.has_image
+
+
+class ParagraphIndex:
+    """Paragraph (and table) feature index computed once per document"""
+
+    def __init__(
+        self,
+        paragraphs: Optional[Iterable[Block]] = None,
+        leading_pattern: Pattern = LEADING_PATTERN,
+    ):
+        """
+        Initialize paragraph index
+
+        Args:
+            paragraphs: Paragraphs to index up front (others are indexed on first lookup)
+            leading_pattern: Number/option pattern from compile_leading_pattern
+        """
+        self.leading_pattern = leading_pattern
+        # Keyed by the underlying w:p element, which outlives python-docx proxies
+        self._features: Dict[object, ParagraphFeatures] = {}
+        if paragraphs is not None:
+            self.build(paragraphs)
+
+    def build(self, paragraphs: Iterable[Block]) -> None:
+        """Index all given paragraphs and tables"""
+        for paragraph in paragraphs:
+            self.get(paragraph)
+
+    def get(self, paragraph: Block) -> ParagraphFeatures:
+        """Get features for a paragraph or table, computing them on first access"""
+        element = paragraph._element
+        features = self._features.get(element)
+        if features is None:
+            features = self._compute(paragraph)
+            self._features[element] = features
+        return features
+
+    __getitem__ = get
+
+    def _compute(self, paragraph: Block) -> ParagraphFeatures:
+        """Compute paragraph features with one walk over its XML"""
+        has_image = False
+        has_formula = False
+        for element in paragraph._element.iter(A_BLIP, V_IMAGEDATA, M_OMATH):
+            if element.tag == M_OMATH:
+                has_formula = True
+            else:
+                has_image = True
+            if has_image and has_formula:
+                break
+
+        if isinstance(paragraph, Table):
+            return ParagraphFeatures(table_text(paragraph), has_image, has_formula, is_table=True)
+        return ParagraphFeatures(
+            paragraph.text, has_image, has_formula, leading_pattern=self.leading_pattern
+        )
+
+
+def table_text(table: Table) -> str:
+    """
+    Get plain text of a table: one line per row, cells separated by tabs
+
+    Cells covered by a vertical merge are skipped, nested tables are
+    flattened into their cell's text.
+    """
+    lines = []
+    for row in table._tbl.iterchildren(W_TR):
+        cells = []
+        for cell in row.iterchildren(W_TC):
+            if cell.vMerge == "continue":
+                continue
+            cells.append(" ".join(
+                Paragraph(p, table).text.strip() for p in cell.iter(W_P)
+            ).strip())
+        lines.append("\t".join(cells))
+    return "\n".join(lines)
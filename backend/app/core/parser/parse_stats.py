@@ -0,0 +1,61 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class ParseStats:
+    """
+    Wall time per parse stage and item counters for one document
+
+    Stages nest: "tokens" includes the "formulas" and "images" time spent
+    converting formulas and extracting images on first reference, and
+    "questions" covers content parsing, token generation and HTML rendering.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Stage name -> accumulated seconds
+        self.stages: Dict[str, float] = {}
+        # Counter name -> count (paragraphs, formulas, images, bytes written, ...)
+        self.counters: Dict[str, int] = {}
+        # (question number, seconds) in document order
+        self.questions: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the wall time of the with-block to a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_question(self, number: str, seconds: float) -> None:
+        self.questions.append((number, seconds))
+
+    def finish(self) -> None:
+        """Record the total time since the stats were created"""
+        self.stages["total"] = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to the JSON form stored on the task
+
+        Returns:
+            {"stagesMs": {stage: ms}, "counts": {name: n},
+             "questionsMs": [{"number", "ms"}]}
+        """
+        return {
+            "stagesMs": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            "counts": dict(self.counters),
+            "questionsMs": [
+                {"number": number, "ms": round(seconds * 1000, 2)}
+                for number, seconds in self.questions
+            ],
+        }
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from app.config import get_settings
+from app.core.parser.paragraph_classifier import ParagraphClassifier
+from app.core.parser.paragraph_index import compile_leading_pattern
+
+
+class GrammarError(Exception):
+    """Raised when the structure grammar file or a rule set is invalid"""
+
+
+# Rule set keys -> (expected JSON type, required regex groups for patterns)
+RULE_SET_KEYS: Dict[str, Tuple[type, Tuple[str, ...]]] = {
+    "section_pattern": (str, ("name",)),
+    "material_keywords": (list, ()),
+    "fill_section_keys": (list, ()),
+    "inline_sub_section_keys": (list, ()),
+    "question_types": (list, ()),
+    "choice_type_keys": (list, ()),
+    "fill_in_types": (list, ()),
+    "inline_sub_types": (list, ()),
+    "question_number_pattern": (str, ("number",)),
+    "sub_question_pattern": (str, ("sub",)),
+    "grouped_answer_pattern": (str, ()),
+    "sub_answer_pattern": (str, ()),
+    "grouped_analysis_pattern": (str, ()),
+    "sub_analysis_pattern": (str, ()),
+}
+
+
+class StructureGrammar:
+    """
+    One compiled rule set of the structure grammar
+
+    Holds the keyword lists and compiled patterns that StructureParser,
+    ParagraphIndex and ContentParser match paragraphs against.
+    """
+
+    def __init__(self, name: str, rules: Dict[str, Any]):
+        """
+        Compile a rule set
+
+        Args:
+            name: Rule set name
+            rules: Rule set with every key of RULE_SET_KEYS ("extends" already resolved)
+
+        Raises:
+            GrammarError: If a key is missing, has the wrong type or a pattern does not compile
+        """
+        self.name = name
+        self.rules = rules
+
+        unknown = sorted(set(rules) - set(RULE_SET_KEYS))
+        if unknown:
+            raise GrammarError(f"Rule set '{name}': unknown keys {unknown}")
+        for key, (expected_type, _) in RULE_SET_KEYS.items():
+            if key not in rules:
+                raise GrammarError(f"Rule set '{name}': missing '{key}'")
+            if not isinstance(rules[key], expected_type):
+                raise GrammarError(f"Rule set '{name}': '{key}' must be a {expected_type.__name__}")
+
+        self.material_keywords: List[str] = list(rules["material_keywords"])
+        self.fill_section_keys: List[str] = list(rules["fill_section_keys"])
+        self.inline_sub_section_keys: List[str] = list(rules["inline_sub_section_keys"])
+        self.choice_type_keys: Tuple[str, ...] = tuple(rules["choice_type_keys"])
+        self.fill_in_types = set(rules["fill_in_types"])
+        self.inline_sub_types = set(rules["inline_sub_types"])
+        self.question_types: List[Tuple[List[str], str]] = []
+        for entry in rules["question_types"]:
+            if not isinstance(entry, dict) or not entry.get("keys") or not entry.get("type"):
+                raise GrammarError(f"Rule set '{name}': question_types entries need 'keys' and 'type'")
+            self.question_types.append((list(entry["keys"]), entry["type"]))
+
+        self.grouped_answer_pattern = self._compile("grouped_answer_pattern")
+        self.sub_answer_pattern = self._compile("sub_answer_pattern", re.DOTALL)
+        self.grouped_analysis_pattern = self._compile("grouped_analysis_pattern", re.DOTALL)
+        self.sub_analysis_pattern = self._compile("sub_analysis_pattern", re.DOTALL)
+        # Checked for their named groups, then combined into the matchers below
+        self._compile("section_pattern")
+        self._compile("question_number_pattern")
+        self._compile("sub_question_pattern")
+
+        try:
+            self.leading_pattern = compile_leading_pattern(
+                rules["question_number_pattern"], rules["sub_question_pattern"]
+            )
+            self.classifier = ParagraphClassifier(rules["section_pattern"], self.material_keywords)
+        except re.error as e:
+            raise GrammarError(f"Rule set '{name}': patterns cannot be combined: {e}")
+
+        # Changes whenever the rules change, so cached parse results can be told apart
+        canonical = json.dumps(rules, ensure_ascii=False, sort_keys=True)
+        self.fingerprint = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+    def _compile(self, key: str, flags: int = 0) -> Pattern:
+        try:
+            pattern = re.compile(self.rules[key], flags)
+        except re.error as e:
+            raise GrammarError(f"Rule set '{self.name}': invalid {key}: {e}")
+        missing = [group for group in RULE_SET_KEYS[key][1] if group not in pattern.groupindex]
+        if missing:
+            raise GrammarError(f"Rule set '{self.name}': {key} needs named groups {missing}")
+        return pattern
+
+    def is_choice_type(self, question_type: str) -> bool:
+        return any(key in question_type for key in self.choice_type_keys)
+
+    def question_type(self, section_name: str) -> Optional[str]:
+        """Standardized question type for a section name, or None if no keyword matches"""
+        section_name = section_name.lower()
+        for keys, question_type in self.question_types:
+            if any(key in section_name for key in keys):
+                return question_type
+        return None
+
+
+class GrammarRegistry:
+    """
+    Rule sets loaded from the structure grammar JSON file
+
+    The file is checked for changes whenever a rule set is requested, so
+    edits take effect on the next parse in every worker process without a
+    restart. A file that fails to load is reported and the previously
+    loaded rules stay in use.
+    """
+
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "grammar", "structure_grammar.json")
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize grammar registry
+
+        Args:
+            path: Grammar JSON file (defaults to the bundled grammar)
+        """
+        self.path = path or self.DEFAULT_PATH
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._default = ""
+        self._paper_types: Dict[str, str] = {}
+        self._rule_sets: Dict[str, StructureGrammar] = {}
+
+    def load(self) -> None:
+        """
+        Load and compile the grammar file
+
+        Raises:
+            GrammarError: If the file cannot be read or a rule set is invalid
+        """
+        try:
+            stat = os.stat(self.path)
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise GrammarError(f"Cannot load structure grammar {self.path}: {e}")
+
+        if not isinstance(data, dict) or not isinstance(data.get("rule_sets"), dict):
+            raise GrammarError(f"Structure grammar {self.path} has no 'rule_sets' object")
+        raw_sets: Dict[str, Dict] = data["rule_sets"]
+        default = data.get("default") or next(iter(raw_sets), "")
+        paper_types = data.get("paper_types") or {}
+
+        rule_sets = {
+            name: StructureGrammar(name, self._resolve(name, raw_sets))
+            for name in raw_sets
+        }
+        for name in [default] + list(paper_types.values()):
+            if name not in rule_sets:
+                raise GrammarError(f"Structure grammar {self.path} refers to unknown rule set '{name}'")
+
+        with self._lock:
+            self._rule_sets = rule_sets
+            self._default = default
+            self._paper_types = dict(paper_types)
+            self._signature = (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _resolve(name: str, raw_sets: Dict[str, Dict], seen: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """Merge a rule set over the rule set it extends"""
+        if name in seen:
+            raise GrammarError(f"Rule set '{name}' extends itself")
+        rules = raw_sets.get(name)
+        if not isinstance(rules, dict):
+            raise GrammarError(f"Unknown rule set '{name}'")
+        rules = dict(rules)
+        parent = rules.pop("extends", None)
+        if parent is None:
+            return rules
+        return {**GrammarRegistry._resolve(parent, raw_sets, seen + (name,)), **rules}
+
+    def reload_if_changed(self) -> None:
+        """Reload the grammar file if it changed since it was last loaded"""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature is not None and signature == self._signature:
+            return
+
+        try:
+            self.load()
+        except GrammarError as e:
+            if not self._rule_sets:
+                raise
+            # Keep parsing with the last good rules until the file is fixed
+            print(f"Error reloading structure grammar, keeping previous rules: {e}")
+            self._signature = signature
+
+    def resolve_name(self, rule_set: Optional[str] = None, paper_type: Optional[str] = None) -> str:
+        """
+        Pick the rule set for a paper
+
+        Args:
+            rule_set: Explicitly requested rule set
+            paper_type: PaperMetadata.paperType, looked up in the grammar's paper_types
+
+        Returns:
+            Rule set name
+
+        Raises:
+            GrammarError: If the requested rule set does not exist
+        """
+        self.reload_if_changed()
+        if rule_set:
+            if rule_set not in self._rule_sets:
+                raise GrammarError(f"Unknown rule set '{rule_set}'")
+            return rule_set
+        if paper_type and paper_type in self._paper_types:
+            return self._paper_types[paper_type]
+        return self._default
+
+    def get(self, rule_set: Optional[str] = None) -> StructureGrammar:
+        """
+        Get a compiled rule set, reloading the file first if it changed
+
+        Args:
+            rule_set: Rule set name (the default rule set if omitted)
+
+        Returns:
+            StructureGrammar
+
+        Raises:
+            GrammarError: If the rule set does not exist
+        """
+        self.reload_if_changed()
+        grammar = self._rule_sets.get(rule_set or self._default)
+        if grammar is None:
+            raise GrammarError(f"Unknown rule set '{rule_set}'")
+        return grammar
+
+    def rule_set_names(self) -> List[str]:
+        self.reload_if_changed()
+        return list(self._rule_sets)
+
+
+_registry: Optional[GrammarRegistry] = None
+
+
+def get_grammar_registry() -> GrammarRegistry:
+    """Get the process-wide grammar registry (each worker process has its own)"""
+    global _registry
+    if _registry is None:
+        _registry = GrammarRegistry(get_settings().structure_grammar_path)
+    return _registry
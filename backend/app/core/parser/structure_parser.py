@@ -1,6 +1,9 @@
-import re
+from enum import Enum
 from typing import List, Dict, Optional, Tuple
 from docx.text.paragraph import Paragraph
+from app.core.parser.paragraph_classifier import ParagraphKind
+from app.core.parser.paragraph_index import Block, ParagraphFeatures, ParagraphIndex
+from app.core.parser.structure_grammar import StructureGrammar, get_grammar_registry
 
 
 class QuestionSection:
@@ -19,11 +22,20 @@ class QuestionBlock:
         self.number = number
         self.start_index = start_index
         self.end_index: Optional[int] = None
-        self.paragraphs: List[Paragraph] = []
+        self.paragraphs: List[Block] = []
         self.is_material_question = False
         self.sub_questions: List["QuestionBlock"] = []
 
 
+class ParseState(str, Enum):
+    """Where StructureParser.parse is in the document"""
+
+    IDLE = "idle"                    # No question open (start of a section)
+    QUESTION = "question"            # Collecting a regular question
+    MATERIAL = "material"            # Collecting material before its first sub-question
+    MATERIAL_SUBS = "material_subs"  # Collecting the sub-questions of a material
+
+
 class StructureParser:
     """Parser for recognizing document structure (question types and numbers)"""
 
@@ -40,182 +52,214 @@ class StructureParser:
         "十": 10,
     }
 
-    TYPE_PATTERN = re.compile(r"^([一二三四五六七八九十]+)、\s*(.+)$")
-    QUESTION_NUMBER_PATTERN = re.compile(r"^(\d+)[．.]\s*")
-    SUB_QUESTION_PATTERN = re.compile(r"^\((\d+)\)\s*")
-    ANALYSIS_DETAIL_PATTERN = re.compile(r"^(\d+)[．.]\s*([A-D])[、．.]")
-    ANALYSIS_OPTION_DETAIL_PATTERN = re.compile(r"^([A-D])、")
-
-    MATERIAL_KEYWORDS = [
-        r"阅读下列材料，完成下面小题",
-        r"阅读下列材料，回答下列问题",
-        r"阅读下列材料，回答问题",
-        r"回答下列小题",
-        r"完成下列题目",
-        r"完成下面小题",  # Added missing keyword
-    ]
-
-    def __init__(self, paragraphs: List[Paragraph]):
+    # Handler per parser state and paragraph kind. Handlers return the next state.
+    _COMMON_TRANSITIONS = {
+        ParagraphKind.EMPTY: "_skip",
+        ParagraphKind.TABLE: "_append",  # Tables belong to whatever is being collected
+        ParagraphKind.SECTION: "_start_section",
+        ParagraphKind.MATERIAL: "_start_material",
+    }
+    TRANSITIONS = {
+        ParseState.IDLE: {
+            **_COMMON_TRANSITIONS,
+            ParagraphKind.TEXT: "_skip",
+            ParagraphKind.ATTRIBUTE: "_skip",
+            ParagraphKind.ANALYSIS_OPTION: "_skip",
+            ParagraphKind.ANALYSIS_DETAIL: "_start_question",
+            ParagraphKind.QUESTION: "_start_question",
+            ParagraphKind.QUESTION_ATTRIBUTE: "_start_question",
+            ParagraphKind.SUB_QUESTION: "_skip",
+            ParagraphKind.SUB_QUESTION_ATTRIBUTE: "_skip",
+        },
+        ParseState.QUESTION: {
+            **_COMMON_TRANSITIONS,
+            ParagraphKind.TEXT: "_append",
+            ParagraphKind.ATTRIBUTE: "_append",
+            ParagraphKind.ANALYSIS_OPTION: "_append",
+            ParagraphKind.ANALYSIS_DETAIL: "_start_question",
+            ParagraphKind.QUESTION: "_start_question",
+            ParagraphKind.QUESTION_ATTRIBUTE: "_start_question",
+            ParagraphKind.SUB_QUESTION: "_start_sub_part",
+            ParagraphKind.SUB_QUESTION_ATTRIBUTE: "_start_sub_part",
+        },
+        # Material content, attribute blocks and analysis details go to the
+        # parent; a question number opens the first sub-question
+        ParseState.MATERIAL: {
+            **_COMMON_TRANSITIONS,
+            ParagraphKind.TEXT: "_append_parent",
+            ParagraphKind.ATTRIBUTE: "_append_parent",
+            ParagraphKind.ANALYSIS_OPTION: "_append_parent",
+            ParagraphKind.ANALYSIS_DETAIL: "_append_parent",
+            ParagraphKind.QUESTION: "_start_sub_question",
+            ParagraphKind.QUESTION_ATTRIBUTE: "_start_sub_question",
+            ParagraphKind.SUB_QUESTION: "_start_sub_part",
+            ParagraphKind.SUB_QUESTION_ATTRIBUTE: "_start_sub_part",
+        },
+        # Text goes to the last sub-question; attribute blocks and analysis
+        # details still go to the parent so they never show up in sub-question stems
+        ParseState.MATERIAL_SUBS: {
+            **_COMMON_TRANSITIONS,
+            ParagraphKind.TEXT: "_append",
+            ParagraphKind.ATTRIBUTE: "_append_parent",
+            ParagraphKind.ANALYSIS_OPTION: "_append_parent",
+            ParagraphKind.ANALYSIS_DETAIL: "_append_parent",
+            ParagraphKind.QUESTION: "_start_sub_question",
+            ParagraphKind.QUESTION_ATTRIBUTE: "_append_parent",
+            ParagraphKind.SUB_QUESTION: "_start_sub_part",
+            ParagraphKind.SUB_QUESTION_ATTRIBUTE: "_append_parent",
+        },
+    }
+
+    def __init__(
+        self,
+        paragraphs: List[Block],
+        paragraph_index: Optional[ParagraphIndex] = None,
+        grammar: Optional[StructureGrammar] = None,
+    ):
         """Initialize structure parser
 
         Args:
-            paragraphs: List of paragraphs from document
+            paragraphs: Paragraphs and data tables from document, in reading order
+            paragraph_index: Shared paragraph feature index (built here if omitted)
+            grammar: Structure rule set (the default rule set if omitted)
         """
         self.paragraphs = paragraphs
+        self.grammar = grammar or get_grammar_registry().get()
+        self.paragraph_index = paragraph_index or ParagraphIndex(
+            paragraphs, self.grammar.leading_pattern
+        )
+        self.classifier = self.grammar.classifier
         self.sections: List[QuestionSection] = []
 
+        # Parse state, reset by parse()
+        self._section: Optional[QuestionSection] = None
+        self._question: Optional[QuestionBlock] = None
+        self._state = ParseState.IDLE
+        self._is_fill_section = False
+        self._is_inline_sub_section = False
+
     def _paragraph_has_image(self, paragraph: Paragraph) -> bool:
         """Check if paragraph contains embedded images."""
-        for run in paragraph.runs:
-            try:
-                if run._element.xpath('.//a:blip') or run._element.xpath('.//v:imagedata'):
-                    return True
-            except Exception:
-                continue
-        return False
+        return self.paragraph_index.get(paragraph).has_image
 
     def parse(self) -> List[QuestionSection]:
         """Parse document structure to identify question sections and blocks
 
+        Each paragraph is classified once (see ParagraphClassifier) and the
+        handler for the current state and paragraph kind is looked up in
+        TRANSITIONS.
+
         Returns:
             List of question sections with their questions
         """
-        current_section: Optional[QuestionSection] = None
-        current_question: Optional[QuestionBlock] = None
-        in_material = False
-        has_material_content = False
+        transitions = {
+            state: {kind: getattr(self, handler) for kind, handler in handlers.items()}
+            for state, handlers in self.TRANSITIONS.items()
+        }
+        classify = self.classifier.classify
+        get_features = self.paragraph_index.get
+
+        self._section = None
+        self._question = None
+        self._state = ParseState.IDLE
+        self._is_fill_section = False
+        self._is_inline_sub_section = False
 
         for i, para in enumerate(self.paragraphs):
-            text = para.text.strip()
-            has_image = self._paragraph_has_image(para)
-            is_fill_section = current_section and "填空" in current_section.type_name
-            is_inline_sub_section = current_section and any(
-                key in current_section.type_name
-                for key in ["填空", "简答", "实验", "解答", "综合应用"]
-            )
-
-            if not text and not has_image:
-                continue
-
-            # Check for question type section
-            type_match = self.TYPE_PATTERN.match(text)
-            if type_match:
-                chinese_num, type_name = type_match.groups()
-                current_section = QuestionSection(type_name.strip(), i)
-                self.sections.append(current_section)
-                current_question = None
-                in_material = False
-                has_material_content = False
-                continue
-
-            # Check for material question keywords
-            if not is_fill_section and any(keyword in text.strip() for keyword in self.MATERIAL_KEYWORDS):
-                # Close previous question before starting new material collection
-                if current_question:
-                    current_question.end_index = i - 1
-
-                in_material = True
-                # Create a placeholder question to hold material content
-                current_question = QuestionBlock("material_placeholder", i)
-                if current_section:
-                    current_section.questions.append(current_question)
-                current_question.paragraphs.append(para)
-                has_material_content = True
-                continue
-
-            # Collect material content paragraphs (only before sub-questions are created)
-            if in_material and has_material_content and current_question and not current_question.sub_questions and not self.QUESTION_NUMBER_PATTERN.match(text) and not self.SUB_QUESTION_PATTERN.match(text):
-                # Check if this is an attribute block (答案/难度/知识点/解析/详解)
-                # Always add attribute paragraphs to parent (material) question, not to sub-questions
-                # This ensures attributes are available for parsing but don't appear in sub-question stems
-                if any(attr in text for attr in ["【答案】", "【难度】", "【知识点】", "【解析】", "【详解】"]):
-                    current_question.paragraphs.append(para)
-                    continue
-
-                # Add material content to the placeholder question (only before sub-questions exist)
-                current_question.paragraphs.append(para)
-                continue
-
-            # After sub-questions are created, attribute blocks should still go to parent
-            if in_material and has_material_content and current_question and current_question.sub_questions:
-                if any(attr in text for attr in ["【答案】", "【难度】", "【知识点】", "【解析】", "【详解】"]):
-                    current_question.paragraphs.append(para)
-                    continue
-
-            # Check if this is analysis detail paragraph (e.g., "4．A、解析内容")
-            # These should be added to parent question, not treated as sub-questions
-            if in_material and has_material_content and current_question and self.ANALYSIS_DETAIL_PATTERN.match(text):
-                current_question.paragraphs.append(para)
-                continue
-
-            # Check if this is analysis option detail (e.g., "A、解析内容")
-            # These appear in 【解析】block and should be added to parent
-            if in_material and has_material_content and current_question and current_question.sub_questions and self.ANALYSIS_OPTION_DETAIL_PATTERN.match(text):
-                current_question.paragraphs.append(para)
-                continue
-
-            question_match = self.QUESTION_NUMBER_PATTERN.match(text)
-            if question_match:
-                number = question_match.group(1)
-
-                # If in material phase, this is a sub-question (either first or subsequent)
-                if in_material and has_material_content and current_question:
-                    # If this is the first sub-question, update placeholder number
-                    if current_question.number == "material_placeholder":
-                        current_question.number = number
-                        current_question.is_material_question = True
-
-                    # Create sub-question with question number
-                    sub_question = QuestionBlock(number, i)
-                    sub_question.paragraphs.append(para)
-                    current_question.sub_questions.append(sub_question)
-                    continue
-
-                # Close previous question (normal case)
-                if current_question and not in_material:
-                    current_question.end_index = i - 1
-
-                # Create new question (normal case)
-                current_question = QuestionBlock(number, i)
-                if current_section:
-                    current_section.questions.append(current_question)
-
-                current_question.paragraphs.append(para)
-                in_material = False  # Reset material flag for normal questions
-                has_material_content = False
-                continue
-
-            # Check for sub-question number (material question)
-            sub_match = self.SUB_QUESTION_PATTERN.match(text)
-            if sub_match and current_question:
-                if is_inline_sub_section:
-                    current_question.paragraphs.append(para)
-                    continue
-
-                sub_number = sub_match.group(1)
-
-                # Mark parent as material question
-                current_question.is_material_question = True
-
-                # Create sub-question
-                sub_question = QuestionBlock(f"({sub_number})", i)
-                sub_question.paragraphs.append(para)
-                current_question.sub_questions.append(sub_question)
-                continue
-
-            # Add paragraph to current question
-            if current_question:
-                if current_question.sub_questions:
-                    current_question.sub_questions[-1].paragraphs.append(para)
-                else:
-                    current_question.paragraphs.append(para)
+            features = get_features(para)
+            kind = classify(features, allow_material=not self._is_fill_section)
+            self._state = transitions[self._state][kind](i, para, features)
 
         # Close last question
-        if current_question:
-            current_question.end_index = len(self.paragraphs) - 1
+        if self._question:
+            self._question.end_index = len(self.paragraphs) - 1
 
         return self.sections
 
+    def _skip(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        return self._state
+
+    def _append(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        """Add paragraph to the last sub-question, or to the question itself"""
+        question = self._question
+        if question:
+            if question.sub_questions:
+                question.sub_questions[-1].paragraphs.append(para)
+            else:
+                question.paragraphs.append(para)
+        return self._state
+
+    def _append_parent(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        """Add paragraph to the material (parent) question"""
+        self._question.paragraphs.append(para)
+        return self._state
+
+    def _start_section(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        type_name = self.classifier.section_name(features.stripped)
+        self._section = QuestionSection(type_name, i)
+        self.sections.append(self._section)
+        self._is_fill_section = any(key in type_name for key in self.grammar.fill_section_keys)
+        self._is_inline_sub_section = any(
+            key in type_name for key in self.grammar.inline_sub_section_keys
+        )
+        self._question = None
+        return ParseState.IDLE
+
+    def _start_material(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        # Close previous question before starting new material collection
+        if self._question:
+            self._question.end_index = i - 1
+
+        # Create a placeholder question to hold material content
+        self._question = QuestionBlock("material_placeholder", i)
+        if self._section:
+            self._section.questions.append(self._question)
+        self._question.paragraphs.append(para)
+        return ParseState.MATERIAL
+
+    def _start_question(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        # Close previous question (normal case)
+        if self._question:
+            self._question.end_index = i - 1
+
+        self._question = QuestionBlock(features.question_number, i)
+        if self._section:
+            self._section.questions.append(self._question)
+        self._question.paragraphs.append(para)
+        return ParseState.QUESTION
+
+    def _start_sub_question(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        """Numbered question inside a material: a sub-question of the material"""
+        question = self._question
+        number = features.question_number
+
+        # If this is the first sub-question, update placeholder number
+        if question.number == "material_placeholder":
+            question.number = number
+            question.is_material_question = True
+
+        sub_question = QuestionBlock(number, i)
+        sub_question.paragraphs.append(para)
+        question.sub_questions.append(sub_question)
+        return ParseState.MATERIAL_SUBS
+
+    def _start_sub_part(self, i: int, para: Block, features: ParagraphFeatures) -> ParseState:
+        """(1)(2) part: inline in fill-in/answer sections, a sub-question elsewhere"""
+        question = self._question
+        if self._is_inline_sub_section:
+            question.paragraphs.append(para)
+            return self._state
+
+        # Mark parent as material question
+        question.is_material_question = True
+
+        sub_question = QuestionBlock(f"({features.sub_question_number})", i)
+        sub_question.paragraphs.append(para)
+        question.sub_questions.append(sub_question)
+        if self._state == ParseState.MATERIAL:
+            return ParseState.MATERIAL_SUBS
+        return self._state
+
     def get_question_type(self, section: QuestionSection) -> str:
         """Determine question type from section name
 
@@ -225,20 +269,7 @@ class StructureParser:
         Returns:
             Standardized question type name
         """
-        type_name = section.type_name.lower()
-
-        if "选择" in type_name:
-            return "选择题"
-        elif "填空" in type_name:
-            return "填空题"
-        elif "解答" in type_name or "计算" in type_name:
-            return "解答题"
-        elif "实验" in type_name:
-            return "实验题"
-        elif "简答" in type_name:
-            return "简答题"
-        else:
-            return section.type_name
+        return self.grammar.question_type(section.type_name) or section.type_name
 
     def extract_question_blocks(self) -> List[Dict]:
         """Extract all question blocks with metadata
@@ -251,7 +282,7 @@ class StructureParser:
         questions = []
         for section in self.sections:
             question_type = self.get_question_type(section)
-            inline_sub_types = {"填空题", "简答题", "实验题", "解答题", "综合应用题"}
+            inline_sub_types = self.grammar.inline_sub_types
 
             for question in section.questions:
                 if question_type in inline_sub_types and question.sub_questions:
@@ -261,7 +292,7 @@ class StructureParser:
                     question.is_material_question = False
 
                 # Check if this is a fill-in question with sub-questions
-                if question_type == "填空题" and question.sub_questions:
+                if question_type in self.grammar.fill_in_types and question.sub_questions:
                     question_data = {
                         "number": question.number,
                         "type": question_type,
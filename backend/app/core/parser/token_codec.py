@@ -0,0 +1,186 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+from app.models.schemas.question import QuestionItem
+
+
+# Compact token encoding stored in QuestionContent.tokens:
+#   {"v": 1, "k": [[code, value], ...], "m": {hash: [omml, mathml]}}
+# Text-like tokens keep their text as value, images their image ID and
+# formulas a hash into "m", so a formula repeated in one content is stored once.
+# Tables store rows of [cell_items, colspan, rowspan], where cell_items are
+# encoded like "k" and share the same "m".
+CODEC_VERSION = 1
+
+TYPE_CODES = {
+    "text": "x",
+    "sub": "b",
+    "sup": "p",
+    "u": "u",
+    "math": "m",
+    "img": "i",
+    "table": "t",
+}
+CODE_TYPES = {code: token_type for token_type, code in TYPE_CODES.items()}
+
+
+def content_hash(value: str) -> str:
+    """Short SHA-256 digest used for formula keys and HTML fingerprints"""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_tokens(tokens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Encode a token stream in the compact storage format
+
+    Args:
+        tokens: Tokens from TokenGenerator.generate_tokens
+
+    Returns:
+        Compact token document
+    """
+    formulas: Dict[str, List[str]] = {}
+    items = _encode_items(tokens, formulas)
+
+    document: Dict[str, Any] = {"v": CODEC_VERSION, "k": items}
+    if formulas:
+        document["m"] = formulas
+    return document
+
+
+def _encode_items(tokens: List[Dict[str, Any]], formulas: Dict[str, List[str]]) -> List[List]:
+    """Encode tokens as [code, value] pairs, collecting formulas into formulas"""
+    items = []
+
+    for token in tokens:
+        token_type = token.get("t")
+        code = TYPE_CODES.get(token_type)
+        if code is None:
+            continue
+
+        if token_type == "math":
+            omml = token.get("omml", "")
+            key = content_hash(omml)
+            formulas.setdefault(key, [omml, token.get("mathml", "")])
+            items.append([code, key])
+        elif token_type == "img":
+            items.append([code, token.get("ref")])
+        elif token_type == "table":
+            rows = [
+                [
+                    [
+                        _encode_items(cell.get("v", []), formulas),
+                        cell.get("colspan", 1),
+                        cell.get("rowspan", 1),
+                    ]
+                    for cell in row
+                ]
+                for row in token.get("rows", [])
+            ]
+            items.append([code, rows])
+        else:
+            items.append([code, token.get("v", "")])
+
+    return items
+
+
+def decode_tokens(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Decode a compact token document back into a token stream
+
+    Args:
+        document: Compact token document from encode_tokens
+
+    Returns:
+        Tokens in the format produced by TokenGenerator.generate_tokens
+    """
+    return _decode_items(document.get("k", []), document.get("m", {}))
+
+
+def _decode_items(items: List[List], formulas: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """Decode [code, value] pairs back into tokens"""
+    tokens = []
+
+    for code, value in items:
+        token_type = CODE_TYPES.get(code)
+        if token_type is None:
+            continue
+
+        if token_type == "math":
+            omml, mathml = formulas.get(value, ["", ""])
+            tokens.append({"t": "math", "omml": omml, "mathml": mathml})
+        elif token_type == "img":
+            tokens.append({"t": "img", "ref": value})
+        elif token_type == "table":
+            rows = []
+            for row in value:
+                cells = []
+                for cell_items, colspan, rowspan in row:
+                    cell: Dict[str, Any] = {"v": _decode_items(cell_items, formulas)}
+                    if colspan > 1:
+                        cell["colspan"] = colspan
+                    if rowspan > 1:
+                        cell["rowspan"] = rowspan
+                    cells.append(cell)
+                rows.append(cells)
+            tokens.append({"t": "table", "rows": rows})
+        else:
+            tokens.append({"t": token_type, "v": value})
+
+    return tokens
+
+
+def build_token_index(questions: List[QuestionItem]) -> Dict[str, Dict[str, Any]]:
+    """
+    Collect encoded stem tokens of parsed questions, keyed by question ID
+
+    Each entry keeps a fingerprint of the HTML rendered from the tokens, so
+    tokens are only reused for content that was not edited after parsing.
+
+    Args:
+        questions: Parsed questions (children are included)
+
+    Returns:
+        {question_id: {"stem": {"h": html_hash, "tokens": compact_document}}}
+    """
+    index: Dict[str, Dict[str, Any]] = {}
+
+    def visit(question: QuestionItem) -> None:
+        if question._stem_tokens is not None:
+            index[question.id] = {
+                "stem": {
+                    "h": content_hash(question.stem),
+                    "tokens": encode_tokens(question._stem_tokens),
+                }
+            }
+        for child in question.children or []:
+            visit(child)
+
+    for question in questions:
+        visit(question)
+    return index
+
+
+def lookup_tokens(
+    token_index: Optional[Dict[str, Dict[str, Any]]],
+    question_id: str,
+    content_type: str,
+    html: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Find stored tokens for submitted content
+
+    Args:
+        token_index: Index from build_token_index, or None
+        question_id: Submitted question ID
+        content_type: Content type value (e.g. "stem")
+        html: Submitted HTML
+
+    Returns:
+        Compact token document, or None if there are no tokens or the HTML changed
+    """
+    if not token_index:
+        return None
+    entry = token_index.get(question_id, {}).get(content_type)
+    if entry is None or entry["h"] != content_hash(html):
+        return None
+    return entry["tokens"]
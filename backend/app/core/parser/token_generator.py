@@ -1,15 +1,25 @@
-from typing import List, Dict, Any
-from lxml import etree
+from typing import List, Dict, Any, Optional
+from docx.table import Table
 from docx.text.paragraph import Paragraph
 from docx.text.run import Run
+from app.core.parser.docx_parser import iter_cell_blocks, iter_table_cells
 from app.core.parser.formula_parser import FormulaParser
 from app.core.parser.image_parser import ImageParser
+from app.core.parser.paragraph_index import Block, ParagraphIndex
+from app.core.parser.parse_stats import ParseStats
 
 
 class TokenGenerator:
     """Generator for creating rich text token streams from Word document content"""
 
-    def __init__(self, formula_parser: FormulaParser, image_parser: ImageParser, task_id: str = None):
+    def __init__(
+        self,
+        formula_parser: FormulaParser,
+        image_parser: ImageParser,
+        task_id: str = None,
+        paragraph_index: Optional[ParagraphIndex] = None,
+        stats: Optional[ParseStats] = None,
+    ):
         """
         Initialize token generator
 
@@ -17,25 +27,36 @@ class TokenGenerator:
             formula_parser: Formula parser instance
             image_parser: Image parser instance
             task_id: Task ID for generating image URLs
+            paragraph_index: Shared paragraph feature index
+            stats: Parse stats that token generation and rendering are timed in
         """
+        self.stats = stats or ParseStats()
         self.formula_parser = formula_parser
         self.image_parser = image_parser
         self.task_id = task_id
+        self.paragraph_index = paragraph_index or ParagraphIndex()
 
-    def generate_tokens(self, paragraphs: List[Paragraph]) -> List[Dict[str, Any]]:
+    def generate_tokens(self, paragraphs: List[Block]) -> List[Dict[str, Any]]:
         """
         Generate token stream from paragraphs
 
         Args:
-            paragraphs: List of paragraph objects
+            paragraphs: List of paragraph (or data table) objects
 
         Returns:
             List of token dictionaries
         """
+        with self.stats.stage("tokens"):
+            return self._generate_tokens(paragraphs)
+
+    def _generate_tokens(self, paragraphs: List[Block]) -> List[Dict[str, Any]]:
         tokens = []
 
         for paragraph in paragraphs:
-            tokens.extend(self._process_paragraph(paragraph))
+            if isinstance(paragraph, Table):
+                tokens.append(self._process_table(paragraph))
+            else:
+                tokens.extend(self._process_paragraph(paragraph))
 
             # Add line break after paragraph (except for last one)
             if paragraph != paragraphs[-1]:
@@ -46,6 +67,7 @@ class TokenGenerator:
     def _process_paragraph(self, paragraph: Paragraph) -> List[Dict[str, Any]]:
         """Process a paragraph and keep the order of text, formulas, and images."""
         tokens: List[Dict[str, Any]] = []
+        features = self.paragraph_index.get(paragraph)
         run_map = {run._element: run for run in paragraph.runs}
 
         for child in paragraph._element:
@@ -54,7 +76,16 @@ class TokenGenerator:
             if tag == "r":
                 run = run_map.get(child)
                 if run:
-                    tokens.extend(self._process_run(run))
+                    tokens.extend(
+                        self._process_run(
+                            run,
+                            check_formula=features.has_formula,
+                            check_image=features.has_image,
+                        )
+                    )
+                continue
+
+            if not features.has_formula:
                 continue
 
             if tag in ("oMath", "oMathPara"):
@@ -64,29 +95,75 @@ class TokenGenerator:
                     if math_nodes:
                         omml_element = math_nodes[0]
 
-                omml_xml = None
-                try:
-                    omml_xml = etree.tostring(omml_element, encoding='unicode')
-                except Exception:
-                    omml_xml = None
-
-                if omml_xml:
-                    mathml = self.formula_parser.omml_to_mathml(omml_xml)
-                    tokens.append({
-                        "t": "math",
-                        "omml": omml_xml,
-                        "mathml": mathml or ""
-                    })
+                omml_xml, mathml = self.formula_parser.convert_element(omml_element)
+                tokens.append({
+                    "t": "math",
+                    "omml": omml_xml,
+                    "mathml": mathml or ""
+                })
                 continue
 
         return tokens
 
-    def _process_run(self, run: Run) -> List[Dict[str, Any]]:
+    def _process_table(self, table: Table) -> Dict[str, Any]:
+        """
+        Process a data table into a table token
+
+        Cells hold their own token streams; merged cells carry colspan and
+        rowspan, and cells covered by a vertical merge are omitted.
+
+        Args:
+            table: Table object
+
+        Returns:
+            Table token dictionary
+        """
+        rows = []
+        # Grid column -> cell that started a vertical merge there
+        merge_origins: Dict[int, Dict[str, Any]] = {}
+
+        for cells in iter_table_cells(table):
+            row = []
+            column = 0
+            for cell in cells:
+                span = cell.grid_span
+                v_merge = cell.vMerge
+
+                if v_merge == "continue":
+                    origin = merge_origins.get(column)
+                    if origin is not None:
+                        origin["rowspan"] = origin.get("rowspan", 1) + 1
+                else:
+                    token_cell: Dict[str, Any] = {
+                        "v": self.generate_tokens(list(iter_cell_blocks(cell, table)))
+                    }
+                    if span > 1:
+                        token_cell["colspan"] = span
+                    if v_merge == "restart":
+                        merge_origins[column] = token_cell
+                    else:
+                        merge_origins.pop(column, None)
+                    row.append(token_cell)
+
+                column += span
+            rows.append(row)
+
+        return {
+            "t": "table",
+            "rows": rows
+        }
+
+    def _process_run(
+        self, run: Run, check_formula: bool = True, check_image: bool = True
+    ) -> List[Dict[str, Any]]:
         """
         Process a single run and generate tokens
 
         Args:
             run: Run object
+            check_formula: Look for OMML inside the run (skipped when the
+                paragraph index shows the paragraph has no formulas)
+            check_image: Look for images inside the run
 
         Returns:
             List of token dictionaries
@@ -94,10 +171,10 @@ class TokenGenerator:
         tokens = []
 
         # Check for formula
-        if self.formula_parser.has_formula(run._element):
-            omml_xml = self.formula_parser.extract_omml_from_run(run._element)
-            if omml_xml:
-                mathml = self.formula_parser.omml_to_mathml(omml_xml)
+        if check_formula:
+            omml_element = self.formula_parser.find_omml_in_run(run._element)
+            if omml_element is not None:
+                omml_xml, mathml = self.formula_parser.convert_element(omml_element)
                 tokens.append({
                     "t": "math",
                     "omml": omml_xml,
@@ -106,7 +183,7 @@ class TokenGenerator:
                 return tokens
 
         # Check for images
-        image_refs = self._find_image_in_run(run)
+        image_refs = self._find_image_in_run(run) if check_image else []
         if image_refs:
             for image_id in image_refs:
                 tokens.append({
@@ -263,4 +340,31 @@ class TokenGenerator:
                         f'src="/api/images/{image_id}" />'
                     )
 
+            elif token_type == "table":
+                html_parts.append(self._table_to_html(token))
+
+        return "".join(html_parts)
+
+    def _table_to_html(self, token: Dict[str, Any]) -> str:
+        """
+        Render a table token to HTML
+
+        Args:
+            token: Table token dictionary
+
+        Returns:
+            HTML table string
+        """
+        html_parts = ['<table class="question-table"><tbody>']
+        for row in token.get("rows", []):
+            html_parts.append("<tr>")
+            for cell in row:
+                attributes = ""
+                if cell.get("colspan", 1) > 1:
+                    attributes += f' colspan="{cell["colspan"]}"'
+                if cell.get("rowspan", 1) > 1:
+                    attributes += f' rowspan="{cell["rowspan"]}"'
+                html_parts.append(f"<td{attributes}>{self.tokens_to_html(cell.get('v', []))}</td>")
+            html_parts.append("</tr>")
+        html_parts.append("</tbody></table>")
         return "".join(html_parts)
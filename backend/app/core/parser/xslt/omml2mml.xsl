@@ -0,0 +1,400 @@
+<?xml version="1.0" encoding="UTF-8"?>
+<!--
+  OMML (Office Math Markup Language) to Presentation MathML.
+
+  Covers the constructs found in exam papers: runs, fractions, scripts,
+  radicals, delimiters, n-ary operators, accents, bars, functions, limits,
+  group characters, matrices, equation arrays and boxes. Unknown elements
+  fall through to their children.
+
+  Set OMML_XSLT_PATH to use Microsoft's OMML2MML.XSL instead.
+-->
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+    xmlns:m="http://schemas.openxmlformats.org/officeDocument/2006/math"
+    xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    xmlns="http://www.w3.org/1998/Math/MathML"
+    exclude-result-prefixes="m w">
+
+  <xsl:output method="xml" encoding="UTF-8" omit-xml-declaration="yes" indent="no"/>
+
+  <xsl:variable name="digits" select="'0123456789.'"/>
+  <xsl:variable name="letters"
+      select="'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZαβγδεζηθικλμνξοπρστυφχψωΑΒΓΔΕΖΗΘΙΚΛΜΝΞΟΠΡΣΤΥΦΧΨΩ'"/>
+
+  <!-- Text is only emitted through m:t -->
+  <xsl:template match="text()"/>
+
+  <!-- Property elements carry no content -->
+  <xsl:template match="m:rPr | m:fPr | m:sSupPr | m:sSubPr | m:sSubSupPr | m:sPrePr
+      | m:radPr | m:dPr | m:naryPr | m:accPr | m:barPr | m:funcPr | m:limLowPr
+      | m:limUppPr | m:groupChrPr | m:mPr | m:mrPr | m:eqArrPr | m:boxPr
+      | m:borderBoxPr | m:ctrlPr | m:oMathParaPr | w:rPr"/>
+
+  <xsl:template match="m:oMathPara">
+    <math display="block">
+      <xsl:for-each select="m:oMath">
+        <mrow><xsl:apply-templates/></mrow>
+      </xsl:for-each>
+    </math>
+  </xsl:template>
+
+  <xsl:template match="m:oMath">
+    <math><xsl:apply-templates/></math>
+  </xsl:template>
+
+  <!-- Nested oMath (e.g. inside m:box) becomes a plain row -->
+  <xsl:template match="m:oMath//m:oMath">
+    <mrow><xsl:apply-templates/></mrow>
+  </xsl:template>
+
+  <!-- Argument containers -->
+  <xsl:template match="m:e | m:num | m:den | m:sup | m:sub | m:deg | m:lim | m:fName">
+    <mrow><xsl:apply-templates/></mrow>
+  </xsl:template>
+
+  <!-- Runs -->
+  <xsl:template match="m:r">
+    <xsl:variable name="text">
+      <xsl:for-each select="m:t"><xsl:value-of select="."/></xsl:for-each>
+    </xsl:variable>
+    <xsl:choose>
+      <xsl:when test="m:rPr/m:nor">
+        <mtext><xsl:value-of select="$text"/></mtext>
+      </xsl:when>
+      <xsl:otherwise>
+        <xsl:call-template name="tokens">
+          <xsl:with-param name="s" select="string($text)"/>
+          <xsl:with-param name="plain" select="m:rPr/m:sty/@m:val = 'p'"/>
+        </xsl:call-template>
+      </xsl:otherwise>
+    </xsl:choose>
+  </xsl:template>
+
+  <!-- Split run text into mn (numbers), mi (letters), mo (operators), mtext (other) -->
+  <xsl:template name="tokens">
+    <xsl:param name="s"/>
+    <xsl:param name="plain" select="false()"/>
+    <xsl:if test="string-length($s) &gt; 0">
+      <xsl:variable name="c" select="substring($s, 1, 1)"/>
+      <xsl:choose>
+        <xsl:when test="contains($digits, $c) and $c != '.'">
+          <xsl:variable name="rest" select="translate($s, $digits, '')"/>
+          <xsl:variable name="number">
+            <xsl:choose>
+              <xsl:when test="$rest = ''"><xsl:value-of select="$s"/></xsl:when>
+              <xsl:otherwise><xsl:value-of select="substring-before($s, substring($rest, 1, 1))"/></xsl:otherwise>
+            </xsl:choose>
+          </xsl:variable>
+          <mn><xsl:value-of select="$number"/></mn>
+          <xsl:call-template name="tokens">
+            <xsl:with-param name="s" select="substring($s, string-length($number) + 1)"/>
+            <xsl:with-param name="plain" select="$plain"/>
+          </xsl:call-template>
+        </xsl:when>
+        <xsl:otherwise>
+          <xsl:choose>
+            <xsl:when test="$c = ' ' or $c = '&#160;'"/>
+            <xsl:when test="contains($letters, $c)">
+              <xsl:choose>
+                <xsl:when test="$plain"><mi mathvariant="normal"><xsl:value-of select="$c"/></mi></xsl:when>
+                <xsl:otherwise><mi><xsl:value-of select="$c"/></mi></xsl:otherwise>
+              </xsl:choose>
+            </xsl:when>
+            <xsl:when test="contains('+-=&lt;&gt;±×÷·∙−≠≤≥≈≡∼∝∞→←↑↓↔⇒⇐⇔∈∉⊂⊃⊆⊇∪∩∧∨¬∀∃∂∇∑∏∫∮()[]{}|‖,;:!/\′″°%∠⊥∥△⊙….', $c)">
+              <mo><xsl:value-of select="$c"/></mo>
+            </xsl:when>
+            <xsl:otherwise>
+              <mtext><xsl:value-of select="$c"/></mtext>
+            </xsl:otherwise>
+          </xsl:choose>
+          <xsl:call-template name="tokens">
+            <xsl:with-param name="s" select="substring($s, 2)"/>
+            <xsl:with-param name="plain" select="$plain"/>
+          </xsl:call-template>
+        </xsl:otherwise>
+      </xsl:choose>
+    </xsl:if>
+  </xsl:template>
+
+  <!-- Fractions -->
+  <xsl:template match="m:f">
+    <xsl:variable name="type" select="m:fPr/m:type/@m:val"/>
+    <xsl:choose>
+      <xsl:when test="$type = 'lin' or $type = 'skw'">
+        <mrow>
+          <xsl:apply-templates select="m:num"/>
+          <mo>/</mo>
+          <xsl:apply-templates select="m:den"/>
+        </mrow>
+      </xsl:when>
+      <xsl:when test="$type = 'noBar'">
+        <mfrac linethickness="0">
+          <xsl:apply-templates select="m:num"/>
+          <xsl:apply-templates select="m:den"/>
+        </mfrac>
+      </xsl:when>
+      <xsl:otherwise>
+        <mfrac>
+          <xsl:apply-templates select="m:num"/>
+          <xsl:apply-templates select="m:den"/>
+        </mfrac>
+      </xsl:otherwise>
+    </xsl:choose>
+  </xsl:template>
+
+  <!-- Scripts -->
+  <xsl:template match="m:sSup">
+    <msup>
+      <xsl:apply-templates select="m:e"/>
+      <xsl:apply-templates select="m:sup"/>
+    </msup>
+  </xsl:template>
+
+  <xsl:template match="m:sSub">
+    <msub>
+      <xsl:apply-templates select="m:e"/>
+      <xsl:apply-templates select="m:sub"/>
+    </msub>
+  </xsl:template>
+
+  <xsl:template match="m:sSubSup">
+    <msubsup>
+      <xsl:apply-templates select="m:e"/>
+      <xsl:apply-templates select="m:sub"/>
+      <xsl:apply-templates select="m:sup"/>
+    </msubsup>
+  </xsl:template>
+
+  <xsl:template match="m:sPre">
+    <mmultiscripts>
+      <xsl:apply-templates select="m:e"/>
+      <mprescripts/>
+      <xsl:apply-templates select="m:sub"/>
+      <xsl:apply-templates select="m:sup"/>
+    </mmultiscripts>
+  </xsl:template>
+
+  <!-- Radicals -->
+  <xsl:template match="m:rad">
+    <xsl:variable name="hide" select="m:radPr/m:degHide/@m:val"/>
+    <xsl:choose>
+      <xsl:when test="$hide = '1' or $hide = 'on' or $hide = 'true'
+          or (m:radPr/m:degHide and not($hide)) or not(m:deg/*[not(self::m:ctrlPr)])">
+        <msqrt><xsl:apply-templates select="m:e/node()"/></msqrt>
+      </xsl:when>
+      <xsl:otherwise>
+        <mroot>
+          <xsl:apply-templates select="m:e"/>
+          <xsl:apply-templates select="m:deg"/>
+        </mroot>
+      </xsl:otherwise>
+    </xsl:choose>
+  </xsl:template>
+
+  <!-- Delimiters: (e1|e2|...) -->
+  <xsl:template match="m:d">
+    <xsl:variable name="beg">
+      <xsl:choose>
+        <xsl:when test="m:dPr/m:begChr"><xsl:value-of select="m:dPr/m:begChr/@m:val"/></xsl:when>
+        <xsl:otherwise>(</xsl:otherwise>
+      </xsl:choose>
+    </xsl:variable>
+    <xsl:variable name="end">
+      <xsl:choose>
+        <xsl:when test="m:dPr/m:endChr"><xsl:value-of select="m:dPr/m:endChr/@m:val"/></xsl:when>
+        <xsl:otherwise>)</xsl:otherwise>
+      </xsl:choose>
+    </xsl:variable>
+    <xsl:variable name="sep">
+      <xsl:choose>
+        <xsl:when test="m:dPr/m:sepChr"><xsl:value-of select="m:dPr/m:sepChr/@m:val"/></xsl:when>
+        <xsl:otherwise>|</xsl:otherwise>
+      </xsl:choose>
+    </xsl:variable>
+    <mrow>
+      <xsl:if test="string($beg) != ''"><mo fence="true"><xsl:value-of select="$beg"/></mo></xsl:if>
+      <xsl:for-each select="m:e">
+        <xsl:if test="position() &gt; 1"><mo separator="true"><xsl:value-of select="$sep"/></mo></xsl:if>
+        <xsl:apply-templates select="."/>
+      </xsl:for-each>
+      <xsl:if test="string($end) != ''"><mo fence="true"><xsl:value-of select="$end"/></mo></xsl:if>
+    </mrow>
+  </xsl:template>
+
+  <!-- N-ary operators (sum, product, integral) -->
+  <xsl:template match="m:nary">
+    <xsl:variable name="chr">
+      <xsl:choose>
+        <xsl:when test="m:naryPr/m:chr"><xsl:value-of select="m:naryPr/m:chr/@m:val"/></xsl:when>
+        <xsl:otherwise>∫</xsl:otherwise>
+      </xsl:choose>
+    </xsl:variable>
+    <xsl:variable name="subHide" select="m:naryPr/m:subHide/@m:val = '1' or m:naryPr/m:subHide/@m:val = 'on'"/>
+    <xsl:variable name="supHide" select="m:naryPr/m:supHide/@m:val = '1' or m:naryPr/m:supHide/@m:val = 'on'"/>
+    <xsl:variable name="under" select="m:naryPr/m:limLoc/@m:val = 'undOvr'"/>
+    <mrow>
+      <xsl:choose>
+        <xsl:when test="$subHide and $supHide">
+          <mo largeop="true"><xsl:value-of select="$chr"/></mo>
+        </xsl:when>
+        <xsl:when test="$supHide and $under">
+          <munder>
+            <mo largeop="true"><xsl:value-of select="$chr"/></mo>
+            <xsl:apply-templates select="m:sub"/>
+          </munder>
+        </xsl:when>
+        <xsl:when test="$supHide">
+          <msub>
+            <mo largeop="true"><xsl:value-of select="$chr"/></mo>
+            <xsl:apply-templates select="m:sub"/>
+          </msub>
+        </xsl:when>
+        <xsl:when test="$subHide and $under">
+          <mover>
+            <mo largeop="true"><xsl:value-of select="$chr"/></mo>
+            <xsl:apply-templates select="m:sup"/>
+          </mover>
+        </xsl:when>
+        <xsl:when test="$subHide">
+          <msup>
+            <mo largeop="true"><xsl:value-of select="$chr"/></mo>
+            <xsl:apply-templates select="m:sup"/>
+          </msup>
+        </xsl:when>
+        <xsl:when test="$under">
+          <munderover>
+            <mo largeop="true"><xsl:value-of select="$chr"/></mo>
+            <xsl:apply-templates select="m:sub"/>
+            <xsl:apply-templates select="m:sup"/>
+          </munderover>
+        </xsl:when>
+        <xsl:otherwise>
+          <msubsup>
+            <mo largeop="true"><xsl:value-of select="$chr"/></mo>
+            <xsl:apply-templates select="m:sub"/>
+            <xsl:apply-templates select="m:sup"/>
+          </msubsup>
+        </xsl:otherwise>
+      </xsl:choose>
+      <xsl:apply-templates select="m:e"/>
+    </mrow>
+  </xsl:template>
+
+  <!-- Accents (hat, vector arrow, dot...) -->
+  <xsl:template match="m:acc">
+    <mover accent="true">
+      <xsl:apply-templates select="m:e"/>
+      <mo>
+        <xsl:choose>
+          <xsl:when test="m:accPr/m:chr"><xsl:value-of select="m:accPr/m:chr/@m:val"/></xsl:when>
+          <xsl:otherwise>&#770;</xsl:otherwise>
+        </xsl:choose>
+      </mo>
+    </mover>
+  </xsl:template>
+
+  <!-- Over/under bars -->
+  <xsl:template match="m:bar">
+    <xsl:choose>
+      <xsl:when test="m:barPr/m:pos/@m:val = 'top'">
+        <mover accent="true">
+          <xsl:apply-templates select="m:e"/>
+          <mo>&#175;</mo>
+        </mover>
+      </xsl:when>
+      <xsl:otherwise>
+        <munder accentunder="true">
+          <xsl:apply-templates select="m:e"/>
+          <mo>&#818;</mo>
+        </munder>
+      </xsl:otherwise>
+    </xsl:choose>
+  </xsl:template>
+
+  <!-- Group characters (underbrace etc.) -->
+  <xsl:template match="m:groupChr">
+    <xsl:variable name="chr">
+      <xsl:choose>
+        <xsl:when test="m:groupChrPr/m:chr"><xsl:value-of select="m:groupChrPr/m:chr/@m:val"/></xsl:when>
+        <xsl:otherwise>&#9183;</xsl:otherwise>
+      </xsl:choose>
+    </xsl:variable>
+    <xsl:choose>
+      <xsl:when test="m:groupChrPr/m:pos/@m:val = 'top'">
+        <mover>
+          <xsl:apply-templates select="m:e"/>
+          <mo><xsl:value-of select="$chr"/></mo>
+        </mover>
+      </xsl:when>
+      <xsl:otherwise>
+        <munder>
+          <xsl:apply-templates select="m:e"/>
+          <mo><xsl:value-of select="$chr"/></mo>
+        </munder>
+      </xsl:otherwise>
+    </xsl:choose>
+  </xsl:template>
+
+  <!-- Functions: sin x, log x -->
+  <xsl:template match="m:func">
+    <mrow>
+      <xsl:apply-templates select="m:fName"/>
+      <mo>&#8289;</mo>
+      <xsl:apply-templates select="m:e"/>
+    </mrow>
+  </xsl:template>
+
+  <!-- Function names are upright multi-letter identifiers -->
+  <xsl:template match="m:fName/m:r">
+    <mi mathvariant="normal">
+      <xsl:for-each select="m:t"><xsl:value-of select="."/></xsl:for-each>
+    </mi>
+  </xsl:template>
+
+  <!-- Limits -->
+  <xsl:template match="m:limLow">
+    <munder>
+      <xsl:apply-templates select="m:e"/>
+      <xsl:apply-templates select="m:lim"/>
+    </munder>
+  </xsl:template>
+
+  <xsl:template match="m:limUpp">
+    <mover>
+      <xsl:apply-templates select="m:e"/>
+      <xsl:apply-templates select="m:lim"/>
+    </mover>
+  </xsl:template>
+
+  <!-- Matrices and equation arrays -->
+  <xsl:template match="m:m">
+    <mtable>
+      <xsl:for-each select="m:mr">
+        <mtr>
+          <xsl:for-each select="m:e">
+            <mtd><xsl:apply-templates select="."/></mtd>
+          </xsl:for-each>
+        </mtr>
+      </xsl:for-each>
+    </mtable>
+  </xsl:template>
+
+  <xsl:template match="m:eqArr">
+    <mtable columnalign="left">
+      <xsl:for-each select="m:e">
+        <mtr><mtd><xsl:apply-templates select="."/></mtd></mtr>
+      </xsl:for-each>
+    </mtable>
+  </xsl:template>
+
+  <!-- Boxes -->
+  <xsl:template match="m:box">
+    <mrow><xsl:apply-templates select="m:e"/></mrow>
+  </xsl:template>
+
+  <xsl:template match="m:borderBox">
+    <menclose notation="box"><xsl:apply-templates select="m:e"/></menclose>
+  </xsl:template>
+
+</xsl:stylesheet>
@@ -1,69 +1,272 @@
+import time
 import uuid
+from datetime import datetime, timedelta
 from typing import Dict, Optional, List
-from datetime import datetime
-from enum import Enum
+from starlette.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.core.task_store import (
+    TaskStatus,
+    TaskInfo,
+    UNFINISHED_STATUSES,
+    TaskStore,
+    MemoryTaskStore,
+    SQLiteTaskStore,
+)
 from app.models.schemas.question import QuestionItem
 
 
-class TaskStatus(str, Enum):
-    """Task processing status"""
-    PENDING = "pending"
-    PROCESSING = "processing"
-    COMPLETED = "success"  # 改为"success"以匹配前端
-    FAILED = "failed"
+class TaskManager:
+    """Task manager for tracking parsing tasks on top of a pluggable TaskStore"""
 
+    # Error of tasks that stopped being updated before they finished
+    STALE_ERROR = "Parsing was interrupted (the server may have restarted), please upload again"
 
-class TaskInfo:
-    """Task information container"""
-    def __init__(self, task_id: str, metadata: Optional[dict] = None):
-        self.task_id = task_id
-        self.status = TaskStatus.PENDING
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
-        self.metadata = metadata
-        self.questions: Optional[List[QuestionItem]] = None
-        self.error: Optional[str] = None
+    def __init__(
+        self,
+        store: TaskStore,
+        ttl_seconds: int = 86400,
+        cache_ttl_seconds: int = 604800,
+        purge_interval: int = 60,
+        stale_seconds: int = 360,
+    ):
+        """
+        Initialize task manager
 
+        Args:
+            store: Task storage backend
+            ttl_seconds: How long finished tasks are kept
+            cache_ttl_seconds: How long cached parse results are kept
+            purge_interval: Minimum seconds between expired-task purges
+            stale_seconds: Unfinished tasks not updated for this long are
+                marked as failed (their parse job is gone)
+        """
+        self._store = store
+        self.ttl_seconds = ttl_seconds
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.purge_interval = purge_interval
+        self.stale_seconds = stale_seconds
+        self._last_purge = 0.0
 
-class TaskManager:
-    """In-memory task manager for tracking parsing tasks"""
+    def _maybe_purge(self) -> None:
+        """Fail orphaned tasks and evict expired ones, at most once per purge interval"""
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        self._store.fail_stale(self.stale_seconds, self.STALE_ERROR)
+        self._store.purge_expired(self.ttl_seconds)
+        self._store.purge_cache(self.cache_ttl_seconds)
+
+    @property
+    def heartbeat_interval(self) -> float:
+        """Seconds between touch() calls that keep a running task from going stale"""
+        return self.stale_seconds / 3
 
-    def __init__(self):
-        self._tasks: Dict[str, TaskInfo] = {}
+    def is_stale(self, task: TaskInfo) -> bool:
+        """Whether an unfinished task has not been updated for stale_seconds"""
+        return (
+            task.status in UNFINISHED_STATUSES
+            and task.updated_at < datetime.now() - timedelta(seconds=self.stale_seconds)
+        )
 
-    def create_task(self, metadata: Optional[dict] = None) -> str:
+    def touch(self, task_id: str) -> None:
+        """Refresh a task's updated_at while its job is still waiting or running"""
+        self._store.update(task_id)
+
+    def create_task(
+        self,
+        metadata: Optional[dict] = None,
+        batch_id: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> str:
         """Create a new task and return task ID"""
+        self._maybe_purge()
         task_id = str(uuid.uuid4())
-        self._tasks[task_id] = TaskInfo(task_id, metadata)
+        self._store.create(TaskInfo(task_id, metadata, batch_id=batch_id, filename=filename))
         return task_id
 
+    def create_batch_id(self) -> str:
+        """Create an ID that groups the tasks of one batch upload"""
+        return str(uuid.uuid4())
+
     def get_task(self, task_id: str) -> Optional[TaskInfo]:
         """Get task information by ID"""
-        return self._tasks.get(task_id)
+        return self._store.get(task_id)
+
+    def get_batch_tasks(self, batch_id: str) -> List[TaskInfo]:
+        """Get the tasks of a batch (without parse results) in upload order"""
+        # Batch status polls also fail orphaned documents, so a batch cannot stay "processing"
+        self._maybe_purge()
+        return self._store.get_batch(batch_id)
 
     def update_status(self, task_id: str, status: TaskStatus) -> None:
         """Update task status"""
-        task = self._tasks.get(task_id)
-        if task:
-            task.status = status
-            task.updated_at = datetime.now()
+        self._store.update(task_id, status=status)
 
     def set_result(self, task_id: str, questions: List[QuestionItem]) -> None:
         """Set task result (parsed questions)"""
-        task = self._tasks.get(task_id)
-        if task:
-            task.questions = questions
-            task.status = TaskStatus.COMPLETED
-            task.updated_at = datetime.now()
+        self._store.update(task_id, questions=questions, status=TaskStatus.COMPLETED)
 
     def set_error(self, task_id: str, error: str) -> None:
         """Set task error"""
-        task = self._tasks.get(task_id)
-        if task:
-            task.error = error
-            task.status = TaskStatus.FAILED
-            task.updated_at = datetime.now()
+        self._store.update(task_id, error=error, status=TaskStatus.FAILED)
+
+    def set_progress(self, task_id: str, progress: dict) -> None:
+        """Record the latest parse progress"""
+        self._store.update(task_id, progress=progress)
+
+    def set_stats(self, task_id: str, stats: dict) -> None:
+        """Record the stage timings and counters of a finished parse"""
+        self._store.update(task_id, stats=stats)
+
+    def append_question(self, task_id: str, question: QuestionItem) -> None:
+        """Record a question as soon as the parser produces it"""
+        self._store.append_question(task_id, question)
+
+    def get_streamed_questions(self, task_id: str, offset: int = 0) -> List[QuestionItem]:
+        """Get questions produced so far by a task that is still processing"""
+        return self._store.get_streamed_questions(task_id, offset)
+
+    def set_tokens(self, task_id: str, tokens: Dict) -> None:
+        """Store the encoded token index of a task's parse result"""
+        self._store.set_tokens(task_id, tokens)
+
+    def get_tokens(self, task_id: str) -> Optional[Dict]:
+        """Get the encoded token index of a task"""
+        return self._store.get_tokens(task_id)
+
+    def get_cached_result(self, cache_key: str) -> Optional[List[QuestionItem]]:
+        """Get a previously parsed result for the same document and parser version"""
+        return self._store.get_cached_result(cache_key)
+
+    def get_cached_tokens(self, cache_key: str) -> Optional[Dict]:
+        """Get the token index stored with a cached parse result"""
+        return self._store.get_cached_tokens(cache_key)
+
+    def cache_result(
+        self,
+        cache_key: str,
+        task_id: str,
+        questions: List[QuestionItem],
+        tokens: Optional[Dict] = None,
+    ) -> None:
+        """Remember a task's parse result (and token index) for duplicate uploads"""
+        self._store.set_cached_result(cache_key, task_id, questions, tokens)
+
+
+class AsyncTaskManager:
+    """
+    Async facade over TaskManager for code running on the event loop
+
+    Store calls do blocking I/O (SQLite, possibly waiting up to the busy
+    timeout for another process's write lock) and (de)serialize whole parse
+    results, so each one runs in a worker thread. Helpers that do not touch
+    the store (create_batch_id, is_stale, heartbeat_interval) are used on
+    TaskManager directly.
+    """
+
+    def __init__(self, manager: TaskManager):
+        """
+        Initialize async task manager
+
+        Args:
+            manager: Task manager whose calls are run in worker threads
+        """
+        self._manager = manager
+
+    async def create_task(
+        self,
+        metadata: Optional[dict] = None,
+        batch_id: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> str:
+        """Create a new task and return task ID"""
+        return await run_in_threadpool(self._manager.create_task, metadata, batch_id, filename)
+
+    async def get_task(self, task_id: str) -> Optional[TaskInfo]:
+        """Get task information by ID"""
+        return await run_in_threadpool(self._manager.get_task, task_id)
+
+    async def get_batch_tasks(self, batch_id: str) -> List[TaskInfo]:
+        """Get the tasks of a batch (without parse results) in upload order"""
+        return await run_in_threadpool(self._manager.get_batch_tasks, batch_id)
+
+    async def update_status(self, task_id: str, status: TaskStatus) -> None:
+        """Update task status"""
+        await run_in_threadpool(self._manager.update_status, task_id, status)
+
+    async def set_result(self, task_id: str, questions: List[QuestionItem]) -> None:
+        """Set task result (parsed questions)"""
+        await run_in_threadpool(self._manager.set_result, task_id, questions)
+
+    async def set_error(self, task_id: str, error: str) -> None:
+        """Set task error"""
+        await run_in_threadpool(self._manager.set_error, task_id, error)
+
+    async def set_progress(self, task_id: str, progress: dict) -> None:
+        """Record the latest parse progress"""
+        await run_in_threadpool(self._manager.set_progress, task_id, progress)
+
+    async def set_stats(self, task_id: str, stats: dict) -> None:
+        """Record the stage timings and counters of a finished parse"""
+        await run_in_threadpool(self._manager.set_stats, task_id, stats)
+
+    async def touch(self, task_id: str) -> None:
+        """Refresh a task's updated_at while its job is still waiting or running"""
+        await run_in_threadpool(self._manager.touch, task_id)
+
+    async def append_question(self, task_id: str, question: QuestionItem) -> None:
+        """Record a question as soon as the parser produces it"""
+        await run_in_threadpool(self._manager.append_question, task_id, question)
+
+    async def get_streamed_questions(self, task_id: str, offset: int = 0) -> List[QuestionItem]:
+        """Get questions produced so far by a task that is still processing"""
+        return await run_in_threadpool(self._manager.get_streamed_questions, task_id, offset)
+
+    async def set_tokens(self, task_id: str, tokens: Dict) -> None:
+        """Store the encoded token index of a task's parse result"""
+        await run_in_threadpool(self._manager.set_tokens, task_id, tokens)
+
+    async def get_tokens(self, task_id: str) -> Optional[Dict]:
+        """Get the encoded token index of a task"""
+        return await run_in_threadpool(self._manager.get_tokens, task_id)
+
+    async def get_cached_result(self, cache_key: str) -> Optional[List[QuestionItem]]:
+        """Get a previously parsed result for the same document and parser version"""
+        return await run_in_threadpool(self._manager.get_cached_result, cache_key)
+
+    async def get_cached_tokens(self, cache_key: str) -> Optional[Dict]:
+        """Get the token index stored with a cached parse result"""
+        return await run_in_threadpool(self._manager.get_cached_tokens, cache_key)
+
+    async def cache_result(
+        self,
+        cache_key: str,
+        task_id: str,
+        questions: List[QuestionItem],
+        tokens: Optional[Dict] = None,
+    ) -> None:
+        """Remember a task's parse result (and token index) for duplicate uploads"""
+        await run_in_threadpool(self._manager.cache_result, cache_key, task_id, questions, tokens)
+
+
+def create_task_store() -> TaskStore:
+    """Create the task store backend selected in settings"""
+    settings = get_settings()
+    if settings.task_store_backend == "memory":
+        return MemoryTaskStore()
+    if settings.task_store_backend == "sqlite":
+        return SQLiteTaskStore(settings.task_store_path)
+    raise ValueError(f"Unknown task store backend: {settings.task_store_backend}")
 
 
 # Global task manager instance
-task_manager = TaskManager()
+task_manager = TaskManager(
+    create_task_store(),
+    ttl_seconds=get_settings().task_ttl_seconds,
+    cache_ttl_seconds=get_settings().parse_cache_ttl_seconds,
+    stale_seconds=get_settings().parse_timeout + get_settings().task_stale_margin_seconds,
+)
+
+# Async facade used by the API endpoints and background parse tasks
+async_task_manager = AsyncTaskManager(task_manager)
@@ -0,0 +1,537 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, Optional, List, Tuple
+from app.models.schemas.question import QuestionItem
+
+
+class TaskStatus(str, Enum):
+    """Task processing status"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "success"  # 改为"success"以匹配前端
+    FAILED = "failed"
+
+
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED)
+UNFINISHED_STATUSES = (TaskStatus.PENDING, TaskStatus.PROCESSING)
+
+
+class TaskInfo:
+    """Task information container"""
+    def __init__(
+        self,
+        task_id: str,
+        metadata: Optional[dict] = None,
+        batch_id: Optional[str] = None,
+        filename: Optional[str] = None,
+    ):
+        self.task_id = task_id
+        # Set for documents uploaded together through the batch endpoint
+        self.batch_id = batch_id
+        self.filename = filename
+        self.status = TaskStatus.PENDING
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+        self.metadata = metadata
+        self.questions: Optional[List[QuestionItem]] = None
+        self.error: Optional[str] = None
+        # Latest progress reported by the parser (blocks done/total, images)
+        self.progress: Optional[dict] = None
+        # Stage timings and counters of the finished parse (ParseStats.to_dict)
+        self.stats: Optional[dict] = None
+
+
+class TaskStore(ABC):
+    """Storage backend interface for task information"""
+
+    # Fields that may be changed through update()
+    UPDATABLE_FIELDS = ("status", "questions", "error", "progress", "stats")
+
+    @abstractmethod
+    def create(self, task: TaskInfo) -> None:
+        """Persist a newly created task"""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[TaskInfo]:
+        """Load a task by ID, or None if it does not exist"""
+
+    @abstractmethod
+    def get_batch(self, batch_id: str) -> List[TaskInfo]:
+        """
+        Load the tasks of a batch in upload order
+
+        Parse results are not loaded (questions is None); use get() for those.
+        """
+
+    @abstractmethod
+    def update(self, task_id: str, **fields) -> None:
+        """Update the given fields of a task and refresh updated_at"""
+
+    @abstractmethod
+    def append_question(self, task_id: str, question: QuestionItem) -> None:
+        """Record a question produced while the task is still processing"""
+
+    @abstractmethod
+    def get_streamed_questions(self, task_id: str, offset: int = 0) -> List[QuestionItem]:
+        """Get questions recorded with append_question, starting at offset"""
+
+    @abstractmethod
+    def purge_expired(self, ttl_seconds: int) -> int:
+        """
+        Delete finished tasks not updated within ttl_seconds
+
+        Returns:
+            Number of tasks deleted
+        """
+
+    @abstractmethod
+    def fail_stale(self, stale_seconds: int, error: str) -> int:
+        """
+        Mark unfinished tasks not updated within stale_seconds as failed
+
+        Such tasks were orphaned, e.g. by a restart while they were parsing.
+
+        Returns:
+            Number of tasks marked as failed
+        """
+
+    @abstractmethod
+    def set_tokens(self, task_id: str, tokens: Dict) -> None:
+        """Store the encoded token index of a task's parse result"""
+
+    @abstractmethod
+    def get_tokens(self, task_id: str) -> Optional[Dict]:
+        """Load the encoded token index of a task, or None if there is none"""
+
+    @abstractmethod
+    def get_cached_result(self, cache_key: str) -> Optional[List[QuestionItem]]:
+        """Load a cached parse result, or None on cache miss"""
+
+    @abstractmethod
+    def get_cached_tokens(self, cache_key: str) -> Optional[Dict]:
+        """Load the token index stored with a cached parse result"""
+
+    @abstractmethod
+    def set_cached_result(
+        self,
+        cache_key: str,
+        task_id: str,
+        questions: List[QuestionItem],
+        tokens: Optional[Dict] = None,
+    ) -> None:
+        """Store the parse result (and its token index) produced by task_id under cache_key"""
+
+    @abstractmethod
+    def purge_cache(self, ttl_seconds: int) -> int:
+        """
+        Delete cached parse results older than ttl_seconds
+
+        Returns:
+            Number of cache entries deleted
+        """
+
+    def _check_fields(self, fields: Dict) -> None:
+        unknown = set(fields) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown task fields: {', '.join(sorted(unknown))}")
+
+
+class MemoryTaskStore(TaskStore):
+    """
+    Per-process task store (single worker deployments and tests)
+
+    Iterations work on snapshots, so calls from several threads (see
+    AsyncTaskManager) do not trip over each other.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, TaskInfo] = {}
+        self._streamed: Dict[str, List[QuestionItem]] = {}
+        self._tokens: Dict[str, Dict] = {}
+        # cache_key -> (source task ID, questions, tokens, created_at)
+        self._cache: Dict[str, Tuple[str, List[QuestionItem], Optional[Dict], datetime]] = {}
+
+    def create(self, task: TaskInfo) -> None:
+        self._tasks[task.task_id] = task
+
+    def get(self, task_id: str) -> Optional[TaskInfo]:
+        return self._tasks.get(task_id)
+
+    def get_batch(self, batch_id: str) -> List[TaskInfo]:
+        return [task for task in list(self._tasks.values()) if task.batch_id == batch_id]
+
+    def update(self, task_id: str, **fields) -> None:
+        self._check_fields(fields)
+        task = self._tasks.get(task_id)
+        if task:
+            for name, value in fields.items():
+                setattr(task, name, value)
+            task.updated_at = datetime.now()
+            if "questions" in fields:
+                # The final result supersedes streamed questions
+                self._streamed.pop(task_id, None)
+
+    def append_question(self, task_id: str, question: QuestionItem) -> None:
+        if task_id in self._tasks:
+            self._streamed.setdefault(task_id, []).append(question)
+
+    def get_streamed_questions(self, task_id: str, offset: int = 0) -> List[QuestionItem]:
+        return self._streamed.get(task_id, [])[offset:]
+
+    def purge_expired(self, ttl_seconds: int) -> int:
+        cutoff = datetime.now() - timedelta(seconds=ttl_seconds)
+        expired = [
+            task_id
+            for task_id, task in list(self._tasks.items())
+            if task.status in FINISHED_STATUSES and task.updated_at < cutoff
+        ]
+        for task_id in expired:
+            self._tasks.pop(task_id, None)
+            self._streamed.pop(task_id, None)
+            self._tokens.pop(task_id, None)
+        return len(expired)
+
+    def fail_stale(self, stale_seconds: int, error: str) -> int:
+        cutoff = datetime.now() - timedelta(seconds=stale_seconds)
+        stale = [
+            task_id
+            for task_id, task in list(self._tasks.items())
+            if task.status in UNFINISHED_STATUSES and task.updated_at < cutoff
+        ]
+        for task_id in stale:
+            self.update(task_id, status=TaskStatus.FAILED, error=error)
+        return len(stale)
+
+    def set_tokens(self, task_id: str, tokens: Dict) -> None:
+        if task_id in self._tasks:
+            self._tokens[task_id] = tokens
+
+    def get_tokens(self, task_id: str) -> Optional[Dict]:
+        return self._tokens.get(task_id)
+
+    def get_cached_result(self, cache_key: str) -> Optional[List[QuestionItem]]:
+        entry = self._cache.get(cache_key)
+        return entry[1] if entry else None
+
+    def get_cached_tokens(self, cache_key: str) -> Optional[Dict]:
+        entry = self._cache.get(cache_key)
+        return entry[2] if entry else None
+
+    def set_cached_result(
+        self,
+        cache_key: str,
+        task_id: str,
+        questions: List[QuestionItem],
+        tokens: Optional[Dict] = None,
+    ) -> None:
+        self._cache[cache_key] = (task_id, questions, tokens, datetime.now())
+
+    def purge_cache(self, ttl_seconds: int) -> int:
+        cutoff = datetime.now() - timedelta(seconds=ttl_seconds)
+        expired = [key for key, entry in list(self._cache.items()) if entry[3] < cutoff]
+        for key in expired:
+            self._cache.pop(key, None)
+        return len(expired)
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    SQLite-backed task store shared by all worker processes on one host
+
+    Runs in WAL mode so status polling from one worker does not block
+    result writes from another. Parse results and token indexes are stored as
+    compressed JSON blobs.
+    """
+
+    # Task data is transient, so a schema change simply rebuilds the tables
+    SCHEMA_VERSION = 5
+    TABLES = ("tasks", "task_questions", "parse_cache")
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            metadata TEXT,
+            result BLOB,
+            error TEXT,
+            progress TEXT,
+            stats TEXT,
+            tokens BLOB,
+            batch_id TEXT,
+            filename TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS task_questions (
+            task_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (task_id, seq)
+        );
+        CREATE INDEX IF NOT EXISTS ix_tasks_status_updated_at
+            ON tasks (status, updated_at);
+        CREATE INDEX IF NOT EXISTS ix_tasks_batch_id
+            ON tasks (batch_id, created_at);
+        CREATE TABLE IF NOT EXISTS parse_cache (
+            cache_key TEXT PRIMARY KEY,
+            task_id TEXT NOT NULL,
+            result BLOB NOT NULL,
+            tokens BLOB,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 30.0):
+        """
+        Initialize SQLite task store
+
+        Args:
+            path: Database file path
+            busy_timeout: Seconds to wait for a write lock held by another process
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._ensure_schema(conn)
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        """Create tables, rebuilding them if they were created by an older schema"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                for table in self.TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in self.SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection for the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _dump_questions(questions: Optional[List[QuestionItem]]) -> Optional[bytes]:
+        if questions is None:
+            return None
+        data = json.dumps([q.model_dump() for q in questions], ensure_ascii=False)
+        return zlib.compress(data.encode("utf-8"))
+
+    @staticmethod
+    def _load_questions(blob: Optional[bytes]) -> Optional[List[QuestionItem]]:
+        if blob is None:
+            return None
+        data = json.loads(zlib.decompress(blob).decode("utf-8"))
+        return [QuestionItem.model_validate(q) for q in data]
+
+    @staticmethod
+    def _dump_json(value: Optional[Dict]) -> Optional[bytes]:
+        if value is None:
+            return None
+        return zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    @staticmethod
+    def _load_json(blob: Optional[bytes]) -> Optional[Dict]:
+        if blob is None:
+            return None
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def create(self, task: TaskInfo) -> None:
+        self._connect().execute(
+            "INSERT INTO tasks (task_id, status, metadata, result, error, batch_id, filename, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                task.task_id,
+                task.status.value,
+                json.dumps(task.metadata, ensure_ascii=False) if task.metadata is not None else None,
+                self._dump_questions(task.questions),
+                task.error,
+                task.batch_id,
+                task.filename,
+                task.created_at.timestamp(),
+                task.updated_at.timestamp(),
+            ),
+        )
+
+    def get(self, task_id: str) -> Optional[TaskInfo]:
+        row = self._connect().execute(
+            "SELECT task_id, status, metadata, error, progress, stats, batch_id, filename, "
+            "created_at, updated_at, result FROM tasks WHERE task_id = ?",
+            (task_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        task = self._row_to_task(row[:-1])
+        task.questions = self._load_questions(row[-1])
+        return task
+
+    def get_batch(self, batch_id: str) -> List[TaskInfo]:
+        rows = self._connect().execute(
+            "SELECT task_id, status, metadata, error, progress, stats, batch_id, filename, "
+            "created_at, updated_at FROM tasks WHERE batch_id = ? ORDER BY created_at, rowid",
+            (batch_id,),
+        ).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    @staticmethod
+    def _row_to_task(row: Tuple) -> TaskInfo:
+        """Build a TaskInfo (without questions) from a tasks row"""
+        (task_id, status, metadata, error, progress, stats, batch_id, filename,
+         created_at, updated_at) = row
+        task = TaskInfo(
+            task_id,
+            json.loads(metadata) if metadata is not None else None,
+            batch_id=batch_id,
+            filename=filename,
+        )
+        task.status = TaskStatus(status)
+        task.error = error
+        task.progress = json.loads(progress) if progress is not None else None
+        task.stats = json.loads(stats) if stats is not None else None
+        task.created_at = datetime.fromtimestamp(created_at)
+        task.updated_at = datetime.fromtimestamp(updated_at)
+        return task
+
+    def update(self, task_id: str, **fields) -> None:
+        self._check_fields(fields)
+
+        columns = []
+        values = []
+        for name, value in fields.items():
+            if name == "status":
+                columns.append("status = ?")
+                values.append(TaskStatus(value).value)
+            elif name == "questions":
+                columns.append("result = ?")
+                values.append(self._dump_questions(value))
+            elif name in ("progress", "stats"):
+                columns.append(f"{name} = ?")
+                values.append(json.dumps(value) if value is not None else None)
+            else:
+                columns.append(f"{name} = ?")
+                values.append(value)
+
+        columns.append("updated_at = ?")
+        values.append(datetime.now().timestamp())
+        values.append(task_id)
+
+        conn = self._connect()
+        conn.execute(f"UPDATE tasks SET {', '.join(columns)} WHERE task_id = ?", values)
+        if "questions" in fields:
+            # The final result supersedes streamed questions
+            conn.execute("DELETE FROM task_questions WHERE task_id = ?", (task_id,))
+
+    def append_question(self, task_id: str, question: QuestionItem) -> None:
+        self._connect().execute(
+            "INSERT INTO task_questions (task_id, seq, data) "
+            "SELECT ?, COUNT(*), ? FROM task_questions WHERE task_id = ?",
+            (task_id, question.model_dump_json(), task_id),
+        )
+
+    def get_streamed_questions(self, task_id: str, offset: int = 0) -> List[QuestionItem]:
+        rows = self._connect().execute(
+            "SELECT data FROM task_questions WHERE task_id = ? AND seq >= ? ORDER BY seq",
+            (task_id, offset),
+        ).fetchall()
+        return [QuestionItem.model_validate_json(row[0]) for row in rows]
+
+    def purge_expired(self, ttl_seconds: int) -> int:
+        cutoff = (datetime.now() - timedelta(seconds=ttl_seconds)).timestamp()
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        conn = self._connect()
+        cursor = conn.execute(
+            f"DELETE FROM tasks WHERE status IN ({placeholders}) AND updated_at < ?",
+            (*[status.value for status in FINISHED_STATUSES], cutoff),
+        )
+        conn.execute(
+            "DELETE FROM task_questions WHERE task_id NOT IN (SELECT task_id FROM tasks)"
+        )
+        return cursor.rowcount
+
+    def fail_stale(self, stale_seconds: int, error: str) -> int:
+        now = datetime.now().timestamp()
+        placeholders = ", ".join("?" for _ in UNFINISHED_STATUSES)
+        cursor = self._connect().execute(
+            f"UPDATE tasks SET status = ?, error = ?, updated_at = ? "
+            f"WHERE status IN ({placeholders}) AND updated_at < ?",
+            (
+                TaskStatus.FAILED.value, error, now,
+                *[status.value for status in UNFINISHED_STATUSES], now - stale_seconds,
+            ),
+        )
+        return cursor.rowcount
+
+    def set_tokens(self, task_id: str, tokens: Dict) -> None:
+        self._connect().execute(
+            "UPDATE tasks SET tokens = ? WHERE task_id = ?",
+            (self._dump_json(tokens), task_id),
+        )
+
+    def get_tokens(self, task_id: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            "SELECT tokens FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return self._load_json(row[0]) if row else None
+
+    def get_cached_result(self, cache_key: str) -> Optional[List[QuestionItem]]:
+        row = self._connect().execute(
+            "SELECT result FROM parse_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        return self._load_questions(row[0]) if row else None
+
+    def get_cached_tokens(self, cache_key: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            "SELECT tokens FROM parse_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        return self._load_json(row[0]) if row else None
+
+    def set_cached_result(
+        self,
+        cache_key: str,
+        task_id: str,
+        questions: List[QuestionItem],
+        tokens: Optional[Dict] = None,
+    ) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO parse_cache (cache_key, task_id, result, tokens, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                cache_key,
+                task_id,
+                self._dump_questions(questions),
+                self._dump_json(tokens),
+                datetime.now().timestamp(),
+            ),
+        )
+
+    def purge_cache(self, ttl_seconds: int) -> int:
+        cutoff = (datetime.now() - timedelta(seconds=ttl_seconds)).timestamp()
+        cursor = self._connect().execute(
+            "DELETE FROM parse_cache WHERE created_at < ?", (cutoff,)
+        )
+        return cursor.rowcount
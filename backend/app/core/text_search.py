@@ -0,0 +1,140 @@
+import re
+import unicodedata
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional
+
+# PostgreSQL text search configuration for the search terms. "simple" only
+# lowercases, so the bigrams built here are indexed exactly as they are.
+SEARCH_CONFIG = "simple"
+
+# Elements that separate words when HTML is flattened to text
+BLOCK_TAGS = {"p", "br", "div", "li", "tr", "td", "th", "table", "img"}
+
+# Elements whose text is not shown (formula source annotations)
+SKIPPED_TAGS = {"annotation", "annotation-xml", "script", "style"}
+
+# Runs of CJK ideographs are split into character bigrams (see tokenize);
+# letters and digits form words. Everything else separates terms.
+TERM_PATTERN = re.compile(r"([㐀-䶿一-鿿豈-﫿]+)|([0-9a-z]+)")
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the visible text of an HTML fragment"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        # MathML may come with a namespace prefix (mml:math)
+        tag = tag.rsplit(":", 1)[-1]
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag.rsplit(":", 1)[-1] in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        tag = tag.rsplit(":", 1)[-1]
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: Optional[str]) -> str:
+    """
+    Flatten question HTML to plain text
+
+    Tags are dropped; MathML keeps the text of its token elements, so a
+    formula like H<sub>2</sub>O or <mi>H</mi><mn>2</mn><mi>O</mi> reads "H2O".
+
+    Args:
+        html: HTML fragment (stem, option, answer or analysis)
+
+    Returns:
+        Plain text with whitespace collapsed
+    """
+    if not html:
+        return ""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return " ".join("".join(extractor.parts).split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into search terms
+
+    Text is NFKC-normalized (full-width letters and digits become ASCII) and
+    lowercased. Each character of a Chinese run starts a term: the bigram
+    with the next character, or the character alone at the end of the run
+    ("化学反应" -> 化学, 学反, 反应, 应), so every character is the prefix of
+    a term at its own position. Letter/digit runs stay whole words.
+
+    Args:
+        text: Plain text
+
+    Returns:
+        Terms in text order
+    """
+    terms: List[str] = []
+    for cjk, word in TERM_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if word:
+            terms.append(word)
+        else:
+            terms.extend(cjk[i:i + 2] for i in range(len(cjk)))
+    return terms
+
+
+def search_terms(html_parts: Iterable[Optional[str]]) -> str:
+    """
+    Build the indexed search terms for some question content
+
+    Args:
+        html_parts: HTML fragments (e.g. the stem and each option)
+
+    Returns:
+        Space-separated terms, passed to to_tsvector in the database
+    """
+    terms: List[str] = []
+    for html in html_parts:
+        terms.extend(tokenize(html_to_text(html)))
+    return " ".join(terms)
+
+
+def build_tsquery(query: str) -> Optional[str]:
+    """
+    Build a to_tsquery expression for a search box query
+
+    Each whitespace-separated part of the query must match as a phrase:
+    its terms have to be adjacent (<->) in the indexed terms. A single
+    Chinese character (the end of a run in the query) matches as a prefix,
+    since at that position the text may go on with more characters.
+
+    Args:
+        query: User query text
+
+    Returns:
+        tsquery text, or None if the query has no searchable terms
+    """
+    phrases = []
+    for part in unicodedata.normalize("NFKC", query).split():
+        terms = [
+            f"'{term}':*" if len(term) == 1 and not term.isascii() else f"'{term}'"
+            for term in tokenize(part)
+        ]
+        if len(terms) == 1:
+            phrases.append(terms[0])
+        elif terms:
+            phrases.append("(" + " <-> ".join(terms) + ")")
+    return " & ".join(phrases) if phrases else None
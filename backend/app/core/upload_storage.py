@@ -0,0 +1,131 @@
+import hashlib
+import os
+import uuid
+import zipfile
+from typing import BinaryIO, Iterator, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload or archive member exceeds its size limit"""
+
+
+# Flag bit set in ZIP entries whose names are UTF-8 encoded
+ZIP_UTF8_FLAG = 0x800
+
+
+async def save_upload(
+    upload: UploadFile, file_path: str, max_size: int, chunk_size: int
+) -> Tuple[str, int]:
+    """
+    Copy an uploaded file to disk in a worker thread, hashing it on the way
+
+    The multipart parser has already spooled the upload to a temporary file
+    by the time it gets here; the request body as a whole is limited while
+    it arrives by BodySizeLimitMiddleware. This copy enforces the exact
+    per-file limit.
+
+    Args:
+        upload: Uploaded file
+        file_path: Destination path
+        max_size: Maximum number of bytes accepted
+        chunk_size: Bytes read per chunk
+
+    Returns:
+        (SHA256 hex digest, size in bytes)
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_size (nothing is left on disk)
+    """
+    await upload.seek(0)
+    return await run_in_threadpool(copy_stream, upload.file, file_path, max_size, chunk_size)
+
+
+def copy_stream(
+    source: BinaryIO, file_path: str, max_size: int, chunk_size: int
+) -> Tuple[str, int]:
+    """
+    Copy a file-like object to disk, hashing it on the way
+
+    Args:
+        source: Readable binary stream
+        file_path: Destination path
+        max_size: Maximum number of bytes accepted
+        chunk_size: Bytes read per chunk
+
+    Returns:
+        (SHA256 hex digest, size in bytes)
+
+    Raises:
+        UploadTooLargeError: If the stream exceeds max_size (nothing is left on disk)
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(file_path, "wb") as f:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"File exceeds {max_size} bytes")
+                sha256.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        _remove_quietly(file_path)
+        raise
+    return sha256.hexdigest(), size
+
+
+def temp_upload_path(directory: str) -> str:
+    """
+    Get a unique path for an upload in progress
+
+    The file lives in the destination directory so it can be renamed into
+    place atomically; the .part suffix keeps it out of *.docx globs.
+    """
+    return os.path.join(directory, f".{uuid.uuid4().hex}.part")
+
+
+def zip_member_name(info: zipfile.ZipInfo) -> str:
+    """
+    Get the file name of a ZIP entry
+
+    Archives made by Windows tools store Chinese names in GBK without the
+    UTF-8 flag, which zipfile decodes as cp437; those are re-decoded.
+    """
+    name = info.filename
+    if not info.flag_bits & ZIP_UTF8_FLAG:
+        try:
+            name = name.encode("cp437").decode("gbk")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return os.path.basename(name.replace("\\", "/"))
+
+
+def iter_zip_documents(archive: zipfile.ZipFile) -> Iterator[Tuple[str, zipfile.ZipInfo]]:
+    """
+    Iterate over the .docx entries of a ZIP archive
+
+    Directories, macOS resource forks and Word lock files (~$name.docx) are skipped.
+
+    Yields:
+        (file name, ZIP entry) pairs in archive order
+    """
+    for info in archive.infolist():
+        if info.is_dir() or info.filename.startswith("__MACOSX/"):
+            continue
+        name = zip_member_name(info)
+        if not name.lower().endswith(".docx") or name.startswith(("~$", ".")):
+            continue
+        yield name, info
+
+
+def _remove_quietly(file_path: str) -> None:
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
@@ -1,20 +1,76 @@
+from typing import Any, AsyncIterator, Dict
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
 
 settings = get_settings()
 
+# Async drivers for the synchronous database URL schemes
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Async driver URL for a synchronous database URL (postgresql -> asyncpg, sqlite -> aiosqlite)"""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """Connection pool options from Settings for an engine URL"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        # SQLite has no "tiku" schema; tables live in the main database
+        options: Dict[str, Any] = {"execution_options": {"schema_translate_map": {"tiku": None}}}
+        if url.database in (None, "", ":memory:"):
+            # Pool size options do not apply to the single shared in-memory connection
+            return options
+    else:
+        options = {}
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    return options
+
+
 # Create database engine
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    echo=False
+    echo=False,
+    **engine_options(settings.database_url)
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for async endpoints, so database I/O does not block the event loop
+async_database_url = settings.async_database_url or get_async_database_url(settings.database_url)
+async_engine = create_async_engine(
+    async_database_url,
+    pool_pre_ping=True,
+    echo=False,
+    **engine_options(async_database_url)
+)
+
+# asyncpg reports a failed connection as a plain OSError, not a SQLAlchemy error
+ASYNC_DATABASE_ERRORS = (SQLAlchemyError, OSError)
+
+# Objects stay usable after commit, since async code cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -26,3 +82,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
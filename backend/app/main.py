@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import paper
+from app.api.v1 import paper, question
+from app.core import metrics
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.parse_executor import parse_executor
+from app.core.parser.structure_grammar import get_grammar_registry
+from app.config import get_settings
+from app.database import async_engine
 
 app = FastAPI(
     title="Word Paper Parsing API",
@@ -20,8 +26,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cut off oversized uploads while they arrive, before they are spooled to disk
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/paper/upload": get_settings().max_file_size,
+        "/api/paper/upload/batch": get_settings().batch_max_size,
+    },
+)
+
 # Include API routers
 app.include_router(paper.router, prefix="/api/paper", tags=["paper"])
+app.include_router(question.router, prefix="/api/question", tags=["question"])
+
+
+@app.on_event("startup")
+def load_structure_grammar():
+    # Compile the structure rules up front so a broken grammar file fails at boot
+    get_grammar_registry().load()
+
+
+@app.on_event("shutdown")
+def shutdown_parse_executor():
+    parse_executor.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_database_connections():
+    await async_engine.dispose()
 
 
 @app.get("/")
@@ -32,3 +64,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Parse job, stage timing and item counters in Prometheus text format"""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -4,6 +4,7 @@ from app.models.database.paper import Paper, PaperStatus
 from app.models.database.question import Question
 from app.models.database.question_content import QuestionContent, ContentType
 from app.models.database.question_group import QuestionGroup
+from app.models.database.question_signature import QuestionSignature
 from app.models.database.image import Image
 
 __all__ = [
@@ -13,5 +14,6 @@ __all__ = [
     "QuestionContent",
     "ContentType",
     "QuestionGroup",
+    "QuestionSignature",
     "Image",
 ]
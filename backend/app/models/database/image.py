@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger, UniqueConstraint
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -6,16 +6,21 @@ from app.database import Base
 class Image(Base):
     """Image table - stores extracted images from Word documents"""
     __tablename__ = "images"
-    __table_args__ = {'schema': 'tiku'}
+    __table_args__ = (
+        UniqueConstraint('task_id', 'image_id', name='uq_images_task_id_image_id'),
+        {'schema': 'tiku'},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    task_id = Column(String(36), ForeignKey("papers.task_id", ondelete="CASCADE"), nullable=False, index=True)
+    task_id = Column(String(36), ForeignKey("tiku.papers.task_id", ondelete="CASCADE"), nullable=False, index=True)
+    image_id = Column(Integer, nullable=False)  # Image number within the task, as used in image URLs
 
     # File information
     filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
     content_type = Column(String(50), nullable=False)  # e.g., "image/png", "image/jpeg"
     size = Column(BigInteger, nullable=False)  # File size in bytes
+    sha256 = Column(String(64), nullable=False)  # Content hash, also used as the HTTP ETag
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
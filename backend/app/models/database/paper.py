@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, JSON, DateTime, Enum
+from sqlalchemy import Column, String, JSON, DateTime, Enum, Index, text
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
@@ -15,7 +15,11 @@ class PaperStatus(str, enum.Enum):
 class Paper(Base):
     """Paper document table"""
     __tablename__ = "papers"
-    __table_args__ = {'schema': 'tiku'}
+    __table_args__ = (
+        # Question bank subject filter
+        Index('ix_papers_subject', text("(paper_metadata ->> 'subject')")),
+        {'schema': 'tiku'},
+    )
 
     task_id = Column(String(36), primary_key=True, index=True)
     file_hash = Column(String(64), nullable=False, index=True)
@@ -1,16 +1,23 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, ARRAY, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index, Computed
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.database import Base
 
 
 class Question(Base):
     """Question table - structured question data"""
     __tablename__ = "questions"
-    __table_args__ = {'schema': 'tiku'}
+    __table_args__ = (
+        # Question bank filters: type/difficulty with keyset order on id, knowledge point containment
+        Index('ix_questions_type_difficulty_id', 'type', 'difficulty', 'id'),
+        Index('ix_questions_knowledge_points', 'knowledge_points', postgresql_using='gin'),
+        Index('ix_questions_search_vector', 'search_vector', postgresql_using='gin'),
+        {'schema': 'tiku'},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    task_id = Column(String(36), ForeignKey("papers.task_id", ondelete="CASCADE"), nullable=False, index=True)
+    task_id = Column(String(36), ForeignKey("tiku.papers.task_id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Question identification
     number = Column(String(20), nullable=False)  # e.g., "1", "2", "(1)", "(2)"
@@ -24,12 +31,29 @@ class Question(Base):
     answer_raw = Column(Text, nullable=True)
 
     # Material question grouping
-    group_id = Column(Integer, ForeignKey("question_groups.id", ondelete="SET NULL"), nullable=True, index=True)
+    group_id = Column(Integer, ForeignKey("tiku.question_groups.id", ondelete="SET NULL"), nullable=True, index=True)
     parent_number = Column(String(20), nullable=True)  # Parent question number for sub-questions
 
+    # Most similar question already in the bank when this one was saved (near-duplicate)
+    duplicate_of = Column(Integer, ForeignKey("tiku.questions.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    # Full-text search terms (character bigrams, see app.core.text_search), built at
+    # save time. Deferred: only the search query reads them, and only in SQL.
+    stem_terms = deferred(Column(Text, nullable=True))  # Stem and options
+    analysis_terms = deferred(Column(Text, nullable=True))  # Answer and analysis
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(stem_terms, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(analysis_terms, '')), 'B')",
+            persisted=True,
+        ),
+    ))
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
     group = relationship("QuestionGroup", back_populates="questions")
+    contents = relationship("QuestionContent", order_by="QuestionContent.id")
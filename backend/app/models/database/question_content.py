@@ -18,13 +18,14 @@ class QuestionContent(Base):
     __table_args__ = {'schema': 'tiku'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
+    question_id = Column(Integer, ForeignKey("tiku.questions.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Content type (stem, answer, analysis, options)
     content_type = Column(Enum(ContentType), nullable=False)
 
-    # Token stream (JSON array of token objects)
-    # Format: [{"t":"text","v":"content"}, {"t":"math","omml":"...","mathml":"..."}, {"t":"img","ref":123}]
+    # Token stream in the compact encoding of app.core.parser.token_codec:
+    # {"v":1, "k":[["x","text"], ["m","<formula hash>"], ["i",123]], "m":{"<formula hash>":["<omml>","<mathml>"]}}
+    # Empty array when no parser tokens are available (e.g. content edited during proofreading)
     tokens = Column(JSON, nullable=False)
 
     # Rendered HTML (for frontend display)
@@ -10,7 +10,7 @@ class QuestionGroup(Base):
     __table_args__ = {'schema': 'tiku'}
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    task_id = Column(String(36), ForeignKey("papers.task_id", ondelete="CASCADE"), nullable=False, index=True)
+    task_id = Column(String(36), ForeignKey("tiku.papers.task_id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Group identification
     number = Column(String(20), nullable=False)  # e.g., "1", "2"
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, BigInteger, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class QuestionSignature(Base):
+    """Question signature table - MinHash signatures for near-duplicate detection"""
+    __tablename__ = "question_signatures"
+    __table_args__ = (
+        # Candidate lookup: lsh_bands && ARRAY[...]
+        Index('ix_question_signatures_lsh_bands', 'lsh_bands', postgresql_using='gin'),
+        {'schema': 'tiku'},
+    )
+
+    question_id = Column(Integer, ForeignKey("tiku.questions.id", ondelete="CASCADE"), primary_key=True)
+
+    # MinHash over normalized material/stem/option text (see app.core.dedup)
+    minhash = Column(ARRAY(BigInteger), nullable=False)
+
+    # One key per LSH band; questions sharing any key are duplicate candidates
+    lsh_bands = Column(ARRAY(BigInteger), nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
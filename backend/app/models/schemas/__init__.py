@@ -1,12 +1,26 @@
 """Pydantic schemas package"""
 
 from app.models.schemas.response import ApiResponse
-from app.models.schemas.question import QuestionItem
+from app.models.schemas.question import (
+    QuestionItem,
+    DuplicateMatch,
+    QuestionBankItem,
+    QuestionPage,
+    QuestionSearchHit,
+    BulkTagRequest,
+    BulkTagResult,
+)
 from app.models.schemas.paper import PaperMetadata, ParseResult, UploadResponse, SubmitRequest
 
 __all__ = [
     "ApiResponse",
     "QuestionItem",
+    "DuplicateMatch",
+    "QuestionBankItem",
+    "QuestionPage",
+    "QuestionSearchHit",
+    "BulkTagRequest",
+    "BulkTagResult",
     "PaperMetadata",
     "ParseResult",
     "UploadResponse",
@@ -11,6 +11,7 @@ class PaperMetadata(BaseModel):
     region: Optional[str] = Field(None, description="Region (e.g., '全国卷', '北京卷')")
     paperType: Optional[str] = Field(None, description="Paper type (e.g., '高考真题', '模拟试卷')", alias="paperType")
     mode: Literal['paper', 'question'] = Field(..., description="Entry mode: 'paper' (试卷录入) or 'question' (试题录入)")
+    ruleSet: Optional[str] = Field(None, description="Structure grammar rule set for the paper layout (defaults by paperType)", alias="ruleSet")
 
     class Config:
         populate_by_name = True
@@ -40,6 +41,8 @@ class ParseResult(BaseModel):
     status: str = Field(..., description="Processing status: processing, success, failed")
     metadata: Optional[PaperMetadata] = Field(None, description="Paper metadata")
     questions: List[QuestionItem] = Field(default_factory=list, description="Parsed questions")
+    progress: Optional[dict] = Field(None, description="Parse progress: blocksDone, blocksTotal, imagesExtracted")
+    stats: Optional[dict] = Field(None, description="Parse instrumentation: stagesMs, counts, questionsMs (once parsed)")
     error: Optional[str] = Field(None, description="Error message (only when status=failed)")
 
     class Config:
@@ -53,6 +56,45 @@ class ParseResult(BaseModel):
         }
 
 
+class BatchDocument(BaseModel):
+    """One document of a batch upload and its parse status"""
+    taskId: str = Field(..., description="Task ID of this document", alias="taskId")
+    filename: str = Field(..., description="Document file name")
+    status: str = Field(..., description="Processing status: pending, processing, success, failed")
+    progress: Optional[dict] = Field(None, description="Parse progress: blocksDone, blocksTotal, imagesExtracted")
+    error: Optional[str] = Field(None, description="Error message (only when status=failed)")
+
+    class Config:
+        populate_by_name = True
+
+
+class BatchStatus(BaseModel):
+    """Batch status schema - returned by POST /api/paper/upload/batch and GET /api/paper/batch/:batchId"""
+    batchId: str = Field(..., description="Batch ID", alias="batchId")
+    status: str = Field(..., description="processing until every document has finished, then success")
+    total: int = Field(..., description="Number of documents in the batch")
+    completed: int = Field(0, description="Documents parsed successfully")
+    failed: int = Field(0, description="Documents that failed to parse")
+    documents: List[BatchDocument] = Field(default_factory=list, description="Per-document status, in upload order")
+
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "batchId": "9b2f4c1e-8a3d-4f0e-b6a7-2d1c5e8f9a0b",
+                "status": "processing",
+                "total": 2,
+                "completed": 1,
+                "failed": 0,
+                "documents": [
+                    {"taskId": "550e8400-e29b-41d4-a716-446655440000", "filename": "2024年全国甲卷.docx", "status": "success"},
+                    {"taskId": "6fa459ea-ee8a-3ca4-894e-db77e160355e", "filename": "2024年全国乙卷.docx", "status": "processing",
+                     "progress": {"blocksDone": 120, "blocksTotal": 400, "imagesExtracted": 3}}
+                ]
+            }
+        }
+
+
 class SubmitRequest(BaseModel):
     """Request for submitting proofread questions"""
     taskId: str = Field(..., description="Task ID", alias="taskId")
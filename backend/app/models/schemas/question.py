@@ -1,5 +1,16 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Dict, Optional, List, Literal
+
+
+class DuplicateMatch(BaseModel):
+    """A saved question that is a near-duplicate of another question"""
+    questionId: int = Field(..., description="ID of the saved question", alias="questionId")
+    taskId: str = Field(..., description="Task ID of the saved question's paper", alias="taskId")
+    number: str = Field(..., description="Question number in that paper")
+    similarity: float = Field(..., description="Estimated Jaccard similarity of the normalized text (0-1)")
+
+    class Config:
+        populate_by_name = True
 
 
 class QuestionItem(BaseModel):
@@ -15,6 +26,11 @@ class QuestionItem(BaseModel):
     difficulty: Optional[int] = Field(None, ge=1, le=5, description="Difficulty level (1-5)")
     parentId: Optional[str] = Field(None, description="Parent question ID for sub-questions", alias="parentId")
     children: Optional[List['QuestionItem']] = Field(None, description="Sub-questions for material questions")
+    duplicates: Optional[List[DuplicateMatch]] = Field(None, description="Near-duplicate questions already in the bank (set on parse results)")
+
+    # Token stream the stem HTML was rendered from. Not part of the API schema;
+    # it travels with the object from the parse worker to the task store.
+    _stem_tokens: Optional[List[Dict[str, Any]]] = PrivateAttr(default=None)
 
     class Config:
         populate_by_name = True
@@ -35,3 +51,74 @@ class QuestionItem(BaseModel):
 
 # Enable forward references for recursive model
 QuestionItem.model_rebuild()
+
+
+TagStatus = Literal['complete', 'partial', 'untagged']
+
+
+class QuestionBankItem(BaseModel):
+    """Saved question schema - returned by GET /api/question"""
+    id: int = Field(..., description="Question ID")
+    taskId: str = Field(..., description="Task ID of the source paper", alias="taskId")
+    paperName: Optional[str] = Field(None, description="Source paper name", alias="paperName")
+    subject: Optional[str] = Field(None, description="Subject of the source paper")
+    number: str = Field(..., description="Question number")
+    type: str = Field(..., description="Question type")
+    stem: str = Field("", description="Question stem in HTML format")
+    options: Optional[List[str]] = Field(None, description="Answer options for multiple choice questions")
+    answer: Optional[str] = Field(None, description="Answer in HTML format")
+    analysis: Optional[str] = Field(None, description="Solution analysis in HTML format")
+    material: Optional[str] = Field(None, description="Shared material for sub-questions of a material question")
+    knowledgePoints: List[str] = Field(default_factory=list, description="Knowledge point IDs", alias="knowledgePoints")
+    difficulty: Optional[int] = Field(None, description="Difficulty level (1-5)")
+    groupId: Optional[int] = Field(None, description="Question group ID for sub-questions", alias="groupId")
+    parentNumber: Optional[str] = Field(None, description="Parent question number for sub-questions", alias="parentNumber")
+    duplicateOf: Optional[int] = Field(None, description="Most similar question already in the bank when this one was saved", alias="duplicateOf")
+    tagStatus: TagStatus = Field(..., description="complete (all tags set), partial or untagged", alias="tagStatus")
+
+    class Config:
+        populate_by_name = True
+
+
+class QuestionPage(BaseModel):
+    """One page of the question bank (keyset pagination)"""
+    items: List[QuestionBankItem] = Field(default_factory=list, description="Questions in ID order")
+    nextCursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page", alias="nextCursor")
+
+    class Config:
+        populate_by_name = True
+
+
+class QuestionSearchHit(QuestionBankItem):
+    """Full-text search result - returned by GET /api/question/search"""
+    score: float = Field(..., description="Relevance score (higher is better)")
+
+
+class BulkTagRequest(BaseModel):
+    """Request body for POST /api/question/tags"""
+    questionIds: List[int] = Field(..., min_length=1, description="Question IDs to tag", alias="questionIds")
+    difficulty: Optional[int] = Field(None, ge=1, le=5, description="Set difficulty (1-5)")
+    type: Optional[str] = Field(None, min_length=1, description="Set question type")
+    addKnowledgePoints: Optional[List[str]] = Field(None, description="Knowledge point IDs to add", alias="addKnowledgePoints")
+    removeKnowledgePoints: Optional[List[str]] = Field(None, description="Knowledge point IDs to remove", alias="removeKnowledgePoints")
+
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "questionIds": [101, 102, 103],
+                "difficulty": 3,
+                "addKnowledgePoints": ["化学平衡"],
+                "removeKnowledgePoints": ["化学反应"]
+            }
+        }
+
+
+class BulkTagResult(BaseModel):
+    """Result of a bulk tag request"""
+    requested: int = Field(..., description="Distinct question IDs in the request")
+    updated: int = Field(..., description="Questions updated")
+    notFound: int = Field(..., description="Requested IDs that matched no question", alias="notFound")
+
+    class Config:
+        populate_by_name = True
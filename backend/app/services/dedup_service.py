@@ -0,0 +1,201 @@
+from sqlalchemy import BigInteger, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from typing import Dict, Hashable, List, Optional, Tuple
+from app.core.dedup import LshIndex, estimate_similarity, lsh_bands, minhash_signature, normalize_text
+from app.models.database.question import Question
+from app.models.database.question_signature import QuestionSignature
+from app.models.schemas.question import DuplicateMatch, QuestionItem
+
+
+def question_signature(question_item: QuestionItem, material: Optional[str] = None) -> Optional[List[int]]:
+    """
+    MinHash signature of a question
+
+    Args:
+        question_item: Question (a leaf question, not a material question)
+        material: Material HTML shared by a sub-question's group, so that
+            short sub-questions of different materials do not match
+
+    Returns:
+        Signature, or None if the question has too little text
+    """
+    parts = [material, question_item.stem] + list(question_item.options or [])
+    return minhash_signature(normalize_text(parts))
+
+
+class DedupService:
+    """Service for near-duplicate question detection (MinHash + LSH)"""
+
+    def __init__(self, db: Session):
+        """
+        Initialize dedup service
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    def find_bank_duplicates(
+        self,
+        signatures: Dict[Hashable, List[int]],
+        threshold: float,
+        exclude_task_id: Optional[str] = None
+    ) -> Dict[Hashable, List[DuplicateMatch]]:
+        """
+        Find saved questions similar to the given signatures
+
+        Candidates come from one query on the GIN-indexed LSH band keys
+        (lsh_bands && ARRAY[...]), so only questions sharing a band are
+        read; their estimated similarity is then checked here.
+
+        Args:
+            signatures: Signatures to look up, by caller key
+            threshold: Minimum estimated Jaccard similarity
+            exclude_task_id: Skip questions of this task (e.g. an earlier submit of the same paper)
+
+        Returns:
+            Matches by caller key, most similar first (keys without matches are omitted)
+        """
+        bands_by_key = {key: lsh_bands(signature) for key, signature in signatures.items()}
+        all_bands = sorted({band for bands in bands_by_key.values() for band in bands})
+        if not all_bands:
+            return {}
+
+        statement = (
+            select(
+                QuestionSignature.question_id,
+                QuestionSignature.minhash,
+                QuestionSignature.lsh_bands,
+                Question.task_id,
+                Question.number,
+            )
+            .join(Question, Question.id == QuestionSignature.question_id)
+            .where(QuestionSignature.lsh_bands.overlap(literal(all_bands, ARRAY(BigInteger))))
+        )
+        if exclude_task_id:
+            statement = statement.where(Question.task_id != exclude_task_id)
+
+        # Index candidates by band key, then compare each signature only with
+        # the candidates it shares a band with
+        candidates_by_band: Dict[int, List[Tuple]] = {}
+        for row in self.db.execute(statement):
+            for band in row.lsh_bands:
+                candidates_by_band.setdefault(band, []).append(row)
+
+        matches: Dict[Hashable, List[DuplicateMatch]] = {}
+        for key, bands in bands_by_key.items():
+            seen = set()
+            found = []
+            for band in bands:
+                for row in candidates_by_band.get(band, ()):
+                    if row.question_id in seen:
+                        continue
+                    seen.add(row.question_id)
+                    similarity = estimate_similarity(signatures[key], row.minhash)
+                    if similarity >= threshold:
+                        found.append(DuplicateMatch(
+                            questionId=row.question_id,
+                            taskId=row.task_id,
+                            number=row.number,
+                            similarity=similarity,
+                        ))
+            if found:
+                found.sort(key=lambda match: -match.similarity)
+                matches[key] = found
+        return matches
+
+    def annotate_duplicates(
+        self,
+        questions: List[QuestionItem],
+        threshold: float,
+        max_matches: int = 5
+    ) -> int:
+        """
+        Set QuestionItem.duplicates on parsed questions that are already in the bank
+
+        Args:
+            questions: Parsed questions (material questions with children)
+            threshold: Minimum estimated Jaccard similarity
+            max_matches: Matches kept per question
+
+        Returns:
+            Number of questions with duplicates
+        """
+        items: Dict[int, QuestionItem] = {}
+        signatures: Dict[int, List[int]] = {}
+        for question_item in questions:
+            if question_item.children:
+                leaves = [(child, question_item.stem) for child in question_item.children]
+            else:
+                leaves = [(question_item, None)]
+            for leaf, material in leaves:
+                leaf.duplicates = None
+                signature = question_signature(leaf, material)
+                if signature is not None:
+                    items[id(leaf)] = leaf
+                    signatures[id(leaf)] = signature
+
+        matches = self.find_bank_duplicates(signatures, threshold)
+        for key, found in matches.items():
+            items[key].duplicates = found[:max_matches]
+        return len(matches)
+
+    def record_questions(
+        self,
+        task_id: str,
+        saved_questions: List[Tuple[int, Optional[List[int]]]],
+        threshold: float
+    ) -> int:
+        """
+        Store signatures of newly saved questions and link their duplicates
+
+        Each question's duplicate_of is set to the most similar question
+        saved before it: one from another paper in the bank, or an earlier
+        question of the same submission. Does not commit.
+
+        Args:
+            task_id: Task ID of the saved questions
+            saved_questions: (question ID, signature or None) in submission order
+            threshold: Minimum estimated Jaccard similarity
+
+        Returns:
+            Number of questions marked as duplicates
+        """
+        signatures = {
+            question_id: signature
+            for question_id, signature in saved_questions
+            if signature is not None
+        }
+        if not signatures:
+            return 0
+
+        bank_matches = self.find_bank_duplicates(signatures, threshold, exclude_task_id=task_id)
+
+        # Duplicates within the submission point at the earlier question
+        batch_index = LshIndex()
+        duplicate_rows = []
+        for question_id, signature in signatures.items():
+            best: Optional[Tuple[int, float]] = None
+            if question_id in bank_matches:
+                match = bank_matches[question_id][0]
+                best = (match.questionId, match.similarity)
+            batch_matches = batch_index.query(signature, threshold)
+            if batch_matches and (best is None or batch_matches[0][1] > best[1]):
+                best = batch_matches[0]
+            batch_index.add(question_id, signature)
+            if best is not None:
+                duplicate_rows.append({"id": question_id, "duplicate_of": best[0]})
+
+        self.db.execute(insert(QuestionSignature), [
+            {
+                "question_id": question_id,
+                "minhash": signature,
+                "lsh_bands": lsh_bands(signature),
+            }
+            for question_id, signature in signatures.items()
+        ])
+        if duplicate_rows:
+            # Bulk UPDATE by primary key
+            self.db.execute(update(Question), duplicate_rows)
+        return len(duplicate_rows)
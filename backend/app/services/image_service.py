@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+import threading
+from app.core.parser.image_parser import ImageInfo
+from app.models.database.image import Image
+
+
+class ImageRecord:
+    """Manifest entry needed to serve an image"""
+    def __init__(self, file_path: str, content_type: str, size: int, sha256: str):
+        self.file_path = file_path
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256
+
+
+class ImageManifestCache:
+    """
+    In-process LRU cache of manifest entries
+
+    Extracted images never change, so entries never need invalidation.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, int], ImageRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, task_id: str, image_id: int) -> Optional[ImageRecord]:
+        key = (task_id, image_id)
+        with self._lock:
+            record = self._entries.get(key)
+            if record is not None:
+                self._entries.move_to_end(key)
+            return record
+
+    def put(self, task_id: str, image_id: int, record: ImageRecord) -> None:
+        with self._lock:
+            self._entries[(task_id, image_id)] = record
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class ImageService:
+    """Service for the extracted image manifest"""
+
+    def __init__(self, db: Session):
+        """
+        Initialize image service
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    def save_manifest(self, task_id: str, images: List[ImageInfo]) -> int:
+        """
+        Replace the image manifest of a task
+
+        Args:
+            task_id: Task ID
+            images: Extracted images
+
+        Returns:
+            Number of images saved
+        """
+        self.db.query(Image).filter(Image.task_id == task_id).delete(
+            synchronize_session=False
+        )
+        self.db.add_all([
+            Image(
+                task_id=task_id,
+                image_id=image.image_id,
+                filename=image.filename,
+                file_path=image.file_path,
+                content_type=image.content_type,
+                size=image.size,
+                sha256=image.sha256,
+            )
+            for image in images
+        ])
+        self.db.commit()
+        return len(images)
+
+    def get_image(self, task_id: str, image_id: int) -> Optional[ImageRecord]:
+        """
+        Look up an image, consulting the in-process cache first
+
+        Args:
+            task_id: Task ID
+            image_id: Image number within the task
+
+        Returns:
+            ImageRecord or None if the task has no manifest entry for it
+        """
+        record = image_manifest_cache.get(task_id, image_id)
+        if record is not None:
+            return record
+
+        image = (
+            self.db.query(Image)
+            .filter(Image.task_id == task_id, Image.image_id == image_id)
+            .first()
+        )
+        if image is None:
+            return None
+
+        record = ImageRecord(image.file_path, image.content_type, image.size, image.sha256)
+        image_manifest_cache.put(task_id, image_id, record)
+        return record
+
+
+# Global manifest cache shared by all requests in this process
+image_manifest_cache = ImageManifestCache()
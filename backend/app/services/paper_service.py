@@ -1,8 +1,9 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, Dict
 from app.models.database.paper import Paper, PaperStatus
 from app.models.schemas.paper import PaperMetadata
-import hashlib
 
 
 class PaperService:
@@ -21,7 +22,7 @@ class PaperService:
         self,
         task_id: str,
         filename: str,
-        file_content: bytes,
+        file_hash: str,
         metadata: PaperMetadata
     ) -> Paper:
         """
@@ -30,15 +31,12 @@ class PaperService:
         Args:
             task_id: Unique task ID
             filename: Original filename
-            file_content: File binary content for hash calculation
+            file_hash: SHA256 hex digest of the file, computed while it was saved
             metadata: Paper metadata
 
         Returns:
             Created Paper object
         """
-        # Calculate file hash
-        file_hash = hashlib.sha256(file_content).hexdigest()
-
         # Create paper record
         paper = Paper(
             task_id=task_id,
@@ -93,3 +91,90 @@ class PaperService:
             Existing Paper object or None
         """
         return self.db.query(Paper).filter(Paper.file_hash == file_hash).first()
+
+
+class AsyncPaperService:
+    """Async variant of PaperService for async endpoints"""
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize async paper service
+
+        Args:
+            db: Async database session
+        """
+        self.db = db
+
+    async def create_paper(
+        self,
+        task_id: str,
+        filename: str,
+        file_hash: str,
+        metadata: PaperMetadata
+    ) -> Paper:
+        """
+        Create a new paper record
+
+        Args:
+            task_id: Unique task ID
+            filename: Original filename
+            file_hash: SHA256 hex digest of the file, computed while it was saved
+            metadata: Paper metadata
+
+        Returns:
+            Created Paper object
+        """
+        paper = Paper(
+            task_id=task_id,
+            file_hash=file_hash,
+            filename=filename,
+            paper_metadata=metadata.model_dump(),
+            status=PaperStatus.PENDING
+        )
+
+        self.db.add(paper)
+        await self.db.commit()
+        await self.db.refresh(paper)
+
+        return paper
+
+    async def get_paper_by_task_id(self, task_id: str) -> Optional[Paper]:
+        """
+        Get paper by task ID
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Paper object or None
+        """
+        return await self.db.get(Paper, task_id)
+
+    async def update_status(self, task_id: str, status: PaperStatus, error_message: Optional[str] = None):
+        """
+        Update paper status
+
+        Args:
+            task_id: Task ID
+            status: New status
+            error_message: Error message if status is FAILED
+        """
+        paper = await self.get_paper_by_task_id(task_id)
+        if paper:
+            paper.status = status
+            if error_message:
+                paper.error_message = error_message
+            await self.db.commit()
+
+    async def check_duplicate(self, file_hash: str) -> Optional[Paper]:
+        """
+        Check if a paper with the same file hash already exists
+
+        Args:
+            file_hash: File hash to check
+
+        Returns:
+            Existing Paper object or None
+        """
+        result = await self.db.execute(select(Paper).where(Paper.file_hash == file_hash).limit(1))
+        return result.scalars().first()
@@ -1,4 +1,6 @@
-from typing import List, Dict
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from docx.table import Table
 from docx.text.paragraph import Paragraph
 from app.core.parser.docx_parser import DocxParser
 from app.core.parser.structure_parser import StructureParser
@@ -6,41 +8,83 @@ from app.core.parser.content_parser import ContentParser
 from app.core.parser.formula_parser import FormulaParser
 from app.core.parser.image_parser import ImageParser
 from app.core.parser.token_generator import TokenGenerator
+from app.core.parser.paragraph_index import Block, ParagraphFeatures, ParagraphIndex
+from app.core.parser.parse_stats import ParseStats
+from app.core.parser.structure_grammar import get_grammar_registry
 from app.models.schemas.question import QuestionItem
 from app.config import get_settings
 
+# Bump whenever parser output changes so cached parse results are not reused
+PARSER_VERSION = "4"
+
+# Stem variants built by ParseService._analyze_paragraphs
+STEM_QUESTION = "question"
+STEM_MATERIAL = "material"
+STEM_WITH_ATTRIBUTES = "with_attributes"
+
+
+class BlockAnalysis:
+    """
+    Result of one pass over a paragraph set, shared by attribute extraction,
+    option extraction and token generation
+    """
+
+    __slots__ = ("paragraphs", "content", "stem_paragraphs", "option_paragraphs")
+
+    def __init__(self, paragraphs: List[Block]):
+        self.paragraphs = paragraphs
+        # ContentParser result (None if attributes were not requested)
+        self.content: Optional[Dict[str, Any]] = None
+        self.stem_paragraphs: List[Block] = []
+        # Choice option paragraphs before the first attribute block
+        self.option_paragraphs: List[Block] = []
+
 
 class ParseService:
     """Service for orchestrating Word document parsing workflow"""
-    CHOICE_TYPE_KEYS = ("选择", "单选", "多选", "选")
 
-    def __init__(self, file_path: str, task_id: str):
+    def __init__(self, file_path: str, task_id: str, rule_set: Optional[str] = None):
         """
         Initialize parse service
 
         Args:
             file_path: Path to Word document
             task_id: Task ID for this parsing job
+            rule_set: Structure grammar rule set (the default rule set if omitted)
         """
         self.file_path = file_path
         self.task_id = task_id
         self.settings = get_settings()
 
+        # Structure rules, picked up again from the grammar file if it changed
+        self.grammar = get_grammar_registry().get(rule_set)
+
+        # Stage timings and counters, shared by all parsers
+        self.stats = ParseStats()
+
         # Initialize parsers
-        self.docx_parser = DocxParser(file_path)
-        self.formula_parser = FormulaParser()
-        self.content_parser = ContentParser()
+        with self.stats.stage("load"):
+            self.docx_parser = DocxParser(file_path)
+        self.formula_parser = FormulaParser(self.stats)
+
+        # Paragraph features shared by all parser stages (filled in parse())
+        self.paragraph_index = ParagraphIndex(leading_pattern=self.grammar.leading_pattern)
+        self.content_parser = ContentParser(self.paragraph_index, self.stats, self.grammar)
 
-        # Initialize image parser with task-specific output directory
+        # Initialize image parser with task-specific output directory and
+        # the content-addressed blob store shared by all tasks
         image_output_dir = f"{self.settings.image_dir}/{task_id}"
-        self.image_parser = ImageParser(self.docx_parser.document, image_output_dir)
+        image_blob_dir = f"{self.settings.image_dir}/blobs"
+        self.image_parser = ImageParser(
+            self.docx_parser.document, image_output_dir, image_blob_dir, self.stats
+        )
 
         # Initialize token generator with task_id
         self.token_generator = TokenGenerator(
-            self.formula_parser, self.image_parser, task_id
+            self.formula_parser, self.image_parser, task_id, self.paragraph_index, self.stats
         )
 
-    def filter_attribute_paragraphs(self, paragraphs: List[Paragraph]) -> List[Paragraph]:
+    def filter_attribute_paragraphs(self, paragraphs: List[Block]) -> List[Block]:
         """
         Filter out attribute block paragraphs and analysis details
 
@@ -50,128 +94,101 @@ class ParseService:
         Returns:
             Filtered list without attribute blocks and analysis details
         """
-        import re
-
-        # Patterns for analysis details
-        analysis_detail_pattern = re.compile(r"^(\d+)[．.]\s*([A-D])[、．.]")
-        analysis_option_pattern = re.compile(r"^([A-D])、")
-
-        filtered = []
-        for para in paragraphs:
-            text = para.text.strip()
-            has_image = self._paragraph_has_image(para)
-
-            # Skip empty paragraphs
-            if not text and not has_image:
-                continue
+        return [
+            para for para in paragraphs
+            if self._is_stem_paragraph(self.paragraph_index.get(para))
+        ]
+
+    def _is_stem_paragraph(self, features: ParagraphFeatures) -> bool:
+        # Skip empty paragraphs
+        if features.is_empty:
+            return False
 
-            # Skip paragraphs that contain attribute markers
-            if any(attr in text for attr in ["【答案】", "【难度】", "【知识点】", "【解析】", "【详解】"]):
-                continue
+        # Skip paragraphs that contain attribute markers
+        if features.has_attribute_marker:
+            return False
 
-            # Skip analysis detail paragraphs (e.g., "3．A、解析内容")
-            if analysis_detail_pattern.match(text):
-                continue
+        # Skip analysis detail paragraphs (e.g., "3．A、解析内容")
+        if features.is_analysis_detail:
+            return False
 
-            # Skip analysis option details (e.g., "A、解析内容")
-            if analysis_option_pattern.match(text):
-                continue
+        # Skip analysis option details (e.g., "A、解析内容")
+        if features.is_analysis_option:
+            return False
 
-            # Skip conclusion statements (e.g., "故选A。")
-            if text.startswith("故选"):
-                continue
+        # Skip conclusion statements (e.g., "故选A。")
+        if features.stripped.startswith("故选"):
+            return False
 
-            filtered.append(para)
-        return filtered
+        return True
 
     def _is_choice_type(self, question_type: str) -> bool:
-        return any(key in question_type for key in self.CHOICE_TYPE_KEYS)
+        return self.grammar.is_choice_type(question_type)
 
-    def _paragraph_is_option(self, paragraph: Paragraph) -> bool:
-        text = paragraph.text.strip()
-        if not text:
-            return False
-        import re
-
-        return re.match(r"^[A-D][.．、]\s*", text) is not None
+    def _analyze_paragraphs(
+        self,
+        paragraphs: List[Block],
+        question_type: str,
+        mode: Optional[str] = None,
+        stem: str = STEM_QUESTION,
+    ) -> BlockAnalysis:
+        """
+        Analyze one paragraph set in a single pass
 
-    def _paragraph_has_attribute_marker(self, paragraph: Paragraph) -> bool:
-        text = paragraph.text.strip()
-        if not text:
-            return False
-        return any(
-            marker in text
-            for marker in ["【答案】", "【难度】", "【知识点】", "【解析】", "【详解】"]
-        )
+        Args:
+            paragraphs: Paragraphs of a question, material or sub-question
+            question_type: Type of question (选择题, 填空题, etc.)
+            mode: Attribute mode passed to ContentParser ("single" | "grouped" |
+                "sub"), or None if the attributes and options are not needed
+            stem: Which paragraphs make up the stem:
+                STEM_QUESTION drops attribute blocks, analysis details and
+                (for choice questions) option paragraphs;
+                STEM_MATERIAL drops attribute blocks and analysis details only;
+                STEM_WITH_ATTRIBUTES drops empty paragraphs and the option
+                paragraphs before the first attribute block
 
-    def _filter_choice_options_before_attributes(
-        self, paragraphs: List[Paragraph]
-    ) -> List[Paragraph]:
-        filtered = []
+        Returns:
+            BlockAnalysis with content, stem paragraphs and option paragraphs
+        """
+        is_choice = self._is_choice_type(question_type)
+        analysis = BlockAnalysis(paragraphs)
+        texts = []
         seen_attributes = False
+
         for para in paragraphs:
-            if self._paragraph_has_attribute_marker(para):
+            features = self.paragraph_index.get(para)
+            texts.append(features.text)
+            if features.has_attribute_marker:
                 seen_attributes = True
-                filtered.append(para)
-                continue
 
-            if not seen_attributes and self._paragraph_is_option(para):
-                continue
-
-            filtered.append(para)
+            # Options are the option paragraphs before the first attribute block
+            is_option = is_choice and not seen_attributes and features.option_letter is not None
+            if is_option:
+                analysis.option_paragraphs.append(para)
 
-        return filtered
-
-    def _get_choice_option_paragraphs_before_attributes(
-        self, paragraphs: List[Paragraph]
-    ) -> List[Paragraph]:
-        options = []
-        for para in paragraphs:
-            if self._paragraph_has_attribute_marker(para):
-                break
-            if self._paragraph_is_option(para):
-                options.append(para)
-        return options
-
-    def _filter_question_paragraphs(
-        self,
-        paragraphs: List[Paragraph],
-        question_type: str,
-        remove_attributes: bool = True,
-    ) -> List[Paragraph]:
-        if remove_attributes:
-            filtered = self.filter_attribute_paragraphs(paragraphs)
-        else:
-            filtered = [
-                p
-                for p in paragraphs
-                if p.text.strip() or self._paragraph_has_image(p)
-            ]
-
-        if self._is_choice_type(question_type):
-            if remove_attributes:
-                filtered = [p for p in filtered if not self._paragraph_is_option(p)]
+            if stem == STEM_WITH_ATTRIBUTES:
+                keep = not features.is_empty and not is_option
             else:
-                filtered = self._filter_choice_options_before_attributes(filtered)
+                keep = self._is_stem_paragraph(features)
+                if stem == STEM_QUESTION and is_choice and features.option_letter is not None:
+                    keep = False
+            if keep:
+                analysis.stem_paragraphs.append(para)
+
+        if mode is not None:
+            analysis.content = self.content_parser.parse_text_content(
+                "\n".join(texts), question_type, mode
+            )
 
-        return filtered
+        return analysis
 
     def _paragraph_has_image(self, paragraph: Paragraph) -> bool:
         """Check if paragraph contains embedded images."""
-        for run in paragraph.runs:
-            try:
-                if run._element.xpath('.//a:blip') or run._element.xpath('.//v:imagedata'):
-                    return True
-            except Exception:
-                continue
-        return False
+        return self.paragraph_index.get(paragraph).has_image
 
     def _paragraph_has_formula(self, paragraph: Paragraph) -> bool:
         """Check if paragraph contains OMML formulas."""
-        try:
-            return "oMath" in paragraph._element.xml
-        except Exception:
-            return False
+        return self.paragraph_index.get(paragraph).has_formula
 
     def _escape_html(self, text: str) -> str:
         return (
@@ -181,12 +198,10 @@ class ParseService:
         )
 
     def _build_option_html(
-        self, options: List[str], paragraphs: List[Paragraph]
+        self, options: List[str], option_paragraphs: List[Paragraph]
     ) -> List[str]:
         import re
 
-        option_paragraphs = self._get_choice_option_paragraphs_before_attributes(paragraphs)
-
         option_map = {}
         order = []
         for opt in options:
@@ -197,12 +212,11 @@ class ParseService:
                 option_map[letter] = {"content": content, "is_html": False}
 
         for para in option_paragraphs:
-            text = para.text.strip()
-            match = re.match(r"^([A-D])[.．、]\s*", text)
-            if not match:
+            features = self.paragraph_index.get(para)
+            letter = features.option_letter
+            if not letter:
                 continue
-            letter = match.group(1)
-            if self._paragraph_has_formula(para):
+            if features.has_formula:
                 html = self.token_generator.tokens_to_html(
                     self.token_generator.generate_tokens([para])
                 )
@@ -246,31 +260,68 @@ class ParseService:
         Returns:
             List of QuestionItem objects
         """
-        # Step 1: Extract images
-        self.image_parser.extract_all_images()
+        return [
+            payload for event, payload in self.iter_parse() if event == "question"
+        ]
 
-        # Step 2: Parse document structure
-        paragraphs = self.docx_parser.get_paragraphs()
-        structure_parser = StructureParser(paragraphs)
-        question_blocks = structure_parser.extract_question_blocks()
+    def iter_parse(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Execute full parsing workflow, yielding results as they are produced
+
+        Yields:
+            ("progress", {"blocksDone", "blocksTotal", "imagesExtracted"}) after
+            each stage and block, ("question", QuestionItem) as soon as a
+            question block has been processed, and finally ("stats", dict)
+            with stage timings and counters (see ParseStats.to_dict)
+        """
+        stats = self.stats
+
+        # Step 1: Index images; each is extracted when a token first references it
+        with stats.stage("imageIndex"):
+            self.image_parser.index_images()
+        yield "progress", self._progress(0, None)
+
+        # Step 2: Index paragraph and table features once, then parse document structure
+        with stats.stage("index"):
+            blocks = list(self.docx_parser.iter_blocks())
+            self.paragraph_index.build(blocks)
+        with stats.stage("structure"):
+            structure_parser = StructureParser(blocks, self.paragraph_index, self.grammar)
+            question_blocks = structure_parser.extract_question_blocks()
+        tables = sum(1 for block in blocks if isinstance(block, Table))
+        stats.incr("paragraphs", len(blocks) - tables)
+        stats.incr("tables", tables)
+        stats.incr("questionBlocks", len(question_blocks))
+        yield "progress", self._progress(0, len(question_blocks))
 
         # Step 3: Process each question block
-        questions = []
-        for block in question_blocks:
+        for index, block in enumerate(question_blocks):
+            start = time.perf_counter()
             if block.get("is_fill_in"):
                 # Fill-in question with sub-questions
-                parent_question = self._process_fill_in_question(block)
-                questions.append(parent_question)
+                question = self._process_fill_in_question(block)
             elif block["is_material"]:
                 # Material question with sub-questions (returns single QuestionItem)
                 question = self._process_material_question(block)
-                questions.append(question)
             else:
                 # Regular question
                 question = self._process_regular_question(block)
-                questions.append(question)
+            elapsed = time.perf_counter() - start
+            stats.add_time("questions", elapsed)
+            stats.record_question(block["number"], elapsed)
+
+            yield "question", question
+            yield "progress", self._progress(index + 1, len(question_blocks))
+
+        stats.finish()
+        yield "stats", stats.to_dict()
 
-        return questions
+    def _progress(self, blocks_done: int, blocks_total: Optional[int]) -> Dict[str, Any]:
+        return {
+            "blocksDone": blocks_done,
+            "blocksTotal": blocks_total,
+            "imagesExtracted": len(self.image_parser.images),
+        }
 
     def _process_fill_in_question(self, block: Dict) -> QuestionItem:
         """
@@ -283,14 +334,10 @@ class ParseService:
             QuestionItem object with children
         """
         # Parse parent attributes to distribute answers/analyses
-        parent_content = self.content_parser.parse_question_content(
-            block["paragraphs"], block["type"], mode="sub"
-        )
+        parent = self._analyze_paragraphs(block["paragraphs"], block["type"], mode="sub")
+        parent_content = parent.content
 
-        parent_paragraphs_filtered = self._filter_question_paragraphs(
-            block["paragraphs"], block["type"]
-        )
-        parent_tokens = self.token_generator.generate_tokens(parent_paragraphs_filtered)
+        parent_tokens = self.token_generator.generate_tokens(parent.stem_paragraphs)
         parent_html = self.token_generator.tokens_to_html(parent_tokens)
 
         # Process sub-questions with per-sub answers
@@ -302,10 +349,8 @@ class ParseService:
             sub_analysis = parent_content["sub_analyses"].get(sub_number, "")
             sub_analysis_html = self.text_to_html(sub_analysis)
 
-            sub_paragraphs_filtered = self._filter_question_paragraphs(
-                sub_block["paragraphs"], block["type"]
-            )
-            sub_tokens = self.token_generator.generate_tokens(sub_paragraphs_filtered)
+            sub = self._analyze_paragraphs(sub_block["paragraphs"], block["type"])
+            sub_tokens = self.token_generator.generate_tokens(sub.stem_paragraphs)
             sub_stem_html = self.token_generator.tokens_to_html(sub_tokens)
 
             sub_question = QuestionItem(
@@ -319,6 +364,7 @@ class ParseService:
                 difficulty=parent_content["difficulty"],
                 parentId=block["number"],
             )
+            sub_question._stem_tokens = sub_tokens
             children.append(sub_question)
 
         # Create parent QuestionItem (intro stem + children)
@@ -330,6 +376,7 @@ class ParseService:
             answer="",
             children=children,
         )
+        parent_question._stem_tokens = parent_tokens
 
         return parent_question
 
@@ -346,16 +393,14 @@ class ParseService:
         Returns:
             QuestionItem object
         """
-        # Parse content
-        content = self.content_parser.parse_question_content(
-            block["paragraphs"], block["type"]
+        # Parse content, stem and option paragraphs in one pass
+        analysis = self._analyze_paragraphs(
+            block["paragraphs"], block["type"], mode="single", stem=STEM_WITH_ATTRIBUTES
         )
+        content = analysis.content
 
         # Generate tokens for stem
-        stem_paragraphs = self._filter_question_paragraphs(
-            content["paragraphs"], block["type"], remove_attributes=False
-        )
-        stem_tokens = self.token_generator.generate_tokens(stem_paragraphs)
+        stem_tokens = self.token_generator.generate_tokens(analysis.stem_paragraphs)
         stem_html = self.token_generator.tokens_to_html(stem_tokens)
 
         # Use specified answer index if multiple answers exist
@@ -381,7 +426,7 @@ class ParseService:
 
         options = content["options"]
         if options and self._is_choice_type(block["type"]):
-            options = self._build_option_html(options, content["paragraphs"])
+            options = self._build_option_html(options, analysis.option_paragraphs)
 
         question = QuestionItem(
             id=block["number"],
@@ -394,6 +439,7 @@ class ParseService:
             knowledgePoints=content["knowledge_points"],
             difficulty=difficulty_value,
         )
+        question._stem_tokens = stem_tokens
 
         return question
 
@@ -438,9 +484,10 @@ class ParseService:
             QuestionItem with children
         """
         # Parse parent content to get sub-question answers and analyses
-        parent_content = self.content_parser.parse_question_content(
-            block["paragraphs"], block["type"], mode="sub"
+        parent = self._analyze_paragraphs(
+            block["paragraphs"], block["type"], mode="sub", stem=STEM_MATERIAL
         )
+        parent_content = parent.content
 
         # Process sub-questions
         children = []
@@ -454,18 +501,11 @@ class ParseService:
             # Convert analysis text to HTML format
             sub_analysis_html = self.text_to_html(sub_analysis)
 
-            # Parse sub-question content
-            sub_content = self.content_parser.parse_question_content(
-                sub_block["paragraphs"], block["type"], mode="single"
-            )
-
-            # Filter out attribute blocks and analysis details from sub-question paragraphs
-            sub_paragraphs_filtered = self._filter_question_paragraphs(
-                sub_block["paragraphs"], block["type"]
-            )
+            # Answers come from the parent, so only the stem is needed here
+            sub = self._analyze_paragraphs(sub_block["paragraphs"], block["type"])
 
             # Generate sub-question HTML (without analysis details)
-            sub_tokens = self.token_generator.generate_tokens(sub_paragraphs_filtered)
+            sub_tokens = self.token_generator.generate_tokens(sub.stem_paragraphs)
             sub_stem_html = self.token_generator.tokens_to_html(sub_tokens)
 
             sub_question = QuestionItem(
@@ -479,13 +519,11 @@ class ParseService:
                 difficulty=parent_content["difficulty"],
                 parentId=block["number"],
             )
+            sub_question._stem_tokens = sub_tokens
             children.append(sub_question)
 
-        # Filter out attribute blocks from parent paragraphs before generating HTML
-        parent_paragraphs_filtered = self.filter_attribute_paragraphs(block["paragraphs"])
-
         # Generate parent HTML (main stem without attributes)
-        parent_tokens = self.token_generator.generate_tokens(parent_paragraphs_filtered)
+        parent_tokens = self.token_generator.generate_tokens(parent.stem_paragraphs)
         parent_html = self.token_generator.tokens_to_html(parent_tokens)
 
         parent_question = QuestionItem(
@@ -496,6 +534,7 @@ class ParseService:
             answer="",  # Parent has no independent answer
             children=children,
         )
+        parent_question._stem_tokens = parent_tokens
 
         return parent_question
 
@@ -517,15 +556,13 @@ class ParseService:
             Parent QuestionItem with children array
         """
         # Parse material section to get shared answers and analyses
-        material_content = self.content_parser.parse_question_content(
-            block["paragraphs"], block["type"], mode="grouped"
+        material = self._analyze_paragraphs(
+            block["paragraphs"], block["type"], mode="grouped", stem=STEM_MATERIAL
         )
-
-        # Filter out attribute blocks from material paragraphs before generating HTML
-        material_paragraphs_filtered = self.filter_attribute_paragraphs(block["paragraphs"])
+        material_content = material.content
 
         # Generate material stem HTML (only material content, no sub-questions or attributes)
-        material_tokens = self.token_generator.generate_tokens(material_paragraphs_filtered)
+        material_tokens = self.token_generator.generate_tokens(material.stem_paragraphs)
         material_stem_html = self.token_generator.tokens_to_html(material_tokens)
 
         # Use the first sub-question number as the parent question ID
@@ -544,18 +581,11 @@ class ParseService:
             # Convert analysis text to HTML format
             sub_analysis_html = self.text_to_html(sub_analysis)
 
-            # Parse sub-question content
-            sub_content = self.content_parser.parse_question_content(
-                sub_block["paragraphs"], block["type"], mode="single"
-            )
-
-            # Filter out attribute blocks and analysis details from sub-question paragraphs
-            sub_paragraphs_filtered = self._filter_question_paragraphs(
-                sub_block["paragraphs"], block["type"]
-            )
+            # Parse sub-question options and stem in one pass
+            sub = self._analyze_paragraphs(sub_block["paragraphs"], block["type"], mode="single")
 
             # Generate sub-question stem HTML (only sub-question content, no material or analysis)
-            sub_tokens = self.token_generator.generate_tokens(sub_paragraphs_filtered)
+            sub_tokens = self.token_generator.generate_tokens(sub.stem_paragraphs)
             sub_stem_html = self.token_generator.tokens_to_html(sub_tokens)
 
             # Create child QuestionItem with relative numbering
@@ -564,13 +594,14 @@ class ParseService:
                 number=relative_number,  # Use relative number: "1", "2"
                 type=block["type"],
                 stem=sub_stem_html,
-                options=sub_content["options"],
+                options=sub.content["options"],
                 answer=sub_answer,
                 analysis=sub_analysis_html,
                 knowledgePoints=material_content["knowledge_points"],
                 difficulty=material_content["difficulty"],
                 parentId=first_sub_number,
             )
+            child_question._stem_tokens = sub_tokens
             children.append(child_question)
 
         # Create parent QuestionItem (only contains material)
@@ -587,5 +618,6 @@ class ParseService:
             parentId=None,
             children=children,
         )
+        parent_question._stem_tokens = material_tokens
 
         return parent_question
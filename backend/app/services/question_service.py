@@ -1,9 +1,91 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import Integer, String, and_, any_, delete, func, insert, literal, not_, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.database.paper import Paper
 from app.models.database.question import Question
 from app.models.database.question_content import QuestionContent, ContentType
 from app.models.database.question_group import QuestionGroup
 from app.models.schemas.question import QuestionItem
+from app.core.parser.token_codec import lookup_tokens
+from app.core.text_search import SEARCH_CONFIG, search_terms
+from app.config import get_settings
+from app.services.dedup_service import DedupService, question_signature
+
+
+# Tags the tagging workflow fills in; a question is fully tagged once all are set
+def _has_difficulty():
+    return Question.difficulty.isnot(None)
+
+
+def _has_knowledge_points():
+    return func.coalesce(func.cardinality(Question.knowledge_points), 0) > 0
+
+
+def tag_status_condition(tag_status: str):
+    """
+    SQL condition for a tag status
+
+    Args:
+        tag_status: "complete", "partial" or "untagged"
+
+    Returns:
+        WHERE clause element
+    """
+    tagged = [_has_difficulty(), _has_knowledge_points()]
+    if tag_status == "complete":
+        return and_(*tagged)
+    if tag_status == "untagged":
+        return not_(or_(*tagged))
+    return and_(or_(*tagged), not_(and_(*tagged)))
+
+
+def tag_status_of(question: Question) -> str:
+    """Tag status of a loaded question (same rules as tag_status_condition)"""
+    tagged = [question.difficulty is not None, bool(question.knowledge_points)]
+    if all(tagged):
+        return "complete"
+    if any(tagged):
+        return "partial"
+    return "untagged"
+
+
+def iter_leaf_questions(questions: List[QuestionItem]):
+    """Yield (question, material HTML or None) for each saved question, in submission order"""
+    for question_item in questions:
+        if question_item.children:
+            for sub_question in question_item.children:
+                yield sub_question, question_item.stem
+        else:
+            yield question_item, None
+
+
+def derive_question_fields(questions: List[QuestionItem], with_signatures: bool = True) -> List[Dict[str, Any]]:
+    """
+    Compute the CPU-bound per-question fields that save_questions stores
+
+    Kept separate from the inserts so async callers can run it in a thread
+    instead of on the event loop.
+
+    Args:
+        questions: List of QuestionItem objects (material questions with children)
+        with_signatures: Whether to compute MinHash signatures (dedup enabled)
+
+    Returns:
+        {"stem_terms", "analysis_terms", "signature"} per saved question, in
+        the order save_questions inserts them
+    """
+    return [
+        {
+            "stem_terms": search_terms([question_item.stem] + (question_item.options or [])),
+            "analysis_terms": search_terms([question_item.answer, question_item.analysis]),
+            "signature": question_signature(question_item, material) if with_signatures else None,
+        }
+        for question_item, material in iter_leaf_questions(questions)
+    ]
 
 
 class QuestionService:
@@ -17,137 +99,459 @@ class QuestionService:
             db: Database session
         """
         self.db = db
+        self.settings = get_settings()
 
-    def save_questions(self, task_id: str, questions: List[QuestionItem]) -> int:
+    def save_questions(
+        self,
+        task_id: str,
+        questions: List[QuestionItem],
+        token_index: Optional[Dict] = None,
+        derived: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
         """
         Save questions to database
 
+        All rows are built in memory and written with one multi-row INSERT
+        per table (groups, questions, contents) inside a single transaction.
+        Each question's MinHash signature is stored with it, and questions
+        that are near-duplicates of earlier ones get duplicate_of set.
+
         Args:
             task_id: Task ID
             questions: List of QuestionItem objects
+            token_index: Encoded token streams from parsing (see token_codec),
+                stored for content whose HTML was not edited
+            derived: Result of derive_question_fields for these questions
+                (computed here if omitted)
 
         Returns:
             Number of questions saved
         """
-        count = 0
+        if derived is None:
+            derived = derive_question_fields(questions, self.settings.dedup_enabled)
+
+        # Material questions become groups; their children are the saved questions
+        materials = [item for item in questions if item.children]
+        group_ids = self._insert_groups(task_id, materials)
+        group_id_by_material = {id(item): group_id for item, group_id in zip(materials, group_ids)}
 
+        # Flatten into (question_item, group_id) in submission order
+        flat_questions = []
         for question_item in questions:
             if question_item.children:
-                # Material question with sub-questions
-                count += self._save_material_question(task_id, question_item)
+                group_id = group_id_by_material[id(question_item)]
+                for sub_question in question_item.children:
+                    flat_questions.append((sub_question, group_id))
             else:
-                # Regular question
-                self._save_regular_question(task_id, question_item)
-                count += 1
+                flat_questions.append((question_item, None))
+
+        question_ids = self._insert_questions(task_id, flat_questions, derived)
+        self._insert_contents(
+            [
+                (question_id, question_item)
+                for question_id, (question_item, _) in zip(question_ids, flat_questions)
+            ],
+            token_index
+        )
+
+        if self.settings.dedup_enabled:
+            DedupService(self.db).record_questions(
+                task_id,
+                [
+                    (question_id, fields["signature"])
+                    for question_id, fields in zip(question_ids, derived)
+                ],
+                self.settings.dedup_threshold
+            )
 
         self.db.commit()
-        return count
+        return len(flat_questions)
 
-    def _save_regular_question(
-        self,
-        task_id: str,
-        question_item: QuestionItem,
-        group_id: Optional[int] = None
-    ) -> Question:
+    def _insert_groups(self, task_id: str, materials: List[QuestionItem]) -> List[int]:
         """
-        Save a regular question to database
+        Insert question groups for material questions
 
         Args:
             task_id: Task ID
-            question_item: QuestionItem object
-            group_id: Optional group ID for sub-questions
+            materials: Material QuestionItem objects (with children)
 
         Returns:
-            Created Question object
-        """
-        # Create question record
-        question = Question(
-            task_id=task_id,
-            number=question_item.number,
-            type=question_item.type,
-            difficulty=question_item.difficulty,
-            knowledge_points=question_item.knowledgePoints or [],
-            answer_raw=question_item.answer,
-            group_id=group_id,
-            parent_number=question_item.parentId
+            Group IDs in the same order as materials
+        """
+        if not materials:
+            return []
+
+        rows = [
+            {
+                "task_id": task_id,
+                "number": question_item.number,
+                "material_content": question_item.stem,
+            }
+            for question_item in materials
+        ]
+        statement = insert(QuestionGroup).returning(
+            QuestionGroup.id, sort_by_parameter_order=True
         )
+        return list(self.db.scalars(statement, rows))
 
-        self.db.add(question)
-        self.db.flush()  # Get question ID
+    def _insert_questions(
+        self,
+        task_id: str,
+        flat_questions: List[Tuple[QuestionItem, Optional[int]]],
+        derived: List[Dict[str, Any]]
+    ) -> List[int]:
+        """
+        Insert question rows
 
-        # Save question contents (stem, answer, analysis)
-        self._save_question_content(question.id, ContentType.STEM, question_item.stem)
+        Args:
+            task_id: Task ID
+            flat_questions: (QuestionItem, group ID or None) pairs
+            derived: derive_question_fields result, aligned with flat_questions
 
-        if question_item.answer:
-            self._save_question_content(question.id, ContentType.ANSWER, question_item.answer)
+        Returns:
+            Question IDs in the same order as flat_questions
+        """
+        if not flat_questions:
+            return []
+
+        rows = [
+            {
+                "task_id": task_id,
+                "number": question_item.number,
+                "type": question_item.type,
+                "difficulty": question_item.difficulty,
+                "knowledge_points": question_item.knowledgePoints or [],
+                "answer_raw": question_item.answer,
+                "group_id": group_id,
+                "parent_number": question_item.parentId,
+                "stem_terms": fields["stem_terms"],
+                "analysis_terms": fields["analysis_terms"],
+            }
+            for (question_item, group_id), fields in zip(flat_questions, derived)
+        ]
+        statement = insert(Question).returning(Question.id, sort_by_parameter_order=True)
+        return list(self.db.scalars(statement, rows))
+
+    def _insert_contents(
+        self,
+        saved_questions: List[Tuple[int, QuestionItem]],
+        token_index: Optional[Dict] = None
+    ):
+        """
+        Insert question contents (stem, answer, analysis, options)
 
-        if question_item.analysis:
-            self._save_question_content(question.id, ContentType.ANALYSIS, question_item.analysis)
+        Args:
+            saved_questions: (question ID, QuestionItem) pairs
+            token_index: Encoded token streams from parsing
+        """
+        rows = []
+        for question_id, question_item in saved_questions:
+            stem_tokens = lookup_tokens(
+                token_index, question_item.id, ContentType.STEM.value, question_item.stem
+            )
+            rows.append(
+                self._content_row(question_id, ContentType.STEM, question_item.stem, stem_tokens)
+            )
+
+            if question_item.answer:
+                rows.append(self._content_row(question_id, ContentType.ANSWER, question_item.answer))
+
+            if question_item.analysis:
+                rows.append(self._content_row(question_id, ContentType.ANALYSIS, question_item.analysis))
+
+            if question_item.options:
+                # Save options as JSON
+                options_html = "<br>".join(question_item.options)
+                rows.append(self._content_row(question_id, ContentType.OPTIONS, options_html))
+
+        if rows:
+            self.db.execute(insert(QuestionContent), rows)
+
+    def _content_row(
+        self,
+        question_id: int,
+        content_type: ContentType,
+        html: str,
+        tokens: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Build a question content row
 
-        if question_item.options:
-            # Save options as JSON
-            options_html = "<br>".join(question_item.options)
-            self._save_question_content(question.id, ContentType.OPTIONS, options_html)
+        Args:
+            question_id: Question ID
+            content_type: Content type
+            html: HTML content
+            tokens: Compact token document, if the parser produced one for this HTML
 
-        return question
+        Returns:
+            Column values for QuestionContent
+        """
+        # Content without parser tokens (edited, or built from plain text)
+        # keeps an empty token stream
+        return {
+            "question_id": question_id,
+            "content_type": content_type,
+            "tokens": tokens if tokens is not None else [],
+            "html": html,
+        }
 
-    def _save_material_question(self, task_id: str, question_item: QuestionItem) -> int:
+    def get_questions_by_task_id(self, task_id: str) -> List[Question]:
         """
-        Save a material question with sub-questions
+        Get all questions for a task
 
         Args:
             task_id: Task ID
-            question_item: QuestionItem object with children
 
         Returns:
-            Number of questions saved (including sub-questions)
+            List of Question objects
         """
-        # Create question group
-        group = QuestionGroup(
-            task_id=task_id,
-            number=question_item.number,
-            material_content=question_item.stem
+        return self.db.query(Question).filter(Question.task_id == task_id).all()
+
+    def query_questions(
+        self,
+        subject: Optional[str] = None,
+        task_id: Optional[str] = None,
+        question_types: Optional[List[str]] = None,
+        difficulties: Optional[List[int]] = None,
+        knowledge_points: Optional[List[str]] = None,
+        tag_status: Optional[str] = None,
+        duplicate: Optional[bool] = None,
+        after_id: Optional[int] = None,
+        limit: int = 20
+    ) -> Tuple[List[Tuple[Question, Dict[str, Any]]], bool]:
+        """
+        Query the question bank, one page at a time
+
+        Pages are keyset-paginated on the question ID (WHERE id > after_id
+        ORDER BY id), so every page costs the same however deep the client
+        has scrolled. Filters map onto the indexes from migration 003:
+        (type, difficulty, id) for type/difficulty, GIN on knowledge_points
+        for containment and the subject expression index on papers.
+        Contents and material groups are loaded with one IN query each.
+
+        Args:
+            subject: Paper subject (paper metadata "subject")
+            task_id: Source paper task ID
+            question_types: Question types to include
+            difficulties: Difficulty levels to include
+            knowledge_points: Knowledge point IDs the question must all have
+            tag_status: "complete", "partial" or "untagged"
+            duplicate: True for near-duplicates only, False to leave them out
+            after_id: Last question ID of the previous page
+            limit: Page size
+
+        Returns:
+            ((Question, paper metadata) pairs in ID order, whether more pages follow)
+        """
+        statement = (
+            select(Question, Paper.paper_metadata)
+            .join(Paper, Paper.task_id == Question.task_id)
+            .options(selectinload(Question.contents), selectinload(Question.group))
         )
+        if subject:
+            # Same expression as the ix_papers_subject index (no cast around ->>)
+            paper_subject = Paper.paper_metadata.op("->>", return_type=String)("subject")
+            statement = statement.where(paper_subject == subject)
+        if task_id:
+            statement = statement.where(Question.task_id == task_id)
+        if question_types:
+            statement = statement.where(Question.type.in_(question_types))
+        if difficulties:
+            statement = statement.where(Question.difficulty.in_(difficulties))
+        if knowledge_points:
+            statement = statement.where(Question.knowledge_points.contains(knowledge_points))
+        if tag_status:
+            statement = statement.where(tag_status_condition(tag_status))
+        if duplicate is not None:
+            has_original = Question.duplicate_of.isnot(None)
+            statement = statement.where(has_original if duplicate else not_(has_original))
+        if after_id is not None:
+            statement = statement.where(Question.id > after_id)
+
+        # One extra row tells whether another page follows without a COUNT
+        rows = self.db.execute(statement.order_by(Question.id).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        return [(row[0], row[1]) for row in rows[:limit]], has_more
+
+    def search_questions(
+        self,
+        tsquery: str,
+        subject: Optional[str] = None,
+        question_types: Optional[List[str]] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Tuple[Question, Dict[str, Any], float]]:
+        """
+        Full-text search over question stems, options, answers and analyses
+
+        Matches the GIN-indexed search_vector and ranks by ts_rank_cd, so
+        stem matches (weight A) rank above analysis matches (weight B).
 
-        self.db.add(group)
-        self.db.flush()  # Get group ID
+        Args:
+            tsquery: Query from text_search.build_tsquery
+            subject: Paper subject
+            question_types: Question types to include
+            limit: Maximum number of results
+            offset: Results to skip
 
-        # Save sub-questions
-        count = 0
-        for sub_question in question_item.children:
-            self._save_regular_question(task_id, sub_question, group_id=group.id)
-            count += 1
+        Returns:
+            (Question, paper metadata, rank) in rank order
+        """
+        query = func.to_tsquery(SEARCH_CONFIG, tsquery)
+        rank = func.ts_rank_cd(Question.search_vector, query)
+        statement = (
+            select(Question, Paper.paper_metadata, rank)
+            .join(Paper, Paper.task_id == Question.task_id)
+            .where(Question.search_vector.bool_op("@@")(query))
+            .options(selectinload(Question.contents), selectinload(Question.group))
+        )
+        if subject:
+            paper_subject = Paper.paper_metadata.op("->>", return_type=String)("subject")
+            statement = statement.where(paper_subject == subject)
+        if question_types:
+            statement = statement.where(Question.type.in_(question_types))
 
-        return count
+        statement = statement.order_by(rank.desc(), Question.id).limit(limit).offset(offset)
+        return [(row[0], row[1], row[2]) for row in self.db.execute(statement).all()]
 
-    def _save_question_content(
+    def bulk_tag_questions(
         self,
-        question_id: int,
-        content_type: ContentType,
-        html: str
-    ):
+        question_ids: List[int],
+        difficulty: Optional[int] = None,
+        question_type: Optional[str] = None,
+        add_knowledge_points: Optional[List[str]] = None,
+        remove_knowledge_points: Optional[List[str]] = None,
+        chunk_size: int = 1000
+    ) -> int:
         """
-        Save question content (stem, answer, analysis, options)
+        Apply the same tag changes to many questions
+
+        Each chunk of IDs is one set-based UPDATE ... WHERE id = ANY(:ids);
+        knowledge points are edited inside the array (removals first, then
+        additions that are not already present), so existing tags on each
+        question are kept. All chunks run in one transaction.
 
         Args:
-            question_id: Question ID
-            content_type: Content type
-            html: HTML content
+            question_ids: Question IDs to tag
+            difficulty: New difficulty, unchanged if None
+            question_type: New question type, unchanged if None
+            add_knowledge_points: Knowledge point IDs to append
+            remove_knowledge_points: Knowledge point IDs to remove
+            chunk_size: IDs per UPDATE statement
+
+        Returns:
+            Number of questions updated
         """
-        # For now, store empty tokens array
-        # In production, you would parse HTML back to tokens or store tokens separately
-        tokens = []
+        values: Dict[str, Any] = {"updated_at": func.now()}
+        if difficulty is not None:
+            values["difficulty"] = difficulty
+        if question_type is not None:
+            values["type"] = question_type
+        if add_knowledge_points or remove_knowledge_points:
+            values["knowledge_points"] = self._edit_knowledge_points(
+                add_knowledge_points or [], remove_knowledge_points or []
+            )
+
+        unique_ids = list(dict.fromkeys(question_ids))
+        updated = 0
+        try:
+            for start in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[start:start + chunk_size]
+                statement = (
+                    update(Question)
+                    .where(Question.id == any_(literal(chunk, ARRAY(Integer))))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                updated += self.db.execute(statement).rowcount
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        return updated
+
+    @staticmethod
+    def _edit_knowledge_points(add: List[str], remove: List[str]):
+        """
+        Build the SQL expression for the edited knowledge_points array
 
-        content = QuestionContent(
-            question_id=question_id,
-            content_type=content_type,
-            tokens=tokens,
-            html=html
-        )
+        Args:
+            add: Knowledge point IDs to append if missing
+            remove: Knowledge point IDs to remove
 
-        self.db.add(content)
+        Returns:
+            Column expression for UPDATE ... SET knowledge_points
+        """
+        points_type = ARRAY(String)
+        points = func.coalesce(Question.knowledge_points, literal([], points_type), type_=points_type)
+        for point in dict.fromkeys(remove):
+            points = func.array_remove(points, point, type_=points_type)
+        if add:
+            # Append, in request order, the points the question does not have yet
+            added = func.unnest(literal(list(dict.fromkeys(add)), points_type)).table_valued(
+                "point", with_ordinality="position"
+            ).render_derived()
+            missing = (
+                select(added.c.point)
+                .where(not_(added.c.point == any_(points)))
+                .order_by(added.c.position)
+                .correlate(Question)
+            )
+            points = func.array_cat(
+                points, func.array(missing.scalar_subquery(), type_=points_type), type_=points_type
+            )
+        return points
 
-    def get_questions_by_task_id(self, task_id: str) -> List[Question]:
+    def delete_questions_by_task_id(self, task_id: str):
+        """
+        Delete all questions for a task
+
+        Args:
+            task_id: Task ID
+        """
+        self.db.query(Question).filter(Question.task_id == task_id).delete()
+        self.db.commit()
+
+
+class AsyncQuestionService:
+    """
+    Async variant of QuestionService for async endpoints
+
+    Each call runs the QuestionService implementation through
+    AsyncSession.run_sync: statements go over the async driver, so the
+    event loop is free while the database works, and the batched inserts,
+    search and dedup logic exist only once.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize async question service
+
+        Args:
+            db: Async database session
+        """
+        self.db = db
+
+    async def save_questions(
+        self,
+        task_id: str,
+        questions: List[QuestionItem],
+        token_index: Optional[Dict] = None
+    ) -> int:
+        """
+        Save questions to database (see QuestionService.save_questions)
+
+        Search terms and signatures are computed in a worker thread first;
+        run_sync executes on the event loop, so it only builds and sends the inserts.
+        """
+        derived = await run_in_threadpool(
+            derive_question_fields, questions, get_settings().dedup_enabled
+        )
+        return await self.db.run_sync(
+            lambda db: QuestionService(db).save_questions(task_id, questions, token_index, derived)
+        )
+
+    async def get_questions_by_task_id(self, task_id: str) -> List[Question]:
         """
         Get all questions for a task
 
@@ -157,14 +561,31 @@ class QuestionService:
         Returns:
             List of Question objects
         """
-        return self.db.query(Question).filter(Question.task_id == task_id).all()
+        result = await self.db.execute(select(Question).where(Question.task_id == task_id))
+        return list(result.scalars().all())
 
-    def delete_questions_by_task_id(self, task_id: str):
+    async def query_questions(self, **filters) -> Tuple[List[Tuple[Question, Dict[str, Any]]], bool]:
+        """Query the question bank (see QuestionService.query_questions for the filters)"""
+        return await self.db.run_sync(lambda db: QuestionService(db).query_questions(**filters))
+
+    async def search_questions(self, tsquery: str, **filters) -> List[Tuple[Question, Dict[str, Any], float]]:
+        """Full-text search (see QuestionService.search_questions)"""
+        return await self.db.run_sync(
+            lambda db: QuestionService(db).search_questions(tsquery, **filters)
+        )
+
+    async def bulk_tag_questions(self, question_ids: List[int], **changes) -> int:
+        """Apply the same tag changes to many questions (see QuestionService.bulk_tag_questions)"""
+        return await self.db.run_sync(
+            lambda db: QuestionService(db).bulk_tag_questions(question_ids, **changes)
+        )
+
+    async def delete_questions_by_task_id(self, task_id: str):
         """
         Delete all questions for a task
 
         Args:
             task_id: Task ID
         """
-        self.db.query(Question).filter(Question.task_id == task_id).delete()
-        self.db.commit()
+        await self.db.execute(delete(Question).where(Question.task_id == task_id))
+        await self.db.commit()
@@ -0,0 +1 @@
+"""Parser benchmark suite (synthetic exam papers and per-stage timings)"""
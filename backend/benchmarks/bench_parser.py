@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+"""
+Benchmark the Word parser stage by stage
+
+Each scenario generates a synthetic paper (see generate_paper.py), then times
+the parser stages on a fresh ParseService per repeat:
+
+    load       DocxParser loads the .docx
+    images     ImageParser indexes and extracts every image
+    index      Body blocks are walked and the paragraph feature index is built
+    structure  StructureParser.extract_question_blocks
+    content    ContentParser.parse_question_content for every question block
+    tokens     TokenGenerator.generate_tokens + tokens_to_html for every block
+    total      ParseService.parse() end to end
+
+Timings are the median of the repeats with a cold formula cache. Peak memory
+per stage comes from one extra run under tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_parser                       # all scenarios
+    python -m benchmarks.bench_parser --scenario large --save main
+    python -m benchmarks.bench_parser --compare main        # exit 1 on regression
+    python -m benchmarks.bench_parser --docx paper.docx     # benchmark a real file
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+# Images are extracted under IMAGE_DIR; keep them out of real storage
+BENCH_IMAGE_DIR = tempfile.mkdtemp(prefix="bench_images_")
+os.environ["IMAGE_DIR"] = BENCH_IMAGE_DIR
+
+from app.core.parser.formula_parser import FormulaParser  # noqa: E402
+from app.core.parser.structure_parser import StructureParser  # noqa: E402
+from app.services.parse_service import PARSER_VERSION, ParseService  # noqa: E402
+from benchmarks.generate_paper import PaperSpec, generate_paper  # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+SCENARIOS: Dict[str, PaperSpec] = {
+    "small": PaperSpec(questions=20, material_groups=2, fill_in=3),
+    "medium": PaperSpec(questions=100, material_groups=10, fill_in=10),
+    "large": PaperSpec(questions=500, material_groups=40, fill_in=40, images=3, tables=2),
+    "formula_heavy": PaperSpec(questions=100, material_groups=0, fill_in=0, formulas=10, images=0, tables=0),
+}
+
+STAGES = ("load", "images", "index", "structure", "content", "tokens", "total")
+
+# Stages whose throughput is reported per question block rather than per MB
+BLOCK_STAGES = ("structure", "content", "tokens", "total")
+
+
+class StageRun:
+    """Runs the parser stages one after another on a single document"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.service: Optional[ParseService] = None
+        self.blocks = None
+        self.question_blocks = None
+
+    def load(self) -> None:
+        self.service = ParseService(self.file_path, "bench")
+
+    def images(self) -> None:
+        self.service.image_parser.index_images()
+        self.service.image_parser.extract_all_images()
+
+    def index(self) -> None:
+        self.blocks = list(self.service.docx_parser.iter_blocks())
+        self.service.paragraph_index.build(self.blocks)
+
+    def structure(self) -> None:
+        parser = StructureParser(self.blocks, self.service.paragraph_index, self.service.grammar)
+        self.question_blocks = parser.extract_question_blocks()
+
+    def content(self) -> None:
+        content_parser = self.service.content_parser
+        for block in self.question_blocks:
+            mode = "sub" if block.get("is_fill_in") else "grouped" if block["is_material"] else "single"
+            content_parser.parse_question_content(block["paragraphs"], block["type"], mode=mode)
+            for sub_block in block["sub_questions"]:
+                content_parser.parse_question_content(sub_block["paragraphs"], sub_block["type"])
+
+    def tokens(self) -> None:
+        token_generator = self.service.token_generator
+        for block in self.question_blocks:
+            for paragraphs in [block["paragraphs"]] + [sub["paragraphs"] for sub in block["sub_questions"]]:
+                token_generator.tokens_to_html(token_generator.generate_tokens(paragraphs))
+
+    def total(self) -> None:
+        ParseService(self.file_path, "bench_total").parse()
+
+
+def reset_state() -> None:
+    """Start every run cold: no cached formulas, no extracted images"""
+    FormulaParser.clear_cache()
+    shutil.rmtree(BENCH_IMAGE_DIR, ignore_errors=True)
+    os.makedirs(BENCH_IMAGE_DIR, exist_ok=True)
+
+
+def run_stages(file_path: str, measure: Callable[[str, Callable[[], None]], None]) -> StageRun:
+    run = StageRun(file_path)
+    for stage in STAGES:
+        if stage in ("load", "total"):
+            reset_state()
+        measure(stage, getattr(run, stage))
+    return run
+
+
+def benchmark_file(file_path: str, repeats: int) -> Dict:
+    """
+    Benchmark all stages on one document
+
+    Args:
+        file_path: Path to .docx file
+        repeats: Timed runs per stage
+
+    Returns:
+        Result dict with per-stage timings, peak memory and throughput
+    """
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def timed(stage: str, func: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        func()
+        timings[stage].append(time.perf_counter() - start)
+
+    run = None
+    for _ in range(repeats):
+        run = run_stages(file_path, timed)
+
+    peaks: Dict[str, int] = {}
+
+    def traced(stage: str, func: Callable[[], None]) -> None:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peaks[stage] = tracemalloc.get_traced_memory()[1] - before
+
+    tracemalloc.start()
+    try:
+        run_stages(file_path, traced)
+    finally:
+        tracemalloc.stop()
+
+    size_mb = os.path.getsize(file_path) / 1048576
+    question_blocks = len(run.question_blocks)
+    stages = {}
+    for stage in STAGES:
+        median = statistics.median(timings[stage])
+        if stage in BLOCK_STAGES:
+            throughput = f"{question_blocks / median:.0f} blocks/s" if median else "-"
+        else:
+            throughput = f"{size_mb / median:.1f} MB/s" if median else "-"
+        stages[stage] = {
+            "median_ms": round(median * 1000, 2),
+            "min_ms": round(min(timings[stage]) * 1000, 2),
+            "peak_kb": round(peaks[stage] / 1024),
+            "throughput": throughput,
+        }
+
+    return {
+        "file_mb": round(size_mb, 3),
+        "blocks": len(run.blocks),
+        "question_blocks": question_blocks,
+        "images": len(run.service.image_parser.images),
+        "stages": stages,
+    }
+
+
+def print_result(name: str, result: Dict, baseline: Optional[Dict] = None) -> None:
+    print(f"\n[{name}] {result['file_mb']} MB, {result['blocks']} blocks, "
+          f"{result['question_blocks']} questions, {result['images']} images")
+    header = f"  {'stage':<10} {'median ms':>10} {'min ms':>10} {'peak KB':>10}  {'throughput':<16}"
+    if baseline:
+        header += f" {'vs baseline':>11}"
+    print(header)
+    for stage, values in result["stages"].items():
+        line = (f"  {stage:<10} {values['median_ms']:>10.2f} {values['min_ms']:>10.2f} "
+                f"{values['peak_kb']:>10}  {values['throughput']:<16}")
+        if baseline and stage in baseline.get("stages", {}):
+            line += f" {change(values, baseline['stages'][stage]):>+10.1f}%"
+        print(line)
+
+
+def change(current: Dict, baseline: Dict) -> float:
+    """Median time change against the baseline, in percent"""
+    if not baseline["median_ms"]:
+        return 0.0
+    return (current["median_ms"] - baseline["median_ms"]) / baseline["median_ms"] * 100
+
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def load_baseline(name: str) -> Dict:
+    with open(baseline_path(name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(name: str, results: Dict[str, Dict], specs: Dict[str, Dict], repeats: int) -> None:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    data = {
+        "parser_version": PARSER_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeats": repeats,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "specs": specs,
+        "results": results,
+    }
+    with open(baseline_path(name), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"\n[OK] Baseline saved to {baseline_path(name)}")
+
+
+def find_regressions(
+    results: Dict[str, Dict], baseline: Dict, threshold: float, min_delta_ms: float
+) -> List[str]:
+    """List stages whose median time grew by more than threshold percent and min_delta_ms"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        for stage, values in result["stages"].items():
+            base_values = base["stages"].get(stage)
+            if base_values is None:
+                continue
+            delta_ms = values["median_ms"] - base_values["median_ms"]
+            if change(values, base_values) > threshold and delta_ms > min_delta_ms:
+                regressions.append(f"{name}/{stage}: {change(values, base_values):+.1f}% ({delta_ms:+.2f} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser stages on synthetic exam papers")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--docx", action="append", default=[], help="Benchmark an existing .docx instead")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per stage")
+    parser.add_argument("--save", metavar="NAME", help="Save results as baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against baseline NAME")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown against the baseline counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore slowdowns smaller than this many milliseconds (timer noise)")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    work_dir = tempfile.mkdtemp(prefix="bench_papers_")
+
+    documents: Dict[str, str] = {}
+    specs: Dict[str, Dict] = {}
+    if args.docx:
+        for path in args.docx:
+            documents[os.path.basename(path)] = path
+    else:
+        for name in args.scenario or list(SCENARIOS):
+            path = os.path.join(work_dir, f"{name}.docx")
+            generate_paper(path, SCENARIOS[name])
+            documents[name] = path
+            specs[name] = SCENARIOS[name].to_dict()
+
+    print(f"Parser version {PARSER_VERSION}, Python {platform.python_version()}, {args.repeats} repeats")
+
+    results = {}
+    try:
+        for name, path in documents.items():
+            results[name] = benchmark_file(path, args.repeats)
+            base = baseline["results"].get(name) if baseline else None
+            print_result(name, results[name], base)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.rmtree(BENCH_IMAGE_DIR, ignore_errors=True)
+
+    if args.save:
+        save_baseline(args.save, results, specs, args.repeats)
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n[WARNING] Slower than baseline '{args.compare}' by more than {args.threshold}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\n[OK] No stage slower than baseline '{args.compare}' by more than {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
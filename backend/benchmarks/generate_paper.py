@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+"""
+Generate synthetic exam papers for parser benchmarks
+
+The papers follow the layout the parser expects from real uploads: numbered
+sections, choice questions with OMML formulas, images, option grids and data
+tables, material groups with sub-questions and fill-in questions with (1)/(2)
+parts, each followed by 【答案】/【难度】/【知识点】/【详解】 blocks.
+
+Usage:
+    python -m benchmarks.generate_paper output.docx --questions 200
+"""
+import argparse
+import io
+import random
+import struct
+import zlib
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.shared import Inches
+
+MATH_NS = 'xmlns:m="http://schemas.openxmlformats.org/officeDocument/2006/math"'
+
+STEM_PHRASES = [
+    "已知函数在区间上单调递增，求实数的取值范围",
+    "下列关于化学反应速率的说法正确的是",
+    "如图所示，在平面直角坐标系中，点的坐标为",
+    "某同学用如图装置测定空气中氧气的含量，下列说法错误的是",
+    "阅读下面的文字，完成题目要求",
+    "设等差数列的前项和为，若，则",
+]
+KNOWLEDGE_POINTS = ["函数的单调性", "化学反应速率", "平面直角坐标系", "等差数列", "氧化还原反应", "受力分析"]
+
+
+class PaperSpec:
+    """Shape of a synthetic paper"""
+
+    def __init__(
+        self,
+        questions: int = 100,
+        material_groups: int = 10,
+        fill_in: int = 10,
+        formulas: int = 2,
+        images: int = 1,
+        tables: int = 1,
+        seed: int = 0,
+    ):
+        """
+        Initialize paper spec
+
+        Args:
+            questions: Regular choice questions
+            material_groups: Material groups, each with three sub-questions
+            fill_in: Fill-in questions, each with two (1)/(2) parts
+            formulas: OMML formulas per choice question
+            images: Images per ten choice questions
+            tables: Data tables and option grids per ten choice questions
+            seed: Random seed, so the same spec always produces the same paper
+        """
+        self.questions = questions
+        self.material_groups = material_groups
+        self.fill_in = fill_in
+        self.formulas = formulas
+        self.images = images
+        self.tables = tables
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def make_png(width: int, height: int, rgb: tuple) -> bytes:
+    """Encode a solid-color RGB PNG (distinct colors give distinct images)"""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgb) * width
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_formula(rng: random.Random) -> str:
+    """Build an OMML formula (fraction, superscript and radical)"""
+    a, b, c = rng.randint(1, 9), rng.randint(2, 9), rng.randint(2, 99)
+    return (
+        f"<m:oMath {MATH_NS}>"
+        f"<m:f><m:num><m:r><m:t>{a}</m:t></m:r></m:num><m:den><m:r><m:t>{b}</m:t></m:r></m:den></m:f>"
+        f"<m:r><m:t>+x</m:t></m:r>"
+        f"<m:sSup><m:e><m:r><m:t>y</m:t></m:r></m:e><m:sup><m:r><m:t>{b}</m:t></m:r></m:sup></m:sSup>"
+        f"<m:r><m:t>-</m:t></m:r>"
+        f"<m:rad><m:radPr><m:degHide m:val=\"1\"/></m:radPr><m:deg/><m:e><m:r><m:t>{c}</m:t></m:r></m:e></m:rad>"
+        f"</m:oMath>"
+    )
+
+
+class PaperGenerator:
+    """Writes a synthetic exam paper for a PaperSpec"""
+
+    def __init__(self, spec: PaperSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.document = Document()
+        self.number = 0
+        self.image_count = 0
+
+    def generate(self, path: str) -> None:
+        """Generate the paper and save it to path"""
+        spec = self.spec
+
+        self.document.add_paragraph("一、选择题")
+        for index in range(spec.questions):
+            self._add_choice_question(index)
+
+        if spec.material_groups:
+            self.document.add_paragraph("二、阅读理解")
+            for _ in range(spec.material_groups):
+                self._add_material_group()
+
+        if spec.fill_in:
+            self.document.add_paragraph("三、填空题")
+            for _ in range(spec.fill_in):
+                self._add_fill_in_question()
+
+        self.document.save(path)
+
+    def _next_number(self) -> int:
+        self.number += 1
+        return self.number
+
+    def _stem(self) -> str:
+        return self.rng.choice(STEM_PHRASES)
+
+    def _add_attributes(self, answer: str, detail: str) -> None:
+        add = self.document.add_paragraph
+        add(f"【答案】{answer}")
+        add(f"【难度】{self.rng.choice(['0.85', '0.65', '0.4'])}")
+        add(f"【知识点】{'，'.join(self.rng.sample(KNOWLEDGE_POINTS, 2))}")
+        add(f"【详解】{detail}")
+
+    def _add_image(self, paragraph) -> None:
+        self.image_count += 1
+        color = (self.image_count * 37 % 256, self.image_count * 91 % 256, self.image_count * 13 % 256)
+        paragraph.add_run().add_picture(io.BytesIO(make_png(16, 16, color)), width=Inches(0.5))
+
+    def _add_choice_question(self, index: int) -> None:
+        spec = self.spec
+        number = self._next_number()
+
+        paragraph = self.document.add_paragraph(f"{number}．{self._stem()}")
+        for _ in range(spec.formulas):
+            paragraph._p.append(parse_xml(make_formula(self.rng)))
+            paragraph.add_run("，")
+        if spec.images and index % 10 < spec.images:
+            self._add_image(paragraph)
+
+        with_table = spec.tables and index % 10 < spec.tables
+        if with_table:
+            self._add_data_table()
+
+        options = ["A．甲", "B．乙", "C．丙", "D．丁"]
+        if with_table:
+            self._add_option_grid(options)
+        elif index % 2:
+            self.document.add_paragraph("　　".join(options[:2]))
+            self.document.add_paragraph("　　".join(options[2:]))
+        else:
+            for option in options:
+                self.document.add_paragraph(option)
+
+        answer = self.rng.choice("ABCD")
+        self._add_attributes(answer, f"解：A、错误；B、错误；故选{answer}。")
+
+    def _add_data_table(self) -> None:
+        table = self.document.add_table(rows=3, cols=3)
+        for row in range(3):
+            for column in range(3):
+                table.cell(row, column).text = str(self.rng.randint(1, 100))
+        table.cell(0, 0).merge(table.cell(0, 1)).text = "实验数据"
+
+    def _add_option_grid(self, options: list) -> None:
+        table = self.document.add_table(rows=2, cols=2)
+        for cell, option in zip([table.cell(0, 0), table.cell(0, 1), table.cell(1, 0), table.cell(1, 1)], options):
+            cell.text = option
+
+    def _add_material_group(self) -> None:
+        add = self.document.add_paragraph
+        add("阅读下列材料，完成下面小题")
+        for _ in range(2):
+            add("材料：" + self._stem() * 3)
+
+        numbers = []
+        for _ in range(3):
+            number = self._next_number()
+            numbers.append(number)
+            add(f"{number}．{self._stem()}")
+            add("A．甲 B．乙 C．丙 D．丁")
+
+        answers = [self.rng.choice("ABCD") for _ in numbers]
+        add("【答案】" + "    ".join(f"{n}．{a}" for n, a in zip(numbers, answers)))
+        add(f"【解析】{numbers[0]}．解析内容")
+        for number, answer in zip(numbers[1:], answers[1:]):
+            add(f"{number}．{answer}、解析内容")
+
+    def _add_fill_in_question(self) -> None:
+        add = self.document.add_paragraph
+        number = self._next_number()
+        paragraph = add(f"{number}．{self._stem()}")
+        paragraph.add_run("______").font.underline = True
+        add("(1)第一空")
+        add("(2)第二空")
+        add("【答案】(1)甲 (2)乙")
+        add("【详解】(1)解析一 (2)解析二")
+
+
+def generate_paper(path: str, spec: PaperSpec) -> None:
+    """
+    Generate a synthetic exam paper
+
+    Args:
+        path: Output .docx path
+        spec: Paper shape
+    """
+    PaperGenerator(spec).generate(path)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add PaperSpec options to a command line parser"""
+    defaults = PaperSpec()
+    parser.add_argument("--questions", type=int, default=defaults.questions, help="Regular choice questions")
+    parser.add_argument("--material-groups", type=int, default=defaults.material_groups, help="Material groups (3 sub-questions each)")
+    parser.add_argument("--fill-in", type=int, default=defaults.fill_in, help="Fill-in questions with (1)/(2) parts")
+    parser.add_argument("--formulas", type=int, default=defaults.formulas, help="OMML formulas per choice question")
+    parser.add_argument("--images", type=int, default=defaults.images, help="Images per ten choice questions")
+    parser.add_argument("--tables", type=int, default=defaults.tables, help="Data tables per ten choice questions")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args: argparse.Namespace) -> PaperSpec:
+    return PaperSpec(
+        questions=args.questions,
+        material_groups=args.material_groups,
+        fill_in=args.fill_in,
+        formulas=args.formulas,
+        images=args.images,
+        tables=args.tables,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic exam paper")
+    parser.add_argument("output", help="Output .docx path")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    generate_paper(args.output, spec_from_args(args))
+    print(f"[OK] Generated {args.output}")
+
+
+if __name__ == "__main__":
+    main()
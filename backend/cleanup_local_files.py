@@ -15,6 +15,8 @@ print("="*60)
 # Get directory info
 upload_dir = Path(settings.upload_dir)
 image_dir = Path(settings.image_dir)
+# Shared content-addressed image store, not a task folder
+BLOB_DIR_NAME = 'blobs'
 
 print(f"\n[Storage Locations]")
 print(f"  Upload directory: {upload_dir}")
@@ -38,7 +40,7 @@ def format_size(size_bytes):
 
 # Count files
 upload_count = len(list(upload_dir.glob('*.docx'))) if upload_dir.exists() else 0
-image_dirs = len([d for d in image_dir.iterdir() if d.is_dir()]) if image_dir.exists() else 0
+image_dirs = len([d for d in image_dir.iterdir() if d.is_dir() and d.name != BLOB_DIR_NAME]) if image_dir.exists() else 0
 image_count = len(list(image_dir.rglob('*.*'))) if image_dir.exists() else 0
 
 upload_size = get_dir_size(upload_dir)
@@ -168,7 +170,7 @@ elif choice == '5':
         print("\n[INFO] No task folders found")
     else:
         print("\n[Task Folders]")
-        folders = [d for d in image_dir.iterdir() if d.is_dir()]
+        folders = [d for d in image_dir.iterdir() if d.is_dir() and d.name != BLOB_DIR_NAME]
         for idx, folder in enumerate(folders, 1):
             file_count = len(list(folder.glob('*')))
             size = get_dir_size(folder)
@@ -210,7 +212,7 @@ elif choice == '6':
     print("\n[Image Folders]")
     if image_dir.exists():
         for folder in sorted(image_dir.iterdir(), key=lambda f: f.stat().st_mtime, reverse=True):
-            if folder.is_dir():
+            if folder.is_dir() and folder.name != BLOB_DIR_NAME:
                 file_count = len(list(folder.glob('*')))
                 size = get_dir_size(folder)
                 mtime = datetime.fromtimestamp(folder.stat().st_mtime)
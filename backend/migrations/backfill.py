@@ -0,0 +1,194 @@
+"""
+Frozen helpers for data migrations
+
+Revisions that backfill derived columns must keep writing what they wrote
+when they were created, whatever the application code does later. The
+text processing they need is therefore copied here instead of imported
+from app; a revision that needs different output adds a new versioned
+function rather than changing an existing one.
+"""
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional
+
+import sqlalchemy as sa
+
+BACKFILL_BATCH_SIZE = 1000
+
+# As in app.core.text_search when 004_question_search was created
+_BLOCK_TAGS = {"p", "br", "div", "li", "tr", "td", "th", "table", "img"}
+_SKIPPED_TAGS = {"annotation", "annotation-xml", "script", "style"}
+_TERM_PATTERN = re.compile(r"([㐀-䶿一-鿿豈-﫿]+)|([0-9a-z]+)")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        tag = tag.rsplit(":", 1)[-1]
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag.rsplit(":", 1)[-1] in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        tag = tag.rsplit(":", 1)[-1]
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: Optional[str]) -> str:
+    """Flatten question HTML to plain text (app.core.text_search.html_to_text as of 004)"""
+    if not html:
+        return ""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return " ".join("".join(extractor.parts).split())
+
+
+def tokenize_v1(text: str) -> List[str]:
+    """Search terms as of 004: bigrams, a single-character run stays a unigram"""
+    terms: List[str] = []
+    for cjk, word in _TERM_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if word:
+            terms.append(word)
+        elif len(cjk) == 1:
+            terms.append(cjk)
+        else:
+            terms.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return terms
+
+
+def tokenize_v2(text: str) -> List[str]:
+    """Search terms as of 006: every character starts a term, the last one alone"""
+    terms: List[str] = []
+    for cjk, word in _TERM_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if word:
+            terms.append(word)
+        else:
+            terms.extend(cjk[i:i + 2] for i in range(len(cjk)))
+    return terms
+
+
+def search_terms(html_parts: Iterable[Optional[str]], tokenize: Callable[[str], List[str]]) -> str:
+    """Space-separated search terms of some question content"""
+    terms: List[str] = []
+    for html in html_parts:
+        terms.extend(tokenize(html_to_text(html)))
+    return " ".join(terms)
+
+
+def backfill_search_terms(bind, tokenize: Callable[[str], List[str]]) -> None:
+    """
+    Rewrite questions.stem_terms and analysis_terms from question_contents
+
+    Args:
+        bind: Migration connection
+        tokenize: Frozen tokenizer of the calling revision
+    """
+    contents = bind.execute(sa.text(
+        "SELECT question_id, content_type, html FROM question_contents "
+        "ORDER BY question_id, id"
+    ))
+
+    parts = {}
+    for question_id, content_type, html in contents:
+        stem_parts, analysis_parts = parts.setdefault(question_id, ([], []))
+        if content_type == 'OPTIONS':
+            # Options are stored joined with <br>, which the text extraction splits on
+            stem_parts.append(html)
+        elif content_type == 'STEM':
+            stem_parts.insert(0, html)
+        else:
+            analysis_parts.append(html)
+
+    update = sa.text("UPDATE questions SET stem_terms = :stem_terms, analysis_terms = :analysis_terms WHERE id = :id")
+    rows = [
+        {
+            "id": question_id,
+            "stem_terms": search_terms(stem, tokenize),
+            "analysis_terms": search_terms(analysis, tokenize),
+        }
+        for question_id, (stem, analysis) in parts.items()
+    ]
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        bind.execute(update, rows[start:start + BACKFILL_BATCH_SIZE])
+
+
+# MinHash/LSH as in app.core.dedup when 005_question_dedup was created.
+# Signatures written by a backfill must stay comparable with the ones the
+# application computes; tests/test_migrations.py checks that they still are.
+DEDUP_THRESHOLD_V1 = 0.7
+_NUM_PERMUTATIONS = 64
+_LSH_BANDS = 16
+_LSH_ROWS = _NUM_PERMUTATIONS // _LSH_BANDS
+_SHINGLE_SIZE = 3
+_MIN_TEXT_LENGTH = 12
+_MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(20260122)
+_PERMUTATIONS = [
+    (_random.randrange(1, _MERSENNE_PRIME), _random.randrange(0, _MERSENNE_PRIME))
+    for _ in range(_NUM_PERMUTATIONS)
+]
+_NOISE_PATTERN = re.compile(r"[\W_]+")
+
+
+def minhash_signature_v1(html_parts: Iterable[Optional[str]]) -> Optional[List[int]]:
+    """MinHash signature of question HTML (material, stem, options), or None if too short"""
+    text = "".join(html_to_text(html) for html in html_parts)
+    text = _NOISE_PATTERN.sub("", unicodedata.normalize("NFKC", text).lower())
+    if len(text) < _MIN_TEXT_LENGTH:
+        return None
+    shingles = {
+        zlib.crc32(text[i:i + _SHINGLE_SIZE].encode("utf-8"))
+        for i in range(len(text) - _SHINGLE_SIZE + 1)
+    }
+    return [
+        min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def lsh_bands_v1(signature: List[int]) -> List[int]:
+    """Signed 64-bit LSH band keys of a signature"""
+    keys = []
+    for band in range(_LSH_BANDS):
+        rows = signature[band * _LSH_ROWS:(band + 1) * _LSH_ROWS]
+        digest = hashlib.blake2b(
+            struct.pack(f"<H{_LSH_ROWS}Q", band, *rows), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def most_similar_v1(
+    signature: List[int], bands: List[int], buckets: Dict[int, List[int]],
+    signatures: Dict[int, List[int]], threshold: float
+) -> Optional[int]:
+    """Key of the most similar indexed signature sharing a band, if similar enough"""
+    best, best_similarity = None, threshold
+    candidates = {key for band in bands for key in buckets.get(band, ())}
+    for key in sorted(candidates):
+        similarity = sum(1 for a, b in zip(signature, signatures[key]) if a == b) / _NUM_PERMUTATIONS
+        if similarity > best_similarity or (similarity == best_similarity and best is None):
+            best, best_similarity = key, similarity
+    return best
@@ -11,7 +11,7 @@ from app.database import Base
 from app.config import get_settings
 
 # Import all models so Alembic can detect them
-from app.models.database import paper, question, question_content, question_group, image
+from app.models.database import paper, question, question_content, question_group, question_signature, image
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
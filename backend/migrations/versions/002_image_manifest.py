@@ -0,0 +1,28 @@
+"""Image manifest columns
+
+Revision ID: 002_image_manifest
+Revises: 001_initial
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002_image_manifest'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-task image number and content hash, so images can be served from the manifest
+    op.add_column('images', sa.Column('image_id', sa.Integer(), nullable=False))
+    op.add_column('images', sa.Column('sha256', sa.String(64), nullable=False))
+    op.create_unique_constraint('uq_images_task_id_image_id', 'images', ['task_id', 'image_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_images_task_id_image_id', 'images', type_='unique')
+    op.drop_column('images', 'sha256')
+    op.drop_column('images', 'image_id')
@@ -0,0 +1,30 @@
+"""Question bank query indexes
+
+Revision ID: 003_question_query_indexes
+Revises: 002_image_manifest
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_question_query_indexes'
+down_revision = '002_image_manifest'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Type/difficulty filters; id last so each (type, difficulty) range is already in keyset order
+    op.create_index('ix_questions_type_difficulty_id', 'questions', ['type', 'difficulty', 'id'], unique=False)
+    # Knowledge point containment (knowledge_points @> ARRAY[...])
+    op.create_index('ix_questions_knowledge_points', 'questions', ['knowledge_points'], unique=False, postgresql_using='gin')
+    # Subject filter on the paper metadata
+    op.create_index('ix_papers_subject', 'papers', [sa.text("(paper_metadata ->> 'subject')")], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_papers_subject', table_name='papers')
+    op.drop_index('ix_questions_knowledge_points', table_name='questions')
+    op.drop_index('ix_questions_type_difficulty_id', table_name='questions')
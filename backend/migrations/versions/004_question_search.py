@@ -0,0 +1,43 @@
+"""Question full-text search
+
+Revision ID: 004_question_search
+Revises: 003_question_query_indexes
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.backfill import backfill_search_terms, tokenize_v1
+
+# revision identifiers, used by Alembic.
+revision = '004_question_search'
+down_revision = '003_question_query_indexes'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(stem_terms, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(analysis_terms, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # Bigram search terms built by the application, weighted into a generated tsvector
+    op.add_column('questions', sa.Column('stem_terms', sa.Text(), nullable=True))
+    op.add_column('questions', sa.Column('analysis_terms', sa.Text(), nullable=True))
+    op.add_column(
+        'questions',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True)),
+    )
+    op.create_index('ix_questions_search_vector', 'questions', ['search_vector'], unique=False, postgresql_using='gin')
+
+    backfill_search_terms(op.get_bind(), tokenize_v1)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_questions_search_vector', table_name='questions')
+    op.drop_column('questions', 'search_vector')
+    op.drop_column('questions', 'analysis_terms')
+    op.drop_column('questions', 'stem_terms')
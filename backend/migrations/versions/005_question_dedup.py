@@ -0,0 +1,105 @@
+"""Near-duplicate question signatures
+
+Revision ID: 005_question_dedup
+Revises: 004_question_search
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.backfill import (
+    BACKFILL_BATCH_SIZE,
+    DEDUP_THRESHOLD_V1,
+    lsh_bands_v1,
+    minhash_signature_v1,
+    most_similar_v1,
+)
+
+# revision identifiers, used by Alembic.
+revision = '005_question_dedup'
+down_revision = '004_question_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('duplicate_of', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_questions_duplicate_of', 'questions', 'questions',
+        ['duplicate_of'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_questions_duplicate_of'), 'questions', ['duplicate_of'], unique=False)
+
+    # MinHash signature and LSH band keys per question (see app.core.dedup)
+    op.create_table(
+        'question_signatures',
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('minhash', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column('lsh_bands', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('question_id')
+    )
+    op.create_index(
+        'ix_question_signatures_lsh_bands', 'question_signatures', ['lsh_bands'],
+        unique=False, postgresql_using='gin'
+    )
+
+    backfill_signatures()
+
+
+def backfill_signatures() -> None:
+    """Sign questions saved before this revision and link their duplicates in ID order"""
+    bind = op.get_bind()
+    materials = dict(bind.execute(sa.text("SELECT id, material_content FROM question_groups")).all())
+    group_by_question = dict(bind.execute(sa.text("SELECT id, group_id FROM questions")).all())
+
+    parts = {}
+    contents = bind.execute(sa.text(
+        "SELECT question_id, content_type, html FROM question_contents "
+        "WHERE content_type IN ('STEM', 'OPTIONS') ORDER BY question_id, id"
+    ))
+    for question_id, content_type, html in contents:
+        question_parts = parts.setdefault(question_id, [])
+        if content_type == 'STEM':
+            question_parts.insert(0, html)
+        else:
+            # Options are stored joined with <br>; the text is concatenated anyway
+            question_parts.append(html)
+
+    buckets = {}
+    signatures = {}
+    signature_rows = []
+    duplicate_rows = []
+    for question_id in sorted(parts):
+        material = materials.get(group_by_question.get(question_id))
+        signature = minhash_signature_v1([material] + parts[question_id])
+        if signature is None:
+            continue
+        bands = lsh_bands_v1(signature)
+        duplicate_of = most_similar_v1(signature, bands, buckets, signatures, DEDUP_THRESHOLD_V1)
+        if duplicate_of is not None:
+            duplicate_rows.append({"id": question_id, "duplicate_of": duplicate_of})
+        signatures[question_id] = signature
+        for band in bands:
+            buckets.setdefault(band, []).append(question_id)
+        signature_rows.append({"question_id": question_id, "minhash": signature, "lsh_bands": bands})
+
+    insert = sa.text(
+        "INSERT INTO question_signatures (question_id, minhash, lsh_bands) "
+        "VALUES (:question_id, :minhash, :lsh_bands)"
+    )
+    update = sa.text("UPDATE questions SET duplicate_of = :duplicate_of WHERE id = :id")
+    for rows, statement in ((signature_rows, insert), (duplicate_rows, update)):
+        for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+            bind.execute(statement, rows[start:start + BACKFILL_BATCH_SIZE])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_question_signatures_lsh_bands', table_name='question_signatures')
+    op.drop_table('question_signatures')
+    op.drop_index(op.f('ix_questions_duplicate_of'), table_name='questions')
+    op.drop_constraint('fk_questions_duplicate_of', 'questions', type_='foreignkey')
+    op.drop_column('questions', 'duplicate_of')
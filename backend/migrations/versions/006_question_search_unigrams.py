@@ -0,0 +1,28 @@
+"""Rebuild question search terms with run-final characters
+
+Revision ID: 006_question_search_unigrams
+Revises: 005_question_dedup
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+from migrations.backfill import backfill_search_terms, tokenize_v2
+
+# revision identifiers, used by Alembic.
+revision = '006_question_search_unigrams'
+down_revision = '005_question_dedup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # tokenize now also emits the last character of each Chinese run, so a
+    # single character is found wherever it occurs; the generated
+    # search_vector follows the rewritten terms
+    backfill_search_terms(op.get_bind(), tokenize_v2)
+
+
+def downgrade() -> None:
+    # The extra terms are harmless to the earlier query builder; nothing to undo
+    pass
@@ -0,0 +1,90 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from app.api.v1 import paper
+
+
+def make_zip(members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def upload(filename: str, data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(paper.settings, "max_file_size", 1000)
+    monkeypatch.setattr(paper.settings, "batch_max_size", 3000)
+    monkeypatch.setattr(paper.settings, "batch_max_files", 10)
+    monkeypatch.setattr(paper.settings, "upload_chunk_size", 256)
+
+
+def stage(files, staging_dir):
+    return asyncio.run(paper.stage_batch_documents(files, str(staging_dir)))
+
+
+def test_stages_docx_files_and_zip_members_in_order(limits, tmp_path):
+    archive = make_zip([
+        ("卷二.docx", b"b" * 100),
+        ("__MACOSX/._卷二.docx", b"junk"),
+        ("~$lock.docx", b"junk"),
+        ("readme.txt", b"x"),
+    ])
+    documents = stage([upload("卷一.docx", b"a" * 100), upload("papers.zip", archive)], tmp_path)
+
+    assert [name for name, _, _ in documents] == ["卷一.docx", "卷二.docx"]
+    with open(documents[1][1], "rb") as f:
+        assert f.read() == b"b" * 100
+
+
+def test_extracted_documents_share_one_batch_budget(limits, tmp_path):
+    # The archives are small, and each extracts within the budget on its own;
+    # together they extract 3200 bytes
+    first = make_zip([("a.docx", b"a" * 800), ("b.docx", b"b" * 800)])
+    second = make_zip([("c.docx", b"c" * 800), ("d.docx", b"d" * 800)])
+
+    with pytest.raises(HTTPException) as error:
+        stage([upload("one.zip", first), upload("two.zip", second)], tmp_path)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Batch size exceeds maximum limit"
+
+
+def test_oversized_document_is_named(limits, tmp_path):
+    archive = make_zip([("big.docx", b"x" * 1001)])
+
+    with pytest.raises(HTTPException) as error:
+        stage([upload("papers.zip", archive)], tmp_path)
+    assert error.value.detail == "papers.zip contains a document that exceeds the size limit"
+
+    with pytest.raises(HTTPException) as error:
+        stage([upload("big.docx", b"x" * 1001)], tmp_path)
+    assert error.value.detail == "big.docx exceeds the size limit"
+
+
+def test_too_many_documents(limits, monkeypatch, tmp_path):
+    monkeypatch.setattr(paper.settings, "batch_max_files", 2)
+    archive = make_zip([(f"{i}.docx", b"x") for i in range(3)])
+
+    with pytest.raises(HTTPException) as error:
+        stage([upload("papers.zip", archive)], tmp_path)
+    assert error.value.detail == "Batch exceeds 2 documents"
+
+
+def test_rejects_unsupported_files(limits, tmp_path):
+    with pytest.raises(HTTPException) as error:
+        stage([upload("paper.pdf", b"%PDF")], tmp_path)
+    assert error.value.status_code == 400
+
+    with pytest.raises(HTTPException) as error:
+        stage([upload("papers.zip", b"not a zip")], tmp_path)
+    assert error.value.detail == "Invalid or unsupported ZIP archive: papers.zip"
@@ -0,0 +1,63 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.body_limit import MULTIPART_OVERHEAD, BodySizeLimitMiddleware
+
+LIMIT = 1000
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/upload": LIMIT})
+    received = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        received.append(file.filename)
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app), received
+
+
+def test_accepts_bodies_within_the_limit():
+    client, received = make_client()
+    response = client.post("/upload", files={"file": ("a.docx", b"x" * LIMIT)})
+    assert response.status_code == 200
+    assert response.json() == {"size": LIMIT}
+    assert received == ["a.docx"]
+
+
+def test_rejects_declared_oversized_bodies_before_reading():
+    client, received = make_client()
+    response = client.post("/upload", files={"file": ("a.docx", b"x" * (LIMIT + MULTIPART_OVERHEAD + 1))})
+    assert response.status_code == 413
+    assert received == []
+
+
+def test_cuts_off_bodies_without_content_length():
+    client, received = make_client()
+    chunk = b"x" * 65536
+
+    def body():
+        yield b"--boundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.docx\"\r\n\r\n"
+        for _ in range((LIMIT + MULTIPART_OVERHEAD) // len(chunk) + 2):
+            yield chunk
+        yield b"\r\n--boundary--\r\n"
+
+    response = client.post(
+        "/upload",
+        content=body(),
+        headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+    )
+    assert response.status_code == 413
+    assert received == []
+
+
+def test_other_paths_are_not_limited():
+    client, _ = make_client()
+    response = client.post("/other", files={"file": ("a.docx", b"x" * (LIMIT + MULTIPART_OVERHEAD + 1))})
+    assert response.status_code == 200
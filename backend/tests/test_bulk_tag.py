@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from app.services.question_service import QuestionService
+
+
+class FakeResult:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+class FakeSession:
+    """Records UPDATE statements, each matching rowcount rows; fails on the statement numbered fail_at"""
+
+    def __init__(self, rowcount=2, fail_at=None):
+        self.statements = []
+        self.rowcount = rowcount
+        self.fail_at = fail_at
+        self.committed = False
+        self.rolled_back = False
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        if len(self.statements) == self.fail_at:
+            raise OperationalError("UPDATE", {}, Exception("connection lost"))
+        return FakeResult(self.rowcount)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def compiled(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+
+def test_ids_are_deduplicated_and_chunked():
+    db = FakeSession()
+
+    updated = QuestionService(db).bulk_tag_questions([1, 2, 2, 3, 4, 5], difficulty=3, chunk_size=2)
+
+    # Summed rowcount of the chunk UPDATEs
+    assert updated == 6
+    assert db.committed
+    assert [compiled(statement).params["param_1"] for statement in db.statements] == [[1, 2], [3, 4], [5]]
+    sql = str(compiled(db.statements[0]))
+    assert "SET difficulty=%(difficulty)s" in sql
+    assert "WHERE tiku.questions.id = ANY (%(param_1)s::INTEGER[])" in sql
+    assert "knowledge_points" not in sql
+
+
+def test_knowledge_points_are_edited_in_place():
+    db = FakeSession()
+
+    QuestionService(db).bulk_tag_questions(
+        [1], question_type="填空题",
+        add_knowledge_points=["kp1", "kp2", "kp1"], remove_knowledge_points=["kp3", "kp3"],
+    )
+
+    statement = compiled(db.statements[0])
+    sql = str(statement)
+    assert "type=%(type)s" in sql
+    assert sql.count("array_remove(") == 2  # once in SET, once in the NOT ANY check
+    assert "array_cat(" in sql
+    assert "WITH ORDINALITY" in sql
+    assert "ORDER BY anon_1.position" in sql
+    params = statement.params
+    assert params["type"] == "填空题"
+    assert params["array_remove_1"] == "kp3"
+    assert ["kp1", "kp2"] in params.values()
+
+
+def test_only_removals_skip_the_append():
+    db = FakeSession()
+
+    QuestionService(db).bulk_tag_questions([1], remove_knowledge_points=["kp3"])
+
+    sql = str(compiled(db.statements[0]))
+    assert "array_remove(" in sql
+    assert "array_cat(" not in sql
+
+
+def test_failure_rolls_back_every_chunk():
+    db = FakeSession(fail_at=2)
+
+    with pytest.raises(OperationalError):
+        QuestionService(db).bulk_tag_questions([1, 2, 3], difficulty=2, chunk_size=2)
+
+    assert db.rolled_back
+    assert not db.committed
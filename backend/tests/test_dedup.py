@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Insert, Select, Update
+
+from app.core.dedup import (
+    LSH_BANDS,
+    NUM_PERMUTATIONS,
+    LshIndex,
+    estimate_similarity,
+    lsh_bands,
+    minhash_signature,
+    normalize_text,
+)
+from app.models.schemas.question import QuestionItem
+from app.services.dedup_service import DedupService, question_signature
+
+STEM = "<p>下列关于化学反应速率的说法正确的是：升高温度，反应速率一定增大</p>"
+OPTIONS = ["A．增大压强", "B．加入催化剂", "C．降低温度", "D．增加反应物浓度"]
+
+
+def signature_of(*parts):
+    return minhash_signature(normalize_text(parts))
+
+
+def test_normalize_text_drops_markup_punctuation_and_case():
+    assert normalize_text(["<p>Ａ. Hello,  <b>World</b>！</p>", None, "<p>x<sup>2</sup></p>"]) == "ahelloworldx2"
+
+
+def test_short_texts_have_no_signature():
+    assert minhash_signature("求x的值") is None
+
+
+def test_signatures_are_deterministic_and_sized():
+    signature = signature_of(STEM, *OPTIONS)
+    assert signature == signature_of(STEM, *OPTIONS)
+    assert len(signature) == NUM_PERMUTATIONS
+    assert all(0 <= value < 1 << 61 for value in signature)
+    bands = lsh_bands(signature)
+    assert len(bands) == LSH_BANDS
+    assert all(-(1 << 63) <= band < 1 << 63 for band in bands)
+
+
+def test_similarity_follows_text_overlap():
+    original = signature_of(STEM, *OPTIONS)
+    reformatted = signature_of(STEM.replace("：", ", ").replace("<p>", "<p><b>"), *OPTIONS)
+    edited = signature_of(STEM.replace("一定", "不一定"), *OPTIONS)
+    unrelated = signature_of("<p>已知函数f(x)=x²-2x+3，求f(x)在区间[0,3]上的最大值和最小值</p>")
+
+    assert estimate_similarity(original, reformatted) == 1
+    assert estimate_similarity(original, edited) >= 0.7
+    assert estimate_similarity(original, unrelated) < 0.3
+
+
+def test_lsh_index_returns_similar_signatures_first():
+    original = signature_of(STEM, *OPTIONS)
+    edited = signature_of(STEM.replace("一定", "不一定"), *OPTIONS)
+    unrelated = signature_of("<p>已知函数f(x)=x²-2x+3，求f(x)在区间[0,3]上的最大值和最小值</p>")
+    index = LshIndex()
+    index.add(1, edited)
+    index.add(2, original)
+    index.add(3, unrelated)
+
+    matches = index.query(original, 0.7)
+    assert [key for key, _ in matches] == [2, 1]
+    assert matches[0][1] == 1
+
+
+def test_question_signature_includes_material_and_options():
+    question = QuestionItem(id="1", number="1", type="选择题", stem=STEM, options=OPTIONS, answer="")
+    assert question_signature(question) == signature_of(STEM, *OPTIONS)
+    assert question_signature(question, "<p>材料</p>") == signature_of("<p>材料</p>", STEM, *OPTIONS)
+
+
+class FakeSession:
+    """Records executed statements; SELECTs return the given bank rows"""
+
+    def __init__(self, bank_rows=()):
+        self.bank_rows = list(bank_rows)
+        self.executed = []
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+        if isinstance(statement, Select):
+            return iter(self.bank_rows)
+        return None
+
+
+def bank_row(question_id, signature, task_id="other", number="7"):
+    return SimpleNamespace(
+        question_id=question_id, minhash=signature, lsh_bands=lsh_bands(signature),
+        task_id=task_id, number=number,
+    )
+
+
+def test_find_bank_duplicates_queries_band_overlap():
+    original = signature_of(STEM, *OPTIONS)
+    unrelated = signature_of("<p>已知函数f(x)=x²-2x+3，求f(x)在区间[0,3]上的最大值和最小值</p>")
+    db = FakeSession([bank_row(10, original), bank_row(11, unrelated)])
+
+    matches = DedupService(db).find_bank_duplicates({"a": original, "b": unrelated}, 0.7, exclude_task_id="t1")
+
+    assert [match.questionId for match in matches["a"]] == [10]
+    assert [match.questionId for match in matches["b"]] == [11]
+    sql = str(db.executed[0][0].compile(dialect=postgresql.dialect()))
+    assert "question_signatures.lsh_bands && " in sql
+    assert "questions.task_id != " in sql
+
+
+def test_find_bank_duplicates_without_signatures_skips_the_query():
+    db = FakeSession()
+    assert DedupService(db).find_bank_duplicates({}, 0.7) == {}
+    assert db.executed == []
+
+
+def test_record_questions_links_bank_and_earlier_duplicates():
+    original = signature_of(STEM, *OPTIONS)
+    edited = signature_of(STEM.replace("一定", "不一定"), *OPTIONS)
+    unrelated = signature_of("<p>已知函数f(x)=x²-2x+3，求f(x)在区间[0,3]上的最大值和最小值</p>")
+    db = FakeSession([bank_row(10, edited)])
+
+    marked = DedupService(db).record_questions(
+        "t1", [(1, unrelated), (2, None), (3, original), (4, original)], 0.7
+    )
+
+    assert marked == 2
+    (_, _), (insert_statement, signature_rows), (update_statement, duplicate_rows) = db.executed
+    assert isinstance(insert_statement, Insert)
+    assert [row["question_id"] for row in signature_rows] == [1, 3, 4]
+    assert signature_rows[1]["lsh_bands"] == lsh_bands(original)
+    assert isinstance(update_statement, Update)
+    # An exact copy earlier in the submission beats a near-duplicate in the bank
+    assert duplicate_rows == [{"id": 3, "duplicate_of": 10}, {"id": 4, "duplicate_of": 3}]
@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+from app.core import metrics
+from app.core.metrics import Counter, Histogram, MetricsRegistry, _format_value
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0, "0"),
+    (3, "3"),
+    (2.0, "2"),
+    (0.25, "0.25"),
+    (1e-05, "1e-05"),
+    (math.inf, "+Inf"),
+])
+def test_format_value(value, expected):
+    assert _format_value(value) == expected
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h", "Test histogram", ["stage"], buckets=(1, 0.1, 10))
+    for value in (0.05, 0.5, 0.5, 5, 50):
+        histogram.observe(value, stage="load")
+
+    assert histogram.render() == [
+        "# HELP h Test histogram",
+        "# TYPE h histogram",
+        'h_bucket{stage="load",le="0.1"} 1',
+        'h_bucket{stage="load",le="1"} 3',
+        'h_bucket{stage="load",le="10"} 4',
+        'h_bucket{stage="load",le="+Inf"} 5',
+        'h_sum{stage="load"} 56.05',
+        'h_count{stage="load"} 5',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("c", "Test counter", ["item"])
+    counter.inc(item='say "hi"\\\nbye')
+
+    assert counter.render()[-1] == 'c{item="say \\"hi\\"\\\\\\nbye"} 1'
+
+
+def test_labels_must_match_label_names():
+    counter = Counter("c", "Test counter", ["item"])
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+
+
+def test_registry_renders_every_metric():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("jobs", "Jobs", ["status"]))
+    counter.inc(status="completed")
+    counter.inc(2, status="failed")
+
+    assert registry.render() == (
+        "# HELP jobs Jobs\n"
+        "# TYPE jobs counter\n"
+        'jobs{status="completed"} 1\n'
+        'jobs{status="failed"} 2\n'
+    )
+
+
+def test_record_parse_stats(monkeypatch):
+    stage_seconds = Histogram("s", "Stages", ["stage"], buckets=(1,))
+    question_seconds = Histogram("q", "Questions", buckets=(1,))
+    items = Counter("i", "Items", ["item"])
+    monkeypatch.setattr(metrics, "parse_stage_seconds", stage_seconds)
+    monkeypatch.setattr(metrics, "parse_question_seconds", question_seconds)
+    monkeypatch.setattr(metrics, "parse_items_total", items)
+
+    metrics.record_parse_stats({
+        "stagesMs": {"tokens": 1500, "formulas": 500},
+        "counts": {"paragraphs": 12},
+        "questionsMs": [{"number": "1", "ms": 20}, {"number": "2", "ms": 30}],
+    })
+
+    assert 'i{item="paragraphs"} 12' in items.render()
+    assert 's_sum{stage="tokens"} 1.5' in stage_seconds.render()
+    assert 's_sum{stage="formulas"} 0.5' in stage_seconds.render()
+    assert "q_count 2" in question_seconds.render()
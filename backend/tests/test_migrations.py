@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+
+from app.core.dedup import lsh_bands, minhash_signature, normalize_text
+from app.core.text_search import search_terms as app_search_terms
+from migrations.backfill import (
+    backfill_search_terms,
+    lsh_bands_v1,
+    minhash_signature_v1,
+    search_terms,
+    tokenize_v1,
+    tokenize_v2,
+)
+
+VERSIONS_DIR = Path(__file__).resolve().parent.parent / "migrations" / "versions"
+
+SAMPLES = [
+    ["<p>加入少量水，求x的值</p>", "A．H<sub>2</sub>O", "B．２mol NaCl"],
+    ["<p>已知函数<math><mi>f</mi><mo>(</mo><mi>x</mi><mo>)</mo>"
+     "<annotation>f(x)</annotation></math>在区间上单调递增</p>"],
+    [None, "<table><tr><td>化学反应</td><td>速率</td></tr></table>"],
+]
+
+
+@pytest.mark.parametrize("path", sorted(VERSIONS_DIR.glob("*.py")), ids=lambda path: path.name)
+def test_revisions_do_not_import_application_logic(path):
+    # Models are fine for schema changes; data backfills use migrations.backfill
+    source = path.read_text(encoding="utf-8")
+    assert "from app.core" not in source
+    assert "get_settings" not in source
+
+
+def test_tokenize_v1_is_frozen():
+    assert tokenize_v1("化学反应 求x的值") == ["化学", "学反", "反应", "求", "x", "的值"]
+
+
+def test_tokenize_v2_is_frozen():
+    assert tokenize_v2("化学反应 求x的值") == ["化学", "学反", "反应", "应", "求", "x", "的值", "值"]
+
+
+@pytest.mark.parametrize("parts", SAMPLES)
+def test_latest_search_terms_match_the_application(parts):
+    # If this fails, the tokenizer changed: add a tokenize_vN and a revision
+    # that backfills with it instead of editing tokenize_v2
+    assert search_terms(parts, tokenize_v2) == app_search_terms(parts)
+
+
+@pytest.mark.parametrize("parts", SAMPLES)
+def test_backfilled_signatures_match_the_application(parts):
+    # Stored signatures are compared with the ones the application computes;
+    # if this fails, signatures need a new revision that recomputes them
+    signature = minhash_signature_v1(parts)
+    assert signature == minhash_signature(normalize_text(parts))
+    if signature is not None:
+        assert lsh_bands_v1(signature) == lsh_bands(signature)
+
+
+def test_backfill_search_terms():
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as bind:
+        bind.execute(sa.text(
+            "CREATE TABLE questions (id INTEGER PRIMARY KEY, stem_terms TEXT, analysis_terms TEXT)"
+        ))
+        bind.execute(sa.text(
+            "CREATE TABLE question_contents (id INTEGER PRIMARY KEY, question_id INTEGER, "
+            "content_type TEXT, html TEXT)"
+        ))
+        bind.execute(sa.text("INSERT INTO questions (id) VALUES (1), (2)"))
+        bind.execute(sa.text("INSERT INTO question_contents VALUES (:id, :question_id, :type, :html)"), [
+            {"id": 1, "question_id": 1, "type": "OPTIONS", "html": "A．食盐<br>B．加水"},
+            {"id": 2, "question_id": 1, "type": "STEM", "html": "<p>溶液</p>"},
+            {"id": 3, "question_id": 1, "type": "ANALYSIS", "html": "x的值"},
+            {"id": 4, "question_id": 2, "type": "ANSWER", "html": "略"},
+        ])
+
+        backfill_search_terms(bind, tokenize_v2)
+        rows = bind.execute(sa.text(
+            "SELECT id, stem_terms, analysis_terms FROM questions ORDER BY id"
+        )).all()
+
+    assert rows == [
+        (1, "溶液 液 a 食盐 盐 b 加水 水", "x 的值 值"),
+        (2, "", "略"),
+    ]
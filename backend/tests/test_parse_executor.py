@@ -0,0 +1,206 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core import parse_executor as parse_executor_module
+from app.core.parse_executor import FairScheduler, ParseExecutor, ParseTimeoutError
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_fair_scheduler_admits_up_to_capacity():
+    async def scenario():
+        scheduler = FairScheduler(2)
+        await scheduler.acquire("a")
+        await scheduler.acquire("a")
+        waiter = asyncio.ensure_future(scheduler.acquire("a"))
+        await asyncio.sleep(0)
+        assert (scheduler.running, scheduler.waiting) == (2, 1)
+        assert not waiter.done()
+
+        scheduler.release()
+        await waiter
+        assert (scheduler.running, scheduler.waiting) == (2, 0)
+
+    run(scenario())
+
+
+def test_fair_scheduler_alternates_between_owners():
+    async def scenario():
+        scheduler = FairScheduler(1)
+        await scheduler.acquire("first")
+        admitted = []
+
+        async def job(owner, name):
+            await scheduler.acquire(owner)
+            admitted.append(name)
+
+        # A batch queues three jobs before a single upload arrives
+        jobs = [asyncio.ensure_future(job("batch", f"batch-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        jobs.append(asyncio.ensure_future(job("single", "single")))
+        await asyncio.sleep(0)
+
+        for _ in jobs:
+            scheduler.release()
+            await asyncio.sleep(0)
+        assert admitted == ["batch-0", "single", "batch-1", "batch-2"]
+
+    run(scenario())
+
+
+def test_fair_scheduler_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = FairScheduler(1)
+        await scheduler.acquire("a")
+        waiter = asyncio.ensure_future(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.waiting == 0
+
+        scheduler.release()
+        assert scheduler.running == 0
+
+    run(scenario())
+
+
+def test_fair_scheduler_cancelled_after_handover_passes_the_turn_on():
+    async def scenario():
+        scheduler = FairScheduler(1)
+        await scheduler.acquire("a")
+        cancelled = asyncio.ensure_future(scheduler.acquire("b"))
+        next_in_line = asyncio.ensure_future(scheduler.acquire("c"))
+        await asyncio.sleep(0)
+
+        # The turn is handed to "b", which is cancelled before it resumes
+        scheduler.release()
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        await next_in_line
+        assert (scheduler.running, scheduler.waiting) == (1, 0)
+
+    run(scenario())
+
+
+def test_queue_slots():
+    executor = ParseExecutor(max_workers=1, max_queued=2, timeout=10)
+    assert executor.acquire_slot()
+    assert executor.acquire_slot()
+    assert not executor.acquire_slot()
+    assert executor.slots_in_use == 2
+
+    executor.release_slot()
+    executor.release_slot()
+    executor.release_slot()
+    assert executor.slots_in_use == 0
+
+
+@pytest.fixture
+def thread_executor(monkeypatch):
+    """ParseExecutor whose jobs run fake_job in a thread pool"""
+    calls = []
+    gates = {}
+
+    def fake_job(file_path, task_id, event_queue=None, rule_set=None):
+        calls.append(task_id)
+        gates[task_id].wait(5)
+        return [task_id]
+
+    executor = ParseExecutor(max_workers=1, max_queued=4, timeout=0.2)
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(parse_executor_module, "run_parse_job", fake_job)
+    monkeypatch.setattr(executor, "_get_pool", lambda: pool)
+    yield executor, calls, gates
+    for gate in gates.values():
+        gate.set()
+    pool.shutdown(wait=True)
+
+
+def test_run_returns_job_result(thread_executor):
+    executor, calls, gates = thread_executor
+    gates["task"] = threading.Event()
+    gates["task"].set()
+
+    assert executor.acquire_slot()
+    assert run(executor.run("paper.docx", "task")) == ["task"]
+    assert executor.slots_in_use == 0
+    assert executor.jobs_running == 0
+
+
+def test_timed_out_job_keeps_its_worker_until_it_returns(thread_executor):
+    executor, calls, gates = thread_executor
+    gates["slow"] = threading.Event()
+    gates["next"] = threading.Event()
+    gates["next"].set()
+
+    async def scenario():
+        slow = asyncio.ensure_future(executor.run("slow.docx", "slow", holds_slot=False))
+        await asyncio.sleep(0)
+        following = asyncio.ensure_future(executor.run("next.docx", "next", holds_slot=False))
+
+        with pytest.raises(ParseTimeoutError):
+            await slow
+        # The worker is still busy, so the next job has not been admitted
+        assert executor.jobs_running == 1
+        assert executor.jobs_waiting == 1
+        assert calls == ["slow"]
+
+        gates["slow"].set()
+        assert await following == ["next"]
+        await asyncio.sleep(0.05)
+        assert executor.jobs_running == 0
+
+    run(scenario())
+
+
+def test_batch_document_reservations():
+    executor = ParseExecutor(max_workers=1, max_queued=2, timeout=10, max_queued_documents=5)
+    assert executor.reserve_documents(3)
+    assert not executor.reserve_documents(3)
+    assert executor.reserve_documents(2)
+    assert executor.documents_queued == 5
+
+    executor.release_documents()
+    assert executor.documents_queued == 4
+    executor.release_documents(10)
+    assert executor.documents_queued == 0
+
+
+def test_on_admitted_runs_only_once_the_job_gets_a_worker(thread_executor):
+    executor, calls, gates = thread_executor
+    gates["first"] = threading.Event()
+    gates["second"] = threading.Event()
+    gates["second"].set()
+    admitted = []
+
+    def recorder(task_id):
+        async def on_admitted():
+            admitted.append(task_id)
+        return on_admitted
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(
+            "a.docx", "first", holds_slot=False, on_admitted=recorder("first")
+        ))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(executor.run(
+            "b.docx", "second", holds_slot=False, on_admitted=recorder("second")
+        ))
+        await asyncio.sleep(0.05)
+        assert admitted == ["first"]
+
+        gates["first"].set()
+        await first
+        await second
+        assert admitted == ["first", "second"]
+
+    executor.timeout = 5
+    run(scenario())
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from app.core.parser.paragraph_classifier import ParagraphKind
+from app.core.parser.paragraph_index import ParagraphFeatures
+from app.core.parser.structure_grammar import GrammarError, GrammarRegistry
+
+with open(GrammarRegistry.DEFAULT_PATH, encoding="utf-8") as f:
+    BUNDLED = json.load(f)
+
+STANDARD = BUNDLED["rule_sets"]["standard"]
+
+
+def write_grammar(path, rule_sets, **extra):
+    path.write_text(
+        json.dumps({"default": "standard", "rule_sets": rule_sets, **extra}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+
+def classify(grammar, text):
+    features = ParagraphFeatures(text, has_image=False, has_formula=False, leading_pattern=grammar.leading_pattern)
+    return grammar.classifier.classify(features)
+
+
+@pytest.fixture
+def grammar_path(tmp_path):
+    path = tmp_path / "grammar.json"
+    write_grammar(path, {"standard": STANDARD})
+    return path
+
+
+def test_edits_are_picked_up_on_next_get(grammar_path):
+    registry = GrammarRegistry(str(grammar_path))
+    before = registry.get()
+    assert classify(before, "请阅读短文并作答") == ParagraphKind.TEXT
+
+    write_grammar(grammar_path, {
+        "standard": {**STANDARD, "material_keywords": STANDARD["material_keywords"] + ["请阅读短文并作答"]},
+    })
+    after = registry.get()
+
+    assert classify(after, "请阅读短文并作答") == ParagraphKind.MATERIAL
+    assert after.fingerprint != before.fingerprint
+
+
+def test_unchanged_file_is_not_recompiled(grammar_path):
+    registry = GrammarRegistry(str(grammar_path))
+    assert registry.get() is registry.get()
+
+
+def test_broken_file_keeps_previous_rules(grammar_path, capsys):
+    registry = GrammarRegistry(str(grammar_path))
+    grammar = registry.get()
+
+    grammar_path.write_text("{not json", encoding="utf-8")
+
+    assert registry.get() is grammar
+    assert "keeping previous rules" in capsys.readouterr().out
+
+
+def test_broken_file_without_previous_rules_raises(tmp_path):
+    path = tmp_path / "grammar.json"
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(GrammarError):
+        GrammarRegistry(str(path)).get()
+
+
+def test_rule_sets_extend_and_are_picked_by_paper_type(grammar_path):
+    write_grammar(
+        grammar_path,
+        {
+            "standard": STANDARD,
+            "english": {"extends": "standard", "question_number_pattern": r"(?P<number>\d+)\)"},
+        },
+        paper_types={"英语": "english"},
+    )
+    registry = GrammarRegistry(str(grammar_path))
+
+    assert registry.resolve_name(paper_type="英语") == "english"
+    assert registry.resolve_name(paper_type="物理") == "standard"
+    assert registry.resolve_name(rule_set="english") == "english"
+    english = registry.get("english")
+    assert english.material_keywords == STANDARD["material_keywords"]
+    assert classify(english, "3) 题干") == ParagraphKind.QUESTION
+    assert classify(registry.get(), "3) 题干") == ParagraphKind.TEXT
+
+    with pytest.raises(GrammarError):
+        registry.resolve_name(rule_set="nope")
+    with pytest.raises(GrammarError):
+        registry.get("nope")
+
+
+@pytest.mark.parametrize("override, message", [
+    ({"unexpected": []}, "unknown keys"),
+    ({"material_keywords": "阅读"}, "must be a list"),
+    ({"question_number_pattern": r"(\d+)[．.]"}, "named groups"),
+    ({"sub_answer_pattern": "(unclosed"}, "invalid sub_answer_pattern"),
+    ({"question_types": [{"keys": ["选择"]}]}, "question_types"),
+])
+def test_invalid_rule_sets_are_rejected(grammar_path, override, message):
+    write_grammar(grammar_path, {"standard": {**STANDARD, **override}})
+    with pytest.raises(GrammarError, match=message):
+        GrammarRegistry(str(grammar_path)).load()
+
+
+def test_extends_cycles_and_unknown_defaults_are_rejected(grammar_path):
+    write_grammar(grammar_path, {"standard": {**STANDARD, "extends": "standard"}})
+    with pytest.raises(GrammarError, match="extends itself"):
+        GrammarRegistry(str(grammar_path)).load()
+
+    write_grammar(grammar_path, {"standard": STANDARD}, paper_types={"英语": "english"})
+    with pytest.raises(GrammarError, match="unknown rule set"):
+        GrammarRegistry(str(grammar_path)).load()
@@ -0,0 +1,119 @@
+import pytest
+from docx import Document
+
+from app.core.parser.paragraph_classifier import ParagraphKind
+from app.core.parser.paragraph_index import ParagraphFeatures
+from app.core.parser.structure_grammar import GrammarRegistry
+from app.core.parser.structure_parser import ParseState, StructureParser
+
+
+@pytest.fixture(scope="module")
+def grammar():
+    return GrammarRegistry().get()
+
+
+@pytest.mark.parametrize("text, kind", [
+    ("", ParagraphKind.EMPTY),
+    ("   ", ParagraphKind.EMPTY),
+    ("一、选择题", ParagraphKind.SECTION),
+    ("十二、解答题（共 20 分）", ParagraphKind.SECTION),
+    ("阅读下列材料，完成下面小题", ParagraphKind.MATERIAL),
+    ("请同学们回答下列小题。", ParagraphKind.MATERIAL),
+    ("下列说法正确的是", ParagraphKind.TEXT),
+    ("A．选项一  B．选项二", ParagraphKind.TEXT),
+    ("【答案】C", ParagraphKind.ATTRIBUTE),
+    ("A、该选项错误", ParagraphKind.ANALYSIS_OPTION),
+    ("3．A、该选项错误", ParagraphKind.ANALYSIS_DETAIL),
+    ("3．下列说法正确的是", ParagraphKind.QUESTION),
+    ("3.【答案】C", ParagraphKind.QUESTION_ATTRIBUTE),
+    ("(1)求速度", ParagraphKind.SUB_QUESTION),
+    ("(1)【答案】2 m/s", ParagraphKind.SUB_QUESTION_ATTRIBUTE),
+])
+def test_classify(grammar, text, kind):
+    features = ParagraphFeatures(text, has_image=False, has_formula=False, leading_pattern=grammar.leading_pattern)
+    assert grammar.classifier.classify(features) == kind
+
+
+def test_classify_special_blocks(grammar):
+    classify = grammar.classifier.classify
+    assert classify(ParagraphFeatures("", has_image=True, has_formula=False)) == ParagraphKind.TEXT
+    assert classify(ParagraphFeatures("1．a\tb", has_image=False, has_formula=False, is_table=True)) == ParagraphKind.TABLE
+    # Material keywords are ignored in fill-in sections
+    material = ParagraphFeatures("阅读下列材料，回答问题", has_image=False, has_formula=False)
+    assert classify(material, allow_material=False) == ParagraphKind.TEXT
+
+
+def test_section_header_wins_over_material_keyword(grammar):
+    features = ParagraphFeatures("二、回答下列小题", has_image=False, has_formula=False)
+    assert grammar.classifier.classify(features) == ParagraphKind.SECTION
+    assert grammar.classifier.section_name("二、回答下列小题") == "回答下列小题"
+
+
+def test_every_state_handles_every_paragraph_kind():
+    for state in ParseState:
+        handlers = StructureParser.TRANSITIONS[state]
+        assert set(handlers) == set(ParagraphKind)
+        for handler in handlers.values():
+            assert callable(getattr(StructureParser, handler))
+
+
+def extract(texts):
+    document = Document()
+    for text in texts:
+        document.add_paragraph(text)
+    return [
+        (
+            block["number"],
+            block["type"],
+            block["is_material"],
+            [p.text for p in block["paragraphs"]],
+            [(sub["number"], [p.text for p in sub["paragraphs"]]) for sub in block["sub_questions"]],
+        )
+        for block in StructureParser(document.paragraphs).extract_question_blocks()
+    ]
+
+
+def test_extract_question_blocks():
+    assert extract([
+        "前言不属于任何题目",
+        "一、选择题",
+        "1．题干甲",
+        "A．x  B．y",
+        "【答案】A",
+        "",
+        "2．题干乙",
+        "二、综合题",
+        "阅读下列材料，回答问题",
+        "材料内容",
+        "3．子题一",
+        "【答案】甲",
+        "4．子题二",
+        "(1)部分一",
+        "三、填空题",
+        "5．填空",
+        "(1)空一",
+        "阅读下列材料，回答问题",
+    ]) == [
+        ("1", "选择题", False, ["1．题干甲", "A．x  B．y", "【答案】A"], []),
+        ("2", "选择题", False, ["2．题干乙"], []),
+        (
+            "3", "综合题", True,
+            # Attribute blocks go to the material, never into sub-question stems
+            ["阅读下列材料，回答问题", "材料内容", "【答案】甲"],
+            [("3", ["3．子题一"]), ("4", ["4．子题二"]), ("(1)", ["(1)部分一"])],
+        ),
+        # Fill-in sections keep (1) parts inline and ignore material keywords
+        ("5", "填空题", False, ["5．填空", "(1)空一", "阅读下列材料，回答问题"], []),
+    ]
+
+
+def test_sub_parts_outside_inline_sections_become_sub_questions():
+    assert extract([
+        "一、综合题",
+        "1．如图所示",
+        "(1)求速度",
+        "补充说明",
+        "(2)求加速度",
+    ]) == [
+        ("1", "综合题", True, ["1．如图所示"], [("(1)", ["(1)求速度", "补充说明"]), ("(2)", ["(2)求加速度"])]),
+    ]
@@ -0,0 +1,156 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.task_manager import AsyncTaskManager, TaskManager
+from app.core.task_store import MemoryTaskStore, SQLiteTaskStore, TaskInfo, TaskStatus
+from app.models.schemas.question import QuestionItem
+
+
+def make_question(number: str, stem: str = "求x的值") -> QuestionItem:
+    return QuestionItem(id=number, number=number, type="解答题", stem=stem, answer="x=1")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryTaskStore()
+    return SQLiteTaskStore(str(tmp_path / "tasks.db"))
+
+
+def backdate(store, task_id: str, seconds: int) -> None:
+    """Pretend a task was last updated some seconds ago"""
+    updated_at = datetime.now() - timedelta(seconds=seconds)
+    if isinstance(store, SQLiteTaskStore):
+        store._connect().execute(
+            "UPDATE tasks SET updated_at = ? WHERE task_id = ?", (updated_at.timestamp(), task_id)
+        )
+    else:
+        store.get(task_id).updated_at = updated_at
+
+
+def test_task_round_trip(store):
+    store.create(TaskInfo("t1", {"name": "期中考试"}, batch_id="b1", filename="a.docx"))
+    store.update("t1", status=TaskStatus.PROCESSING, progress={"blocksDone": 1, "blocksTotal": 2})
+
+    task = store.get("t1")
+    assert task.metadata == {"name": "期中考试"}
+    assert (task.batch_id, task.filename) == ("b1", "a.docx")
+    assert task.status == TaskStatus.PROCESSING
+    assert task.progress == {"blocksDone": 1, "blocksTotal": 2}
+    assert task.questions is None
+    assert store.get("missing") is None
+
+
+def test_result_round_trip_replaces_streamed_questions(store):
+    store.create(TaskInfo("t1"))
+    store.append_question("t1", make_question("1"))
+    store.append_question("t1", make_question("2"))
+    assert [q.number for q in store.get_streamed_questions("t1")] == ["1", "2"]
+    assert [q.number for q in store.get_streamed_questions("t1", 1)] == ["2"]
+
+    questions = [make_question("1", "已知<math><mi>x</mi></math>"), make_question("2")]
+    store.update("t1", questions=questions, status=TaskStatus.COMPLETED, stats={"questions": 2})
+
+    task = store.get("t1")
+    assert task.status == TaskStatus.COMPLETED
+    assert task.questions == questions
+    assert task.stats == {"questions": 2}
+    assert store.get_streamed_questions("t1") == []
+
+
+def test_update_rejects_unknown_fields(store):
+    store.create(TaskInfo("t1"))
+    with pytest.raises(ValueError):
+        store.update("t1", owner="someone")
+
+
+def test_get_batch_keeps_upload_order_without_results(store):
+    for task_id in ("c", "a", "b"):
+        store.create(TaskInfo(task_id, batch_id="batch"))
+    store.create(TaskInfo("other", batch_id="another"))
+    store.update("a", questions=[make_question("1")], status=TaskStatus.COMPLETED)
+
+    tasks = store.get_batch("batch")
+    assert [task.task_id for task in tasks] == ["c", "a", "b"]
+    if isinstance(store, SQLiteTaskStore):
+        assert all(task.questions is None for task in tasks)
+
+
+def test_tokens_and_cache_round_trip(store):
+    store.create(TaskInfo("t1"))
+    tokens = {"1": {"stem": "eJwDAAAAAAE="}}
+    store.set_tokens("t1", tokens)
+    assert store.get_tokens("t1") == tokens
+
+    questions = [make_question("1")]
+    store.set_cached_result("key", "t1", questions, tokens)
+    assert store.get_cached_result("key") == questions
+    assert store.get_cached_tokens("key") == tokens
+    assert store.get_cached_result("other") is None
+
+
+def test_purge_expired_only_removes_old_finished_tasks(store):
+    for task_id in ("old-done", "new-done", "old-running"):
+        store.create(TaskInfo(task_id))
+    store.update("old-done", status=TaskStatus.COMPLETED)
+    store.update("new-done", status=TaskStatus.FAILED, error="boom")
+    store.update("old-running", status=TaskStatus.PROCESSING)
+    backdate(store, "old-done", 120)
+    backdate(store, "old-running", 120)
+
+    assert store.purge_expired(60) == 1
+    assert store.get("old-done") is None
+    assert store.get("new-done") is not None
+    assert store.get("old-running") is not None
+
+
+def test_fail_stale_marks_orphaned_unfinished_tasks(store):
+    for task_id in ("orphan-pending", "orphan-processing", "alive", "done"):
+        store.create(TaskInfo(task_id))
+    store.update("orphan-processing", status=TaskStatus.PROCESSING)
+    store.update("done", status=TaskStatus.COMPLETED)
+    for task_id in ("orphan-pending", "orphan-processing", "done"):
+        backdate(store, task_id, 600)
+
+    assert store.fail_stale(300, "interrupted") == 2
+    for task_id in ("orphan-pending", "orphan-processing"):
+        task = store.get(task_id)
+        assert (task.status, task.error) == (TaskStatus.FAILED, "interrupted")
+    assert store.get("alive").status == TaskStatus.PENDING
+    assert store.get("done").status == TaskStatus.COMPLETED
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    SQLiteTaskStore(path).create(TaskInfo("t1", {"name": "卷一"}))
+    assert SQLiteTaskStore(path).get("t1").metadata == {"name": "卷一"}
+
+
+def test_task_manager_fails_stale_tasks(store):
+    manager = TaskManager(store, purge_interval=0, stale_seconds=300)
+    task_id = manager.create_task()
+    backdate(store, task_id, 600)
+
+    assert manager.is_stale(manager.get_task(task_id))
+    manager.create_task()  # purges
+    task = manager.get_task(task_id)
+    assert task.status == TaskStatus.FAILED
+    assert task.error == TaskManager.STALE_ERROR
+    assert not manager.is_stale(task)
+
+
+def test_async_task_manager_runs_store_calls(store):
+    manager = AsyncTaskManager(TaskManager(store))
+
+    async def scenario():
+        task_id = await manager.create_task({"name": "卷一"})
+        await manager.append_question(task_id, make_question("1"))
+        assert len(await manager.get_streamed_questions(task_id)) == 1
+        await manager.set_result(task_id, [make_question("1")])
+        return await manager.get_task(task_id)
+
+    task = asyncio.run(scenario())
+    assert task.status == TaskStatus.COMPLETED
+    assert [q.number for q in task.questions] == ["1"]
@@ -0,0 +1,108 @@
+import asyncio
+import re
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.text_search import build_tsquery, html_to_text, search_terms, tokenize
+
+
+def matches(text: str, query: str) -> bool:
+    """
+    Evaluate build_tsquery output against text the way PostgreSQL would
+
+    The indexed tsvector holds each term of search_terms at its position;
+    <-> needs consecutive positions and :* matches any term with that prefix.
+    """
+    terms = search_terms([text]).split()
+    for phrase in build_tsquery(query).split(" & "):
+        operands = re.findall(r"'([^']+)'(:\*)?", phrase)
+
+        def found(position: int, operand) -> bool:
+            value, prefix = operand
+            term = terms[position]
+            return term.startswith(value) if prefix else term == value
+
+        if not any(
+            all(found(start + offset, operand) for offset, operand in enumerate(operands))
+            for start in range(len(terms) - len(operands) + 1)
+        ):
+            return False
+    return True
+
+
+def test_tokenize_splits_chinese_runs_into_bigrams_and_keeps_the_last_character():
+    assert tokenize("化学反应") == ["化学", "学反", "反应", "应"]
+    assert tokenize("求x的值") == ["求", "x", "的值", "值"]
+
+
+def test_tokenize_normalizes_full_width_characters():
+    assert tokenize("Ｈ２Ｏ与ＮａＣｌ") == ["h2o", "与", "nacl"]
+
+
+def test_build_tsquery_renders_single_chinese_characters_as_prefixes():
+    assert build_tsquery("水") == "'水':*"
+    assert build_tsquery("x的") == "('x' <-> '的':*)"
+    assert build_tsquery("2mol水") == "('2mol' <-> '水':*)"
+    assert build_tsquery("化学 反应") == "('化学' <-> '学':*) & ('反应' <-> '应':*)"
+
+
+def test_build_tsquery_keeps_single_letters_exact():
+    assert build_tsquery("x") == "'x'"
+
+
+def test_tokenize_mixed_latin_and_chinese_runs():
+    assert tokenize("用NaOH溶液滴定") == ["用", "naoh", "溶液", "液滴", "滴定", "定"]
+    assert tokenize("pH值为7") == ["ph", "值为", "为", "7"]
+    assert tokenize("Fe2O3与CO2") == ["fe2o3", "与", "co2"]
+
+
+def test_build_tsquery_mixed_latin_and_chinese_runs():
+    assert build_tsquery("NaOH溶液") == "('naoh' <-> '溶液' <-> '液':*)"
+    assert build_tsquery("pH值") == "('ph' <-> '值':*)"
+
+
+@pytest.mark.parametrize("query", ["，。 ?", "。。。", "——", "（）【】", "   ", "", "\u3000"])
+def test_build_tsquery_without_searchable_terms(query):
+    assert build_tsquery(query) is None
+
+
+def test_search_endpoint_rejects_queries_without_terms():
+    from app.api.v1.question import search_questions
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(search_questions(q="？！", subject=None, question_type=None, limit=20, offset=0, db=None))
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("text, query", [
+    ("加入少量水", "水"),
+    ("求x的值", "x的"),
+    ("取2mol水溶液", "2mol水"),
+    ("取2mol水溶液", "溶液"),
+    ("加入少量水", "少量水"),
+    ("化学反应速率", "反应 速率"),
+    ("用NaOH溶液滴定", "NaOH溶液"),
+    ("用NaOH溶液滴定", "naoh溶"),
+    ("用NaOH溶液滴定", "NaOH 滴定"),
+    ("测得pH值为7", "pH值"),
+    ("通入CO2和H2O", "和H2O"),
+])
+def test_query_matches_text(text, query):
+    assert matches(text, query)
+
+
+@pytest.mark.parametrize("text, query", [
+    ("加入少量水", "火"),
+    ("加入少量水，溶液", "水溶"),
+    ("求x的值", "y的"),
+    ("用NaOH溶液滴定", "溶液NaOH"),
+    ("通入CO2和H2O", "CO H2O"),
+])
+def test_query_does_not_match_text(text, query):
+    assert not matches(text, query)
+
+
+def test_html_to_text_reads_formula_tokens():
+    html = "<p>H<sub>2</sub>O</p><math><mi>x</mi><annotation>x</annotation></math>"
+    assert html_to_text(html) == "H2O x"
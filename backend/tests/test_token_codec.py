@@ -0,0 +1,75 @@
+import json
+
+from app.core.parser.token_codec import (
+    CODEC_VERSION,
+    build_token_index,
+    content_hash,
+    decode_tokens,
+    encode_tokens,
+    lookup_tokens,
+)
+from app.models.schemas.question import QuestionItem
+
+FORMULA = {"t": "math", "omml": "<m:oMath><m:r><m:t>x</m:t></m:r></m:oMath>", "mathml": "<math><mi>x</mi></math>"}
+
+TOKENS = [
+    {"t": "text", "v": "已知 "},
+    FORMULA,
+    {"t": "sub", "v": "2"},
+    {"t": "sup", "v": "+"},
+    {"t": "u", "v": "    "},
+    {"t": "img", "ref": 3},
+    {"t": "text", "v": "\n"},
+    {
+        "t": "table",
+        "rows": [
+            [{"v": [{"t": "text", "v": "物质"}], "colspan": 2}, {"v": [FORMULA], "rowspan": 2}],
+            [{"v": []}, {"v": [{"t": "img", "ref": 4}, FORMULA]}],
+        ],
+    },
+    FORMULA,
+]
+
+
+def test_round_trip_through_json():
+    document = json.loads(json.dumps(encode_tokens(TOKENS)))
+    assert decode_tokens(document) == TOKENS
+
+
+def test_repeated_formulas_are_stored_once():
+    document = encode_tokens(TOKENS)
+    assert document["v"] == CODEC_VERSION
+    assert document["m"] == {content_hash(FORMULA["omml"]): [FORMULA["omml"], FORMULA["mathml"]]}
+
+
+def test_documents_without_formulas_have_no_formula_map():
+    document = encode_tokens([{"t": "text", "v": "a"}])
+    assert document == {"v": CODEC_VERSION, "k": [["x", "a"]]}
+    assert decode_tokens(document) == [{"t": "text", "v": "a"}]
+
+
+def test_unknown_token_types_are_dropped():
+    assert decode_tokens(encode_tokens([{"t": "bookmark", "v": "x"}, {"t": "text", "v": "a"}])) == [
+        {"t": "text", "v": "a"}
+    ]
+    assert decode_tokens({"v": CODEC_VERSION, "k": [["?", "x"], ["x", "a"]]}) == [{"t": "text", "v": "a"}]
+
+
+def make_question(id, stem, tokens, children=None):
+    question = QuestionItem(id=id, number=id, type="解答题", stem=stem, answer="", children=children)
+    question._stem_tokens = tokens
+    return question
+
+
+def test_token_index_covers_children_and_checks_the_html():
+    child = make_question("1-1", "<p>b</p>", [{"t": "text", "v": "b"}])
+    parent = make_question("1", "<p>a</p>", [{"t": "text", "v": "a"}], children=[child])
+    untokenized = make_question("2", "<p>c</p>", None)
+
+    index = build_token_index([parent, untokenized])
+
+    assert set(index) == {"1", "1-1"}
+    assert decode_tokens(lookup_tokens(index, "1-1", "stem", "<p>b</p>")) == [{"t": "text", "v": "b"}]
+    assert lookup_tokens(index, "1-1", "stem", "<p>edited</p>") is None
+    assert lookup_tokens(index, "2", "stem", "<p>c</p>") is None
+    assert lookup_tokens(None, "1", "stem", "<p>a</p>") is None